@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+PALAScribe Server Benchmarks
+Synthetic-data benchmarks for database and API hot paths.
+
+Usage: python benchmark_server.py [benchmark ...]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+# Add the project directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from palascribe_server import (NUMPY_AVAILABLE, WHISPER_AVAILABLE, DatabaseManager, PcmCache, WhisperEngine,
+                               detect_speech_regions, format_transcription_text)
+
+# Vocabulary for synthetic discourse text: common English words plus a long
+# tail of filler words, with Pali terms appearing far less often
+COMMON_WORDS = (
+    "the mind body breath sensation awareness practice moment observe arise pass away "
+    "meditation teacher student retreat morning evening silence patience effort"
+).split()
+FILLER_WORDS = [f"word{i}" for i in range(5000)]
+PALI_TERMS = (
+    "Satipaṭṭhāna Vipassanā Anicca Anattā Dukkha Dhamma Saṅgha Sīla Samādhi Paññā "
+    "Mettā Karuṇā Upekkhā Nibbāna Saṃsāra Kamma Taṇhā Sutta Bhikkhu"
+).split()
+VOCABULARY = COMMON_WORDS * 40 + FILLER_WORDS + PALI_TERMS
+
+
+def synthetic_text(rng, words):
+    """Generate a pseudo discourse of the given number of words"""
+    sentences = []
+    while words > 0:
+        n = min(words, rng.randint(8, 20))
+        sentences.append(' '.join(rng.choice(VOCABULARY) for _ in range(n)).capitalize() + '.')
+        words -= n
+    return ' '.join(sentences)
+
+
+def populate(db_manager, n_projects, words=400, segments=10, seed=42):
+    """Create n_projects projects with synthetic transcripts and segments"""
+    rng = random.Random(seed)
+    with redirect_stdout(StringIO()):
+        for i in range(n_projects):
+            project = db_manager.create_project(f"Discourse {i}", f"User {i % 7}")
+            text = synthetic_text(rng, words)
+            step = max(1, len(text.split()) // segments)
+            tokens = text.split()
+            segs = [{'start': k * 5.0, 'end': k * 5.0 + 5.0, 'text': ' '.join(tokens[k * step:(k + 1) * step])}
+                    for k in range(segments)]
+            db_manager.update_project(project['id'], {'transcription': text, 'segments': segs})
+
+
+def bench_search(n_projects=10000, queries=200):
+    """Full-text search latency over an n-project corpus"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_manager = DatabaseManager(os.path.join(temp_dir, "bench.db"))
+        print(f"🏗️ Populating {n_projects} projects...")
+        start = time.perf_counter()
+        populate(db_manager, n_projects)
+        print(f"   done in {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(7)
+        terms = ['satipatthana', 'vipassana', 'anicca anatta', 'breath', 'samsara kamma', 'mett*', 'word42']
+        latencies = []
+        for _ in range(queries):
+            q = rng.choice(terms)
+            start = time.perf_counter()
+            db_manager.search(q, limit=20)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        latencies.sort()
+        print(f"🔎 search over {n_projects} projects ({queries} queries): "
+              f"p50={latencies[len(latencies) // 2]:.1f}ms p95={latencies[int(len(latencies) * 0.95)]:.1f}ms "
+              f"max={latencies[-1]:.1f}ms")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def text_storage_bytes(db_path):
+    """Bytes used by the projects row store and the project text tables (excludes search indexes)"""
+    conn = sqlite3.connect(db_path)
+    size = conn.execute('''
+        SELECT SUM(pgsize) FROM dbstat
+        WHERE name IN ('projects', 'project_texts', 'text_blobs')
+           OR name LIKE 'sqlite_autoindex_project%' OR name LIKE 'sqlite_autoindex_text_blobs%'
+    ''').fetchone()[0]
+    conn.close()
+    return size or 0
+
+
+def bench_storage(n_projects=100, words=30000):
+    """DB size with text bodies inline on projects (legacy) vs. compressed project_texts"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(temp_dir, "bench.db")
+        with redirect_stdout(StringIO()):
+            db_manager = DatabaseManager(db_path)
+            project_ids = [db_manager.create_project(f"Discourse {i}")['id'] for i in range(n_projects)]
+
+        # Legacy layout: transcription and formatted text each carry the
+        # provenance header, edited text is a copy, rich content an HTML copy
+        rng = random.Random(3)
+        conn = sqlite3.connect(db_path)
+        for project_id in project_ids:
+            text = synthetic_text(rng, words)
+            with redirect_stdout(StringIO()):
+                formatted = format_transcription_text(text)
+            header = "---SOURCE-INFO-START---\n" + json.dumps({
+                'stored_filename': f"{project_id}.mp3", 'whisper_model': 'medium', 'transcription_version': 1
+            }, indent=2) + "\n---SOURCE-INFO-END---\n\n"
+            rich = ''.join(f"<p>{p}</p>" for p in formatted.split('\n\n'))
+            conn.execute('''
+                UPDATE projects SET transcription = ?, formatted_text = ?, edited_text = ?, rich_content = ?
+                WHERE id = ?
+            ''', (header + text, header + formatted, formatted, rich, project_id))
+        conn.commit()
+        conn.execute('VACUUM')
+        conn.close()
+        before = os.path.getsize(db_path)
+
+        before_text = text_storage_bytes(db_path)
+
+        # Re-opening the database moves the bodies into project_texts
+        with redirect_stdout(StringIO()):
+            DatabaseManager(db_path)
+        after = os.path.getsize(db_path)
+        after_text = text_storage_bytes(db_path)
+
+        print(f"💾 {n_projects} projects x ~{words} words")
+        print(f"   text storage: inline {before_text / 1e6:.1f}MB -> project_texts {after_text / 1e6:.1f}MB "
+              f"({after_text / before_text:.0%})")
+        print(f"   database file: {before / 1e6:.1f}MB -> {after / 1e6:.1f}MB "
+              f"(after includes the full-text index built from the moved bodies)")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bench_startup(sizes=(100, 5000), restarts=20):
+    """Server startup (DatabaseManager init) time vs. archive size"""
+    for n_projects in sizes:
+        temp_dir = tempfile.mkdtemp()
+        original_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            # A legacy archive: projects plus exports/{id}/index.json and manifests
+            conn = sqlite3.connect("bench.db")
+            conn.execute('''
+                CREATE TABLE projects (id TEXT PRIMARY KEY, name TEXT NOT NULL, assigned_to TEXT, start_date TEXT,
+                    end_date TEXT, status TEXT DEFAULT 'new', audio_file_name TEXT, audio_file_path TEXT,
+                    transcription TEXT, formatted_text TEXT, edited_text TEXT, rich_content TEXT,
+                    word_count INTEGER DEFAULT 0, processing_time REAL, is_preview BOOLEAN DEFAULT 0,
+                    error_message TEXT, created TEXT NOT NULL, updated TEXT NOT NULL)
+            ''')
+            for i in range(n_projects):
+                project_id = f"project-{i}"
+                conn.execute("INSERT INTO projects (id, name, created, updated) VALUES (?, ?, '', '')",
+                             (project_id, f"Discourse {i}"))
+                export_dir = os.path.join("exports", project_id)
+                os.makedirs(export_dir)
+                with open(os.path.join(export_dir, "v1.json"), 'w') as f:
+                    json.dump({'project_id': project_id, 'version': 1}, f)
+                with open(os.path.join(export_dir, "index.json"), 'w') as f:
+                    json.dump({'project_id': project_id, 'history': [{'version': 1, 'manifest': 'v1.json'}]}, f)
+            conn.commit()
+            conn.close()
+
+            with redirect_stdout(StringIO()):
+                start = time.perf_counter()
+                DatabaseManager("bench.db")
+                first = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for _ in range(restarts):
+                    DatabaseManager("bench.db")
+                warm = (time.perf_counter() - start) / restarts
+
+            print(f"🚀 {n_projects} projects/exports: first start (migrations + backfill) {first * 1000:.1f}ms, "
+                  f"later starts {warm * 1000:.2f}ms")
+        finally:
+            os.chdir(original_cwd)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bench_serialize(n_projects=1000, rounds=20):
+    """GET /projects list serialization throughput (rows -> project dicts)"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_manager = DatabaseManager(os.path.join(temp_dir, "bench.db"))
+        with redirect_stdout(StringIO()):
+            for i in range(n_projects):
+                project = db_manager.create_project(f"Discourse {i}", f"User {i % 7}")
+                db_manager.update_project(project['id'], {
+                    'status': 'Needs_Review', 'word_count': 1000 + i,
+                    'audio_file_name': f"talk-{i}.mp3", 'audio_file_path': f"uploads/{project['id']}.mp3"
+                })
+
+        for include_text in (False, True):
+            sink = StringIO()
+            with redirect_stdout(sink):
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    db_manager.get_all_projects(include_text=include_text)
+                elapsed = time.perf_counter() - start
+            label = "with text" if include_text else "summary"
+            print(f"📋 get_all_projects ({label}) x{n_projects}: {rounds * n_projects / elapsed:,.0f} projects/s, "
+                  f"{elapsed / rounds * 1000:.1f}ms per list, {len(sink.getvalue().splitlines()) // rounds} log lines per list")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bench_history(words=30000, saves=500):
+    """Edit history storage growth and past-version rebuild latency"""
+    temp_dir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(temp_dir, "bench.db")
+        rng = random.Random(11)
+        with redirect_stdout(StringIO()):
+            db_manager = DatabaseManager(db_path)
+            project_id = db_manager.create_project("Long Discourse")['id']
+            text = synthetic_text(rng, words)
+            
+            save_times = []
+            for _ in range(saves):
+                # One small edit per save, somewhere in the document
+                position = rng.randrange(len(text))
+                text = text[:position] + rng.choice(PALI_TERMS) + text[position + rng.randint(0, 12):]
+                start = time.perf_counter()
+                db_manager.update_project(project_id, {'edited_text': text})
+                save_times.append((time.perf_counter() - start) * 1000)
+        
+        conn = sqlite3.connect(db_path)
+        history_bytes = conn.execute('''
+            SELECT (SELECT SUM(pgsize) FROM dbstat WHERE name LIKE '%text_revisions%')
+                 + (SELECT SUM(LENGTH(data)) FROM text_blobs
+                    WHERE content_hash IN (SELECT snapshot_hash FROM text_revisions))
+        ''').fetchone()[0]
+        full_copy = len(zlib.compress(text.encode('utf-8'), 6))
+        versions = [row[0] for row in conn.execute('SELECT version FROM text_revisions')]
+        conn.close()
+        
+        rebuild_times = []
+        for version in rng.sample(versions, 100):
+            start = time.perf_counter()
+            db_manager.get_text_at_version(project_id, version)
+            rebuild_times.append((time.perf_counter() - start) * 1000)
+        
+        save_times.sort()
+        rebuild_times.sort()
+        print(f"📜 {saves} saves of a {len(text) / 1e3:.0f}k-char document")
+        print(f"   history storage {history_bytes / 1e6:.2f}MB vs {saves * full_copy / 1e6:.1f}MB "
+              f"for compressed full copies per save")
+        print(f"   save p50={save_times[len(save_times) // 2]:.1f}ms, "
+              f"rebuild any version p50={rebuild_times[50]:.1f}ms max={rebuild_times[-1]:.1f}ms")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bench_audio(uploads=500, recordings=100, size=64 * 1024, n_files=100000, lookups=20000):
+    """Content-addressed audio store: disk savings from dedup and lookup cost at n_files"""
+    temp_dir = tempfile.mkdtemp()
+    original_cwd = os.getcwd()
+    os.chdir(temp_dir)
+    try:
+        # The same recordings uploaded into several projects (~5 each)
+        rng = random.Random(5)
+        contents = [rng.randbytes(size) for _ in range(recordings)]
+        with redirect_stdout(StringIO()):
+            db_manager = DatabaseManager("bench.db")
+            for i in range(uploads):
+                project_id = db_manager.create_project(f"Retreat {i}")['id']
+                recording = rng.randrange(recordings)
+                db_manager.save_audio_file(project_id, contents[recording], f"talk-{recording}.mp3", "audio/mpeg")
+        stored = sum(f.stat().st_size for f in Path("uploads").rglob("*.mp3"))
+        print(f"💽 {uploads} uploads of {size // 1024}KB: {uploads * size / 1e6:.1f}MB uploaded, "
+              f"{stored / 1e6:.1f}MB on disk ({1 - stored / (uploads * size):.0%} saved)")
+        
+        # Directory cost with n_files names: flat vs. two-level sharded
+        names = [hashlib.sha256(str(i).encode()).hexdigest() + ".mp3" for i in range(n_files)]
+        layouts = {
+            'flat': lambda name: os.path.join("flat", name),
+            'sharded': lambda name: os.path.join("sharded", name[:2], name[2:4], name),
+        }
+        for label, path_of in layouts.items():
+            for name in names:
+                path = path_of(name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, 'wb').close()
+            sample = rng.sample(names, lookups)
+            start = time.perf_counter()
+            for name in sample:
+                os.stat(path_of(name))
+            stat_us = (time.perf_counter() - start) / lookups * 1e6
+            start = time.perf_counter()
+            listed = len(os.listdir(os.path.dirname(path_of(sample[0]))))
+            list_ms = (time.perf_counter() - start) * 1000
+            print(f"📂 {n_files} files {label}: stat {stat_us:.1f}us, "
+                  f"listdir of a containing directory ({listed} entries) {list_ms:.2f}ms")
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bench_vad(hours=1.0, seed=9):
+    """VAD pre-pass over a decoded retreat recording: detection time and audio skipped"""
+    if not NUMPY_AVAILABLE:
+        print("⚠️ numpy not installed; skipping")
+        return
+    import numpy as np
+    rate = PcmCache.SAMPLE_RATE
+    rng = np.random.default_rng(seed)
+    # Talks (tone plus noise) between silent sittings of 1-20 minutes
+    path = Path("retreat.pcm")
+    speech_seconds = 0
+    with open(path, 'wb') as f:
+        total = 0
+        while total < hours * 3600:
+            talk, sitting = rng.uniform(30, 600), rng.uniform(60, 1200)
+            t = np.arange(int(talk * rate), dtype=np.float32)
+            (np.sin(t * 0.07) * 0.2 + rng.standard_normal(t.size, dtype=np.float32) * 0.02).astype('<f4').tofile(f)
+            (rng.standard_normal(int(sitting * rate), dtype=np.float32) * 2e-4).astype('<f4').tofile(f)
+            speech_seconds += talk
+            total += talk + sitting
+    samples = np.memmap(path, dtype='<f4', mode='c')
+    start = time.perf_counter()
+    regions = detect_speech_regions(samples, rate)
+    elapsed = time.perf_counter() - start
+    detected = sum(end - start for start, end in regions)
+    print(f"🔇 {total / 3600:.1f}h recording: VAD in {elapsed:.2f}s ({total / elapsed:.0f}x real time), "
+          f"{len(regions)} speech regions, {1 - detected / total:.0%} skipped "
+          f"(true non-speech {1 - speech_seconds / total:.0%}), ~{total / detected:.1f}x less to transcribe")
+    del samples
+    path.unlink()
+
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance between two transcripts, over the reference length"""
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (ref_word != hyp_word))
+    return row[-1] / max(len(ref), 1)
+
+
+def bench_quantized(model='medium', audio='test-audio.wav'):
+    """In-process Whisper on CPU, fp32 vs dynamic int8: load time, real-time factor, word differences"""
+    if not (NUMPY_AVAILABLE and WHISPER_AVAILABLE):
+        print("⚠️ numpy and openai-whisper not installed; skipping")
+        return
+    import torch
+    import whisper
+    samples = whisper.load_audio(str(Path(__file__).parent / audio))
+    seconds = len(samples) / PcmCache.SAMPLE_RATE
+    cache_dir = Path("models")
+    texts = {}
+    for precision in WhisperEngine.PRECISIONS:
+        # A second engine reloads the int8 model from the disk cache
+        for load in ('first', 'cached') if precision == 'int8' else ('first',):
+            engine = WhisperEngine(precision=precision, cache_dir=cache_dir)
+            start = time.perf_counter()
+            with redirect_stdout(StringIO()):
+                engine._model(model, precision)
+            print(f"🧠 {model} {precision} load ({load}): {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        with redirect_stdout(StringIO()):
+            texts[precision] = engine.transcribe(samples, model=model, language='English', fp16=False)['text']
+        elapsed = time.perf_counter() - start
+        print(f"🎙️ {model} {precision} on {seconds:.0f}s of audio ({torch.get_num_threads()} threads): "
+              f"{elapsed:.1f}s, real-time factor {elapsed / seconds:.3f}")
+    print(f"📝 int8 vs fp32 transcript: {word_error_rate(texts['fp32'], texts['int8']):.1%} word error difference "
+          f"({len(texts['fp32'].split())} words)")
+
+BENCHMARKS = {
+    'audio': bench_audio,
+    'history': bench_history,
+    'quantized': bench_quantized,
+    'search': bench_search,
+    'serialize': bench_serialize,
+    'startup': bench_startup,
+    'storage': bench_storage,
+    'vad': bench_vad,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PALAScribe server benchmarks")
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run: {', '.join(sorted(BENCHMARKS))} (default: all)")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    # DatabaseManager creates ./uploads; keep it out of the working tree
+    original_cwd = os.getcwd()
+    work_dir = tempfile.mkdtemp()
+    os.chdir(work_dir)
+    try:
+        for name in args.benchmarks or sorted(BENCHMARKS):
+            print(f"⏱️ Running benchmark: {name}")
+            BENCHMARKS[name]()
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
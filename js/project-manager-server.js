@@ -4,6 +4,9 @@ class ServerProjectManager {
         this.projects = [];
         this.currentProject = null;
         this.apiBaseUrl = 'http://localhost:8765';
+        // Incremental sync state: watermark and collection ETag of the last list
+        this.syncToken = null;
+        this.projectsEtag = null;
         this.loadProjects();
     }
 
@@ -45,30 +48,62 @@ class ServerProjectManager {
         }
     }
 
-    // Load all projects from server
-    async loadProjects() {
+    // Load projects from server: the full list first, then only changes
+    // since the last sync token (an unchanged list costs an empty 304)
+    async loadProjects(forceFull = false) {
+        const incremental = !forceFull && this.syncToken !== null;
+        const url = incremental
+            ? `${this.apiBaseUrl}/projects?since=${encodeURIComponent(this.syncToken)}`
+            : `${this.apiBaseUrl}/projects`;
+        const headers = incremental && this.projectsEtag ? { 'If-None-Match': this.projectsEtag } : {};
+
         try {
-            const response = await fetch(`${this.apiBaseUrl}/projects`);
+            const response = await fetch(url, { headers });
+            if (response.status === 304) {
+                return;
+            }
             if (response.ok) {
                 const data = await response.json();
-                this.projects = data.projects || [];
-                console.log(`✅ Loaded ${this.projects.length} projects from server`);
+                if (incremental && !data.full) {
+                    this.mergeProjectChanges(data.projects || [], data.deleted || []);
+                    console.log(`✅ Synced ${(data.projects || []).length} changed, ${(data.deleted || []).length} deleted projects`);
+                } else {
+                    this.projects = data.projects || [];
+                    console.log(`✅ Loaded ${this.projects.length} projects from server`);
+                }
+                this.syncToken = data.syncToken || null;
+                this.projectsEtag = response.headers.get('ETag');
             } else {
                 console.warn('⚠️ Could not load projects from server, using empty list');
                 this.projects = [];
+                this.syncToken = null;
             }
         } catch (error) {
             console.warn('⚠️ Server not available, using empty project list:', error.message);
             this.projects = [];
+            this.syncToken = null;
         }
     }
 
+    // Apply a delta from GET /projects?since=: replace changed projects, drop deleted ones
+    mergeProjectChanges(changed, deletedIds) {
+        const removed = new Set(deletedIds);
+        changed.forEach(project => removed.add(project.id));
+        this.projects = changed.concat(this.projects.filter(p => !removed.has(p.id)));
+        this.projects.sort((a, b) => (b.created || '').localeCompare(a.created || ''));
+    }
+
+    // Whether a project came with its text bodies (list entries do not)
+    hasTexts(project) {
+        return ['transcription', 'formattedText', 'editedText', 'richContent'].some(key => project[key] != null);
+    }
+
     // Get project by ID (from cache or server)
     async getProject(projectId, forceFresh = false) {
         // If forcing fresh data or not in cache, fetch from server
         if (!forceFresh) {
             let project = this.projects.find(p => p.id === projectId);
-            if (project) {
+            if (project && this.hasTexts(project)) {
                 console.log('📋 Returning cached project:', project.name);
                 return project;
             }
@@ -113,6 +148,26 @@ class ServerProjectManager {
         return [...this.projects];
     }
 
+    // Get timestamped segments overlapping [from, to) seconds (omit both for all)
+    async getSegments(projectId, from = null, to = null) {
+        const params = new URLSearchParams();
+        if (from !== null) params.set('from', from);
+        if (to !== null) params.set('to', to);
+
+        try {
+            const response = await fetch(`${this.apiBaseUrl}/projects/${projectId}/segments?${params}`);
+            if (!response.ok) {
+                const error = await response.json();
+                throw new Error(error.error || 'Failed to load segments');
+            }
+            const data = await response.json();
+            return data.segments || [];
+        } catch (error) {
+            console.error('❌ Error fetching segments:', error);
+            return [];
+        }
+    }
+
     // Update project on server
     async updateProject(projectId, updates) {
         try {
@@ -146,6 +201,74 @@ class ServerProjectManager {
         }
     }
 
+    // Single range edit turning oldText into newText (common prefix/suffix),
+    // in UTF-16 offsets as the server expects; null when nothing changed
+    static textEdit(oldText, newText) {
+        const isHighSurrogate = (code) => code >= 0xD800 && code <= 0xDBFF;
+        let start = 0;
+        const maxStart = Math.min(oldText.length, newText.length);
+        while (start < maxStart && oldText[start] === newText[start]) start++;
+        // Never split a surrogate pair
+        if (start > 0 && isHighSurrogate(oldText.charCodeAt(start - 1))) start--;
+
+        let oldEnd = oldText.length;
+        let newEnd = newText.length;
+        while (oldEnd > start && newEnd > start && oldText[oldEnd - 1] === newText[newEnd - 1]) {
+            oldEnd--;
+            newEnd--;
+        }
+        if (oldEnd < oldText.length && isHighSurrogate(oldText.charCodeAt(oldEnd - 1))) {
+            oldEnd++;
+            newEnd++;
+        }
+
+        if (start === oldEnd && start === newEnd) return null;
+        return { start, end: oldEnd, text: newText.slice(start, newEnd) };
+    }
+
+    // Save text changes as range edits against the cached version (PATCH).
+    // Falls back to a full PUT when the cache has no text to diff against.
+    async saveTextEdits(projectId, texts, fields = {}) {
+        const cached = this.projects.find(p => p.id === projectId);
+        const hasBase = cached && typeof cached.version === 'number' &&
+            Object.keys(texts).every(key => typeof cached[key] === 'string');
+        if (!hasBase) {
+            return this.updateProject(projectId, { ...texts, ...fields });
+        }
+
+        const edits = {};
+        Object.entries(texts).forEach(([key, text]) => {
+            const edit = ServerProjectManager.textEdit(cached[key], text);
+            if (edit) edits[key] = [edit];
+        });
+
+        try {
+            const response = await fetch(`${this.apiBaseUrl}/projects/${projectId}`, {
+                method: 'PATCH',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({ version: cached.version, fields, edits })
+            });
+
+            const ack = await response.json();
+            if (!response.ok) {
+                const error = new Error(ack.error || 'Failed to save changes');
+                error.conflict = response.status === 409 && ack.version !== undefined;
+                error.currentVersion = ack.version;
+                throw error;
+            }
+
+            Object.assign(cached, fields, texts, { version: ack.version, updated: ack.updated });
+            console.log(`✅ Project saved on server: ${projectId} (v${ack.version})`);
+            return cached;
+
+        } catch (error) {
+            console.error('❌ Error saving project changes:', error);
+            throw error;
+        }
+    }
+
     // Delete project from server
     async deleteProject(projectId) {
         try {
@@ -233,7 +356,13 @@ class ServerProjectManager {
                 model: options.model || 'medium',
                 language: options.language || 'English',
                 preview: options.preview || false,
-                previewDuration: options.previewDuration || 60
+                previewDuration: options.previewDuration || 60,
+                previewWindows: options.previewWindows || 0,
+                vad: options.vad || false,
+                cascade: options.cascade || false,
+                fastModel: options.fastModel || 'base',
+                cascadeThreshold: options.cascadeThreshold !== undefined ? options.cascadeThreshold : -0.6,
+                precision: options.precision || null
             };
 
             const response = await fetch(`${this.apiBaseUrl}/projects/${projectId}/transcribe`, {
@@ -293,6 +422,7 @@ class ServerProjectManager {
             formData.append('language', options.language || 'English');
             formData.append('preview', options.preview ? 'true' : 'false');
             formData.append('previewDuration', options.previewDuration || '60');
+            formData.append('previewWindows', options.previewWindows || '0');
 
             const response = await fetch('http://localhost:8000/process', {
                 method: 'POST',
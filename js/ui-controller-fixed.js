@@ -818,7 +818,9 @@ class UIController {
                 model: 'medium',
                 language: 'English',
                 preview: previewMode,
-                previewDuration: 60
+                previewDuration: 60,
+                // Short windows across the whole talk, not just its introduction
+                previewWindows: 4
             };
 
             const result = await this.projectManager.transcribeProject(projectId, transcriptionOptions);
@@ -1553,7 +1555,7 @@ class UIController {
                             class="px-3 py-1 text-sm bg-blue-500 text-white rounded hover:bg-blue-600 transition-colors">
                         Review & Edit
                     </button>
-                    ${project.transcription ? `
+                    ${project.transcription || project.wordCount ? `
                         <button onclick="uiController.downloadTranscription('${project.id}')" 
                                 class="px-3 py-1 text-sm bg-green-500 text-white rounded hover:bg-green-600 transition-colors">
                             Download
@@ -1610,7 +1612,7 @@ class UIController {
                     <button class="project-action-btn btn-edit" onclick="uiController.openProject('${project.id}')" title="Edit">
                         ✏️
                     </button>
-                    ${project.transcription ? `
+                    ${project.transcription || project.wordCount ? `
                         <button class="project-action-btn btn-download" onclick="uiController.downloadTranscription('${project.id}')" title="Download">
                             📥
                         </button>
@@ -1957,11 +1959,12 @@ class UIController {
     }
 
     // Download transcription for a specific project
-    downloadTranscription(projectId) {
+    async downloadTranscription(projectId) {
         console.log('📥 downloadTranscription() called for project:', projectId);
         
         try {
-            const project = this.projectManager.getProject(projectId);
+            // The project list has no text bodies; this loads them
+            const project = await this.projectManager.getProject(projectId);
             if (!project) {
                 console.error('❌ Project not found:', projectId);
                 this.showErrorMessage('Project not found');
@@ -2978,15 +2981,14 @@ ${transcriptionText.replace(/\n/g, '\\par ')}
                 return;
             }
             
-            // Update project with draft content
-            const updateData = {
+            // Send only the changed text ranges; the server rejects the save
+            // if someone else changed the project since we loaded it
+            await this.projectManager.saveTextEdits(this.currentProject.id, {
                 editedText: draftText,
-                richContent: richContent,
-                status: CONFIG.PROJECT_STATUS.NEEDS_REVIEW,
-                lastModified: new Date().toISOString()
-            };
-            
-            await this.projectManager.updateProject(this.currentProject.id, updateData);
+                richContent: richContent
+            }, {
+                status: CONFIG.PROJECT_STATUS.NEEDS_REVIEW
+            });
             
             // Update current project reference
             this.currentProject = await this.projectManager.getProject(this.currentProject.id);
@@ -21,8 +21,19 @@ from pathlib import Path
 from http.server import HTTPServer, BaseHTTPRequestHandler, ThreadingHTTPServer
 import urllib.parse
 from io import BytesIO
-from datetime import datetime
+from datetime import datetime, timedelta
 import threading
+import hashlib
+import zlib
+import difflib
+import struct
+import mimetypes
+import queue
+import signal
+import importlib.util
+from itertools import accumulate
+from bisect import bisect_right
+from collections import deque
 
 # PDF generation
 try:
@@ -34,8 +45,17 @@ try:
 except Exception:
     REPORTLAB_AVAILABLE = False
 
+# In-process transcription; without these Whisper runs through its CLI
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+# Imported on first use: loading torch would slow down every server start
+WHISPER_AVAILABLE = importlib.util.find_spec('whisper') is not None
+
 # Global variables for tracking active transcriptions
-active_transcriptions = {}  # {project_id: {'process': subprocess_obj, 'cancelled': bool}}
+active_transcriptions = {}  # {project_id: {'process': subprocess_obj, 'cancelled': bool, 'lease': dict}}
 transcription_lock = threading.Lock()
 
 # Pali corrections dictionary and function (moved from whisper_server.py)
@@ -338,23 +358,34 @@ def apply_pali_corrections(text):
     return corrected_text
 
 
-def write_provenance_header_text_file(output_path, metadata, text_body):
-    """
-    Write a transcription text file with a small inline JSON provenance header.
+def apply_pali_corrections_to_segments(segments):
+    """Correct segment texts in place, in one pass (one segment per line)"""
+    if segments:
+        corrected = apply_pali_corrections('\n'.join(s['text'] for s in segments)).split('\n')
+        if len(corrected) == len(segments):
+            for seg, text in zip(segments, corrected):
+                seg['text'] = text
+    return segments
+
+def provenance_header_text(metadata, text_body):
+    """Transcription text with a small inline JSON provenance header.
     The header is delimited by explicit start/end markers so readers can
     detect and parse it easily.
     """
-    try:
-        # Use a user-friendly label and markers: 'Source Info'
-        start_marker = "---SOURCE-INFO-START---"
-        end_marker = "---SOURCE-INFO-END---"
-        header_json = json.dumps(metadata, indent=2, ensure_ascii=False)
+    # Use a user-friendly label and markers: 'Source Info'
+    start_marker = "---SOURCE-INFO-START---"
+    end_marker = "---SOURCE-INFO-END---"
+    header_json = json.dumps(metadata, indent=2, ensure_ascii=False)
+    return f"{start_marker}\n{header_json}\n{end_marker}\n\n{text_body}"
 
+def write_provenance_header_text_file(output_path, metadata, text_body):
+    """
+    Write a transcription text file with a small inline JSON provenance header
+    (see provenance_header_text).
+    """
+    try:
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(f"{start_marker}\n")
-            f.write(header_json)
-            f.write(f"\n{end_marker}\n\n")
-            f.write(text_body)
+            f.write(provenance_header_text(metadata, text_body))
 
         print(f"✅ Wrote transcription with provenance to: {output_path}")
         return True
@@ -562,18 +593,379 @@ def regenerate_pdf_for_project(db_manager, project_id, transcription_text, edito
         print(f"❌ Unexpected error regenerating PDF for project {project_id}: {e}")
         return False
 
+
+def strip_provenance_header(text):
+    """Remove an inline ---SOURCE-INFO--- (or legacy ---PROVENANCE---) header block from text."""
+    if not text:
+        return text or ''
+    for start_marker, end_marker in (('---SOURCE-INFO-START---', '---SOURCE-INFO-END---'),
+                                     ('---PROVENANCE-START---', '---PROVENANCE-END---')):
+        if text.startswith(start_marker) and end_marker in text:
+            return text[text.index(end_marker) + len(end_marker):].lstrip('\n')
+    return text
+
+
+def timestamp_to_seconds(timestamp_str):
+    """Convert SRT/VTT timestamp (HH:MM:SS,mmm or HH:MM:SS.mmm) to seconds"""
+    try:
+        time_part, milliseconds = timestamp_str.strip().replace('.', ',').split(',')
+        hours, minutes, seconds = time_part.split(':')
+        return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(milliseconds) / 1000
+    except Exception:
+        return 0.0
+
+
+def parse_srt_content(content):
+    """Parse SRT content into a list of {'start', 'end', 'text'} segments (seconds)"""
+    segments = []
+    for block in content.replace('\r\n', '\n').strip().split('\n\n'):
+        lines = block.strip().split('\n')
+        if len(lines) < 3 or '-->' not in lines[1]:
+            continue
+        start_str, end_str = lines[1].split('-->')
+        text = ' '.join(lines[2:]).strip()
+        if text:
+            segments.append({
+                'start': timestamp_to_seconds(start_str),
+                'end': timestamp_to_seconds(end_str),
+                'text': text
+            })
+    return segments
+
+
+def format_timestamp(seconds, separator=','):
+    """Format seconds as HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (VTT with separator='.')"""
+    total_ms = int(round(max(0.0, seconds) * 1000))
+    hours, rem = divmod(total_ms, 3600000)
+    minutes, rem = divmod(rem, 60000)
+    secs, ms = divmod(rem, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+
+# Lazily built export formats: format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'srt': ('application/x-subrip; charset=utf-8', '.srt'),
+    'vtt': ('text/vtt; charset=utf-8', '.vtt'),
+    'json': ('application/json; charset=utf-8', '.json'),
+    'txt': ('text/plain; charset=utf-8', '.txt'),
+    'pdf': ('application/pdf', '.pdf'),
+}
+
+
+def export_body_text(project):
+    """Pick the best available text for export (edited > formatted > raw), without the provenance header"""
+    text = project.get('editedText') or project.get('formattedText') or project.get('transcription') or ''
+    return strip_provenance_header(text)
+
+
+def build_export_artifact(project, fmt, segments, output_path):
+    """Build a single export artifact for a project and write it to output_path.
+
+    Returns True on success. Timed formats (srt/vtt/json) require segments.
+    """
+    if fmt == 'srt':
+        blocks = [f"{i}\n{format_timestamp(s['start'])} --> {format_timestamp(s['end'])}\n{s['text']}\n"
+                  for i, s in enumerate(segments, 1)]
+        content = '\n'.join(blocks)
+    elif fmt == 'vtt':
+        blocks = [f"{format_timestamp(s['start'], '.')} --> {format_timestamp(s['end'], '.')}\n{s['text']}\n"
+                  for s in segments]
+        content = 'WEBVTT\n\n' + '\n'.join(blocks)
+    elif fmt == 'json':
+        content = json.dumps({
+            'project_id': project.get('id'),
+            'name': project.get('name'),
+            'version': project.get('version') or 0,
+            'segments': segments
+        }, ensure_ascii=False)
+    elif fmt == 'txt':
+        content = export_body_text(project)
+    elif fmt == 'pdf':
+        if not REPORTLAB_AVAILABLE:
+            return False
+        metadata = {
+            'project': project.get('name') or '',
+            'original_filename': project.get('audioFileName') or '',
+            'version': project.get('version') or 0,
+            'exported_at': datetime.now().isoformat()
+        }
+        return generate_pdf_with_provenance(str(output_path), metadata, export_body_text(project))
+    else:
+        return False
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def get_or_build_export(db_manager, project, fmt):
+    """Return (path, etag) for a cached export artifact, building it on first request.
+
+    Artifacts live under `exports/{project_id}/cache/` and are keyed by the
+    project's content version, so a format is only ever built when someone
+    asks for it and is rebuilt only after the content changes.
+    """
+    project_id = project['id']
+    version = project.get('version') or 0
+    ext = EXPORT_FORMATS[fmt][1]
+    etag = f'"{project_id}-v{version}-{fmt}"'
+
+    cache_dir = Path('exports') / project_id / 'cache'
+    cached_path = cache_dir / f"v{version}{ext}"
+    if cached_path.exists():
+        return cached_path, etag
+
+    segments = []
+    if fmt in ('srt', 'vtt', 'json'):
+        segments = db_manager.get_segments(project_id)
+        if not segments:
+            return None, None
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_dir / f".v{version}{ext}.{uuid.uuid4().hex}.tmp"
+    try:
+        if not build_export_artifact(project, fmt, segments, tmp_path) or not tmp_path.exists():
+            return None, None
+        os.replace(tmp_path, cached_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    # Drop artifacts of this format that belong to older content versions
+    for stale in cache_dir.glob(f"v*{ext}"):
+        if stale != cached_path:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+    print(f"✅ Built {fmt} export for project {project_id} (v{version})")
+    return cached_path, etag
+
+def audio_blob_path(filename):
+    """Location of a stored audio file.
+
+    Content-addressed uploads (<sha256><ext>) live in a two-level sharded
+    tree, uploads/ab/cd/, so no directory grows past a few hundred
+    entries. Legacy uuid-named uploads stay flat in uploads/.
+    """
+    stem = Path(filename).stem
+    if re.fullmatch(r'[0-9a-f]{64}', stem):
+        return Path("uploads") / stem[:2] / stem[2:4] / filename
+    return Path("uploads") / filename
+
+def apply_text_edits(text, edits):
+    """Apply {start, end, text} range replacements to text.
+
+    Offsets are UTF-16 code units (JavaScript string indices) into the
+    original text and ranges must not overlap. Raises ValueError otherwise.
+    """
+    data = text.encode('utf-16-le')
+    position = len(data) // 2
+    pieces = []
+    for edit in edits:
+        if not (isinstance(edit, dict) and isinstance(edit.get('start'), int) and isinstance(edit.get('end'), int)):
+            raise ValueError("Each edit needs integer 'start' and 'end' offsets")
+    for edit in sorted(edits, key=lambda e: e['start'], reverse=True):
+        start, end = edit['start'], edit['end']
+        if not 0 <= start <= end <= position:
+            raise ValueError(f"Edit range [{start}, {end}) is out of bounds or overlaps another edit")
+        pieces.append(data[end * 2:position * 2])
+        pieces.append((edit.get('text') or '').encode('utf-16-le'))
+        position = start
+    pieces.append(data[:position * 2])
+    # A range splitting a surrogate pair fails to decode (UnicodeDecodeError is a ValueError)
+    return b''.join(reversed(pieces)).decode('utf-16-le')
+
+def compute_text_delta(old, new):
+    """Ranges [start, end, text] (code points into old, ascending) turning old into new.
+
+    Diffs by line, then trims each changed block to the characters that
+    differ, so a delta stays proportional to the edit even when a whole
+    transcript is one line.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    old_offsets = list(accumulate(map(len, old_lines), initial=0))
+    new_offsets = list(accumulate(map(len, new_lines), initial=0))
+    
+    delta = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        start, end = old_offsets[i1], old_offsets[i2]
+        new_start, new_end = new_offsets[j1], new_offsets[j2]
+        old_block, new_block = old[start:end], new[new_start:new_end]
+        prefix = _common_prefix_length(old_block, new_block)
+        suffix = _common_prefix_length(old_block[prefix:][::-1], new_block[prefix:][::-1])
+        delta.append([start + prefix, end - suffix, new_block[prefix:len(new_block) - suffix]])
+    return delta
+
+def _common_prefix_length(a, b):
+    """Length of the common prefix of two strings (binary search over C-level slice compares)"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+def apply_text_delta(text, delta):
+    """Apply a compute_text_delta() result to the text it was computed from"""
+    pieces = []
+    position = 0
+    for start, end, replacement in delta:
+        pieces.append(text[position:start])
+        pieces.append(replacement)
+        position = end
+    pieces.append(text[position:])
+    return ''.join(pieces)
+
+class VersionConflictError(Exception):
+    """Raised when a patch targets a content version that is no longer current"""
+
+    def __init__(self, current_version):
+        super().__init__(f"Project was modified (current version {current_version})")
+        self.current_version = current_version
+
+# Project columns returned to clients, in select order, and their camelCase keys
+PROJECT_COLUMNS = ('id', 'name', 'assigned_to', 'start_date', 'end_date', 'status',
+                   'audio_file_name', 'audio_file_path', 'word_count', 'processing_time',
+                   'is_preview', 'error_message', 'created', 'updated', 'export_provenance',
+                   'version', 'audio_available')
+PROJECT_FIELD_TO_CLIENT = {
+    'assigned_to': 'assignedTo',
+    'start_date': 'startDate',
+    'end_date': 'endDate',
+    'audio_file_name': 'audioFileName',
+    'audio_file_path': 'audioFilePath',
+    'formatted_text': 'formattedText',
+    'edited_text': 'editedText',
+    'rich_content': 'richContent',
+    'word_count': 'wordCount',
+    'processing_time': 'processingTime',
+    'is_preview': 'isPreview',
+    'error_message': 'errorMessage',
+    'export_provenance': 'exportProvenance',
+    'audio_available': 'audioAvailable'
+}
+PROJECT_SELECT = ', '.join(PROJECT_COLUMNS)
+PROJECT_CLIENT_KEYS = tuple(PROJECT_FIELD_TO_CLIENT.get(col, col) for col in PROJECT_COLUMNS)
+TEXT_CLIENT_KEYS = {kind: PROJECT_FIELD_TO_CLIENT.get(kind, kind)
+                    for kind in ('transcription', 'formatted_text', 'edited_text', 'rich_content')}
+EMPTY_CLIENT_TEXTS = dict.fromkeys(TEXT_CLIENT_KEYS.values())
+
 class DatabaseManager:
     """Handles all database operations for projects and audio files"""
-    
+
+    # Fields whose change produces a new content version
+    CONTENT_FIELDS = ('transcription', 'formatted_text', 'edited_text', 'rich_content', 'segments')
+    # Large text bodies stored (compressed, deduplicated) in project_texts
+    TEXT_KINDS = ('transcription', 'formatted_text', 'edited_text', 'rich_content')
+    # Deletions are remembered this long; older sync watermarks get a full list
+    TOMBSTONE_RETENTION_DAYS = 30
+    # Sync tokens trail "now" so writes that stamped `updated` just before a
+    # poll but committed after it (SQLite busy timeout is 5 s) are not missed
+    SYNC_SETTLE_SECONDS = 10
+    # Text kinds whose edits are kept in text_revisions, and how often a
+    # revision stores a full snapshot instead of a delta
+    HISTORY_KINDS = ('edited_text',)
+    SNAPSHOT_INTERVAL = 20
+    # Preview segments ending this close to the preview's end are redone by
+    # the full run; below PREVIEW_MIN_REUSE seconds reuse is not worth a cut
+    PREVIEW_CUT_MARGIN = 1.0
+    PREVIEW_MIN_REUSE = 5.0
+    # A job whose lease expired this many times (its worker died or hung
+    # each time) fails instead of going back to the queue
+    JOB_MAX_ATTEMPTS = 3
+    # Ids bound per IN (...) query; older SQLite builds allow 999 parameters
+    SQL_PARAMETER_CHUNK = 500
+
     def __init__(self, db_path="palascribe.db"):
         self.db_path = db_path
         self.init_database()
         
     def init_database(self):
-        """Initialize database with required tables"""
+        """Initialize the database by applying pending schema migrations.
+
+        Applied migrations are recorded in `schema_version`, so a normal
+        start is a single lookup regardless of how many projects or exports
+        exist.
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version')
+        current_version = cursor.fetchone()[0]
+        conn.commit()
+        
+        vacuum = False
+        for version, name in self.MIGRATIONS:
+            if version <= current_version:
+                continue
+            try:
+                vacuum = getattr(self, f"_migration_{version:03d}_{name}")(cursor) or vacuum
+                cursor.execute('INSERT INTO schema_version (version, name, applied) VALUES (?, ?, ?)',
+                               (version, name, datetime.now().isoformat()))
+                conn.commit()
+                print(f"✅ Applied schema migration {version:03d} ({name})")
+            except Exception as e:
+                conn.rollback()
+                conn.close()
+                print(f"❌ Schema migration {version:03d} ({name}) failed: {e}")
+                raise
+        
+        if vacuum:
+            cursor.execute('VACUUM')
+        
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'project_text_fts'")
+        self.search_enabled = cursor.fetchone() is not None
+        conn.close()
+        
+        # Create uploads directory
+        Path("uploads").mkdir(exist_ok=True)
+        print("✅ Database initialized")
+    
+    # Ordered schema migrations: (version, name) -> _migration_{version:03d}_{name}(cursor).
+    # Each must be idempotent so databases created before schema_version
+    # existed can replay them safely. Returning True requests a VACUUM.
+    MIGRATIONS = [
+        (1, 'base_tables'),
+        (2, 'audio_source_path'),
+        (3, 'project_version_columns'),
+        (4, 'transcript_segments'),
+        (5, 'project_texts'),
+        (6, 'full_text_search'),
+        (7, 'backfill_export_provenance'),
+        (8, 'secondary_indexes'),
+        (9, 'audio_available'),
+        (10, 'sync_tombstones'),
+        (11, 'text_revisions'),
+        (12, 'audio_references'),
+        (13, 'pcm_cache'),
+        (14, 'preview_results'),
+        (15, 'audio_source_index'),
+        (16, 'transcription_jobs'),
+        (17, 'collection_version'),
+        (18, 'segment_end_index'),
+    ]
+    
+    @staticmethod
+    def _table_columns(cursor, table):
+        cursor.execute(f"PRAGMA table_info({table})")
+        return {r[1] for r in cursor.fetchall()}
+    
+    def _migration_001_base_tables(self, cursor):
         # Projects table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS projects (
@@ -612,77 +1004,500 @@ class DatabaseManager:
                 FOREIGN KEY (project_id) REFERENCES projects (id)
             )
         ''')
+    
+    def _migration_002_audio_source_path(self, cursor):
+        if 'source_path' not in self._table_columns(cursor, 'audio_files'):
+            cursor.execute("ALTER TABLE audio_files ADD COLUMN source_path TEXT")
+    
+    def _migration_003_project_version_columns(self, cursor):
+        # DB-embedded export provenance and content version (bumped on every
+        # text change, keys cached exports)
+        cols = self._table_columns(cursor, 'projects')
+        for col, decl in (('export_provenance', 'TEXT'), ('version', 'INTEGER DEFAULT 0')):
+            if col not in cols:
+                cursor.execute(f"ALTER TABLE projects ADD COLUMN {col} {decl}")
+    
+    def _migration_004_transcript_segments(self, cursor):
+        # Timestamped transcript segments, one row per segment
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcript_segments (
+                project_id TEXT NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                avg_logprob REAL,
+                FOREIGN KEY (project_id) REFERENCES projects (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transcript_segments_project_start
+            ON transcript_segments (project_id, start_ms)
+        ''')
         
-        # Create uploads directory
-        uploads_dir = Path("uploads")
-        uploads_dir.mkdir(exist_ok=True)
-        # DB migration: ensure source_path column exists on audio_files
+        # Move segments stored inline as JSON (the legacy projects.segments
+        # column, dropped by migration 018) into transcript_segments
+        if 'segments' not in self._table_columns(cursor, 'projects'):
+            return
+        cursor.execute('SELECT id, segments FROM projects WHERE segments IS NOT NULL')
+        for project_id, raw in cursor.fetchall():
+            try:
+                rows = [{'start': start_ms / 1000, 'end': end_ms / 1000, 'text': text}
+                        for start_ms, end_ms, text in json.loads(raw)]
+                self._replace_segments(cursor, project_id, rows)
+            except Exception as e:
+                print(f"⚠️ Could not migrate segments for project {project_id}: {e}")
+            cursor.execute('UPDATE projects SET segments = NULL WHERE id = ?', (project_id,))
+    
+    def _migration_005_project_texts(self, cursor):
+        # Large text bodies live outside the projects row: project_texts maps
+        # (project, kind) to a content hash, text_blobs holds each distinct
+        # body once, zlib-compressed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS project_texts (
+                project_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0,
+                content_hash TEXT NOT NULL,
+                PRIMARY KEY (project_id, kind),
+                FOREIGN KEY (project_id) REFERENCES projects (id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_project_texts_hash ON project_texts (content_hash)
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS text_blobs (
+                content_hash TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )
+        ''')
+        
+        # Move text bodies stored inline on the projects row into project_texts
+        cursor.execute(f'''
+            SELECT id, version, {', '.join(self.TEXT_KINDS)} FROM projects
+            WHERE {' OR '.join(f'{kind} IS NOT NULL' for kind in self.TEXT_KINDS)}
+        ''')
+        moved = cursor.fetchall()
+        for row in moved:
+            project_id, version = row[0], row[1] or 0
+            self._store_texts(cursor, project_id, dict(zip(self.TEXT_KINDS, row[2:])), version)
+            cursor.execute(f"UPDATE projects SET {', '.join(f'{kind} = NULL' for kind in self.TEXT_KINDS)} WHERE id = ?",
+                           (project_id,))
+        if moved:
+            print(f"✅ Moved text bodies of {len(moved)} projects into project_texts")
+        return bool(moved)
+    
+    def _migration_006_full_text_search(self, cursor):
+        # Full-text search (FTS5) over project text and transcript segments.
+        # unicode61 with remove_diacritics folds Pali diacritics, so
+        # "satipatthana" matches "Satipaṭṭhāna".
+        cursor.execute("SELECT name FROM sqlite_master WHERE name IN ('project_text_fts', 'segments_fts')")
+        existing_fts = {r[0] for r in cursor.fetchall()}
         try:
-            cursor.execute("PRAGMA table_info(audio_files)")
-            cols = [r[1] for r in cursor.fetchall()]
-            if 'source_path' not in cols:
-                try:
-                    cursor.execute("ALTER TABLE audio_files ADD COLUMN source_path TEXT")
-                    print("✅ Added 'source_path' column to audio_files table")
-                except Exception as me:
-                    print(f"⚠️ Could not add source_path column: {me}")
-        except Exception as e:
-            print(f"⚠️ Error checking audio_files schema: {e}")
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS project_text_fts USING fts5(
+                    body, tokenize = 'unicode61 remove_diacritics 2'
+                )
+            ''')
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+                    text, content = 'transcript_segments', tokenize = 'unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Full-text search unavailable (SQLite without FTS5?): {e}")
+            return
+        
+        # Keep segments_fts in sync with transcript_segments
+        for statement in (
+            '''CREATE TRIGGER IF NOT EXISTS transcript_segments_ai AFTER INSERT ON transcript_segments BEGIN
+                INSERT INTO segments_fts (rowid, text) VALUES (new.rowid, new.text);
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS transcript_segments_ad AFTER DELETE ON transcript_segments BEGIN
+                INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+            END''',
+            '''CREATE TRIGGER IF NOT EXISTS transcript_segments_au AFTER UPDATE ON transcript_segments BEGIN
+                INSERT INTO segments_fts (segments_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+                INSERT INTO segments_fts (rowid, text) VALUES (new.rowid, new.text);
+            END''',
+        ):
+            cursor.execute(statement)
+        if 'segments_fts' not in existing_fts:
+            cursor.execute("INSERT INTO segments_fts (segments_fts) VALUES ('rebuild')")
+        if 'project_text_fts' not in existing_fts:
+            cursor.execute('SELECT id FROM projects')
+            for (project_id,) in cursor.fetchall():
+                self._reindex_project_text(cursor, project_id)
+    
+    def _migration_007_backfill_export_provenance(self, cursor):
+        # One-shot backfill of export_provenance from existing exports/*/index.json
+        exports_root = Path('exports')
+        if not exports_root.is_dir():
+            return
+        for proj_dir in exports_root.iterdir():
+            idx_path = proj_dir / 'index.json'
+            if not idx_path.is_file():
+                continue
+            try:
+                with open(idx_path, 'r', encoding='utf-8') as f:
+                    idx = json.load(f)
+                history = idx.get('history', [])
+                if not history:
+                    continue
+                latest = history[-1]
+                manifest_name = latest.get('manifest') or latest.get('manifest_file')
+                manifest_path = proj_dir / manifest_name if manifest_name else None
+                if not manifest_path or not manifest_path.exists():
+                    continue
+                with open(manifest_path, 'r', encoding='utf-8') as mf:
+                    manifest_json = json.load(mf)
+                project_id = idx.get('project_id') or proj_dir.name
+                # Only touches projects that exist in the DB
+                cursor.execute('UPDATE projects SET export_provenance = ? WHERE id = ?',
+                               (json.dumps(manifest_json, ensure_ascii=False), project_id))
+                if cursor.rowcount:
+                    print(f"✅ Backfilled export_provenance for project {project_id}")
+            except Exception as e:
+                print(f"⚠️ Could not backfill provenance for {proj_dir}: {e}")
+    
+    def _migration_008_secondary_indexes(self, cursor):
+        # Per-base-name counters for O(1) unique project naming
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS project_name_counters (
+                base_name TEXT PRIMARY KEY,
+                next_suffix INTEGER NOT NULL
+            )
+        ''')
+        
+        # Rename legacy duplicates so project names can be enforced unique
+        cursor.execute('''
+            SELECT id, name FROM projects p
+            WHERE EXISTS (SELECT 1 FROM projects q WHERE q.name = p.name AND q.rowid < p.rowid)
+            ORDER BY rowid
+        ''')
+        for project_id, name in cursor.fetchall():
+            new_name = self._generate_unique_name(cursor, name)
+            cursor.execute('UPDATE projects SET name = ? WHERE id = ?', (new_name, project_id))
+            print(f"⚠️ Renamed duplicate project name '{name}' to '{new_name}'")
         
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_projects_name ON projects (name)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (created)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_assigned_to ON projects (assigned_to)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_audio_files_project_created ON audio_files (project_id, created)')
+    
+    def _migration_009_audio_available(self, cursor):
+        # Track audio availability in the DB instead of statting on every read
+        if 'audio_available' not in self._table_columns(cursor, 'projects'):
+            cursor.execute("ALTER TABLE projects ADD COLUMN audio_available INTEGER NOT NULL DEFAULT 0")
+        cursor.execute('SELECT id, audio_file_path FROM projects WHERE audio_file_path IS NOT NULL')
+        for project_id, audio_path in cursor.fetchall():
+            if audio_path and os.path.exists(audio_path):
+                cursor.execute('UPDATE projects SET audio_available = 1 WHERE id = ?', (project_id,))
+    
+    def _migration_010_sync_tombstones(self, cursor):
+        # Incremental sync: changed projects by `updated`, deletions by tombstone
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_updated ON projects (updated)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS project_tombstones (
+                id TEXT PRIMARY KEY,
+                deleted TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_project_tombstones_deleted ON project_tombstones (deleted)')
+    
+    def _migration_011_text_revisions(self, cursor):
+        # Edit history: a delta per accepted save, a full snapshot (in text_blobs) every SNAPSHOT_INTERVAL
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS text_revisions (
+                project_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                revision INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                created TEXT NOT NULL,
+                editor TEXT,
+                snapshot_hash TEXT,
+                delta TEXT,
+                PRIMARY KEY (project_id, kind, revision)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_text_revisions_snapshot ON text_revisions (snapshot_hash)
+            WHERE snapshot_hash IS NOT NULL
+        ''')
+        # Existing edited texts become revision 1 of their history
+        cursor.execute('''
+            INSERT OR IGNORE INTO text_revisions (project_id, kind, revision, version, created, snapshot_hash)
+            SELECT t.project_id, t.kind, 1, COALESCE(p.version, 0), p.updated, t.content_hash
+            FROM project_texts t JOIN projects p ON p.id = t.project_id
+            WHERE t.kind = 'edited_text'
+        ''')
+    
+    def _migration_012_audio_references(self, cursor):
+        # Reference counting for shared, content-addressed audio files
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_audio_files_path ON audio_files (file_path)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_projects_audio_path ON projects (audio_file_path)')
+    
+    def _migration_013_pcm_cache(self, cursor):
+        # Decoded audio kept by PcmCache, with last use for LRU eviction
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pcm_cache (
+                pcm_path TEXT PRIMARY KEY,
+                audio_path TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_used TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_pcm_cache_last_used ON pcm_cache (last_used)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_pcm_cache_audio ON pcm_cache (audio_path)')
+    
+    def _migration_014_preview_results(self, cursor):
+        # Segments of the latest preview per audio content, model and
+        # language, picked up by a later full transcription
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS preview_results (
+                audio_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                language TEXT NOT NULL,
+                covered_seconds REAL NOT NULL,
+                segments TEXT NOT NULL,
+                created TEXT NOT NULL,
+                PRIMARY KEY (audio_hash, model, language)
+            )
+        ''')
+    
+    def _migration_015_audio_source_index(self, cursor):
+        # Hot-folder ingest looks files up by the path they came from
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_audio_files_source ON audio_files (source_path)')
+    
+    def _migration_016_transcription_jobs(self, cursor):
+        # Jobs leased by remote workers; lease_expires is a Unix time
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS transcription_jobs (
+                id TEXT PRIMARY KEY,
+                project_id TEXT NOT NULL,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                lease_token TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                progress TEXT,
+                error TEXT,
+                created TEXT NOT NULL,
+                updated TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON transcription_jobs (status, created)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_project ON transcription_jobs (project_id)')
+    
+    def _migration_017_collection_version(self, cursor):
+        # Counter behind the project list's ETag; the triggers bump it inside
+        # the writing transaction, so it only grows in commit order
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS collection_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                counter INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO collection_version (id, counter) VALUES (1, 0)')
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS projects_collection_version_{event.lower()} AFTER {event} ON projects
+                BEGIN
+                    UPDATE collection_version SET counter = counter + 1 WHERE id = 1;
+                END
+            ''')
+    
+    def _migration_018_segment_end_index(self, cursor):
+        # Segments overlapping a time window are found by their end, so no
+        # bound on segment length is needed
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_transcript_segments_project_end
+            ON transcript_segments (project_id, end_ms)
+        ''')
+        # transcript_segments is the only copy; the inline JSON column was
+        # emptied by migration 004 (DROP COLUMN needs SQLite 3.35)
+        if 'segments' in self._table_columns(cursor, 'projects') and sqlite3.sqlite_version_info >= (3, 35, 0):
+            cursor.execute('ALTER TABLE projects DROP COLUMN segments')
+    
+    def _audio_referenced(self, cursor, file_path):
+        """Whether any audio_files row or project still points at an audio file"""
+        cursor.execute('''
+            SELECT EXISTS (SELECT 1 FROM audio_files WHERE file_path = ?)
+                OR EXISTS (SELECT 1 FROM projects WHERE audio_file_path = ?)
+        ''', (file_path, file_path))
+        return bool(cursor.fetchone()[0])
+    
+    def save_preview_result(self, audio_hash, model, language, covered_seconds, segments):
+        """Keep the segments of a preview covering the first covered_seconds of some audio"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT OR REPLACE INTO preview_results (audio_hash, model, language, covered_seconds, segments, created)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (audio_hash, model, language, covered_seconds, json.dumps(segments, ensure_ascii=False),
+              datetime.now().isoformat()))
         conn.commit()
         conn.close()
-        print("✅ Database initialized")
-        # Ensure projects table has an export_provenance column for DB-embedded provenance
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA table_info(projects)")
-            cols = [r[1] for r in cursor.fetchall()]
-            if 'export_provenance' not in cols:
-                try:
-                    cursor.execute("ALTER TABLE projects ADD COLUMN export_provenance TEXT")
-                    print("✅ Added 'export_provenance' column to projects table")
-                except Exception as me:
-                    print(f"⚠️ Could not add export_provenance column: {me}")
+    
+    def get_preview_result(self, audio_hash, model, language):
+        """{'covered_seconds', 'segments'} of the latest matching preview, or None"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('''
+            SELECT covered_seconds, segments FROM preview_results
+            WHERE audio_hash = ? AND model = ? AND language = ?
+        ''', (audio_hash, model, language)).fetchone()
+        conn.close()
+        return row and {'covered_seconds': row[0], 'segments': json.loads(row[1])}
+    
+    def get_preview_resume_point(self, audio_hash, model, language):
+        """{'seconds', 'segments', 'text'} of a stored preview a full run can resume after, or None"""
+        preview = self.get_preview_result(audio_hash, model, language)
+        if not preview:
+            return None
+        # The segment running into the end of the preview may be cut off
+        cutoff = preview['covered_seconds'] - self.PREVIEW_CUT_MARGIN
+        segments = [seg for seg in preview['segments'] if seg['end'] <= cutoff]
+        if not segments or segments[-1]['end'] < self.PREVIEW_MIN_REUSE:
+            return None
+        return {
+            'seconds': segments[-1]['end'],
+            'segments': segments,
+            'text': ' '.join(seg['text'] for seg in segments)
+        }
+    
+    JOB_COLUMNS = ('id', 'project_id', 'options', 'status', 'worker_id', 'lease_token', 'lease_expires',
+                   'attempts', 'progress', 'error', 'created', 'updated')
+    
+    def _job_from_row(self, row):
+        job = dict(zip(self.JOB_COLUMNS, row))
+        job['options'] = json.loads(job['options'])
+        job['progress'] = job['progress'] and json.loads(job['progress'])
+        return job
+    
+    def enqueue_job(self, project_id, options=None):
+        """Queue a transcription of the project's audio for remote workers"""
+        now = datetime.now().isoformat()
+        job_id = str(uuid.uuid4())
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('''
+            INSERT INTO transcription_jobs (id, project_id, options, status, created, updated)
+            VALUES (?, ?, ?, 'queued', ?, ?)
+        ''', (job_id, project_id, json.dumps(options or {}), now, now))
+        conn.commit()
+        conn.close()
+        return self.get_job(job_id)
+    
+    def get_job(self, job_id):
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(f"SELECT {', '.join(self.JOB_COLUMNS)} FROM transcription_jobs WHERE id = ?",
+                           (job_id,)).fetchone()
+        conn.close()
+        return row and self._job_from_row(row)
+    
+    def lease_job(self, worker_id, lease_seconds=60):
+        """Hand the oldest queued job to a worker until now + lease_seconds, or None.
 
-            # Backfill export_provenance from existing exports/*/index.json if present
-            try:
-                exports_root = Path('exports')
-                if exports_root.exists() and exports_root.is_dir():
-                    for proj_dir in exports_root.iterdir():
-                        if not proj_dir.is_dir():
-                            continue
-                        idx_path = proj_dir / 'index.json'
-                        if not idx_path.exists():
-                            continue
-                        try:
-                            with open(idx_path, 'r', encoding='utf-8') as f:
-                                idx = json.load(f)
-                            history = idx.get('history', [])
-                            if history:
-                                latest = history[-1]
-                                manifest_name = latest.get('manifest') or latest.get('manifest_file')
-                                if manifest_name:
-                                    manifest_path = proj_dir / manifest_name
-                                    if manifest_path.exists():
-                                        with open(manifest_path, 'r', encoding='utf-8') as mf:
-                                            manifest_json = json.load(mf)
-                                            project_id = idx.get('project_id') or proj_dir.name
-                                            # Only update if project exists in DB
-                                            cursor.execute('SELECT id FROM projects WHERE id = ?', (project_id,))
-                                            if cursor.fetchone():
-                                                cursor.execute('UPDATE projects SET export_provenance = ? WHERE id = ?', (json.dumps(manifest_json, ensure_ascii=False), project_id))
-                                                print(f"✅ Backfilled export_provenance for project {project_id}")
-                        except Exception as e:
-                            print(f"⚠️ Could not backfill provenance for {proj_dir}: {e}")
-            except Exception as e:
-                print(f"⚠️ Error scanning exports for backfill: {e}")
+        Leases that ran out first go back to the queue (or fail after
+        JOB_MAX_ATTEMPTS), so a dead worker's job is picked up again.
+        """
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        error = 'Lease expired too many times'
+        exhausted = cursor.execute('''
+            SELECT id, project_id FROM transcription_jobs
+            WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+        ''', (now, self.JOB_MAX_ATTEMPTS)).fetchall()
+        for job_id, project_id in exhausted:
+            cursor.execute("UPDATE transcription_jobs SET status = 'failed', error = ?, updated = ? WHERE id = ?",
+                           (error, datetime.now().isoformat(), job_id))
+            # Otherwise the project would show as processing for good
+            self._apply_updates(cursor, project_id, {'status': 'Error', 'error_message': error})
+        cursor.execute('''
+            UPDATE transcription_jobs SET status = 'queued', worker_id = NULL, lease_token = NULL, updated = ?
+            WHERE status = 'leased' AND lease_expires < ?
+        ''', (datetime.now().isoformat(), now))
+        row = cursor.execute(f'''
+            SELECT {', '.join(self.JOB_COLUMNS)} FROM transcription_jobs
+            WHERE status = 'queued' ORDER BY created LIMIT 1
+        ''').fetchone()
+        job = None
+        if row:
+            job = self._job_from_row(row)
+            job.update(status='leased', worker_id=worker_id, lease_token=uuid.uuid4().hex,
+                       lease_expires=now + lease_seconds, attempts=job['attempts'] + 1)
+            cursor.execute('''
+                UPDATE transcription_jobs
+                SET status = 'leased', worker_id = ?, lease_token = ?, lease_expires = ?, attempts = ?, updated = ?
+                WHERE id = ?
+            ''', (worker_id, job['lease_token'], job['lease_expires'], job['attempts'], datetime.now().isoformat(),
+                  job['id']))
+        conn.commit()
+        conn.close()
+        return job
+    
+    def check_lease(self, job_id, lease_token):
+        """The job if lease_token still holds it, else None"""
+        job = self.get_job(job_id)
+        if job and job['status'] == 'leased' and job['lease_token'] == lease_token and job['lease_expires'] >= time.time():
+            return job
+        return None
+    
+    def heartbeat_job(self, job_id, lease_token, progress=None, lease_seconds=60):
+        """Extend a live lease and record the worker's progress; None once the lease is lost"""
+        expires = time.time() + lease_seconds
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.execute('''
+            UPDATE transcription_jobs SET lease_expires = ?, progress = ?, updated = ?
+            WHERE id = ? AND status = 'leased' AND lease_token = ? AND lease_expires >= ?
+        ''', (expires, json.dumps(progress), datetime.now().isoformat(), job_id, lease_token, time.time()))
+        renewed = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        return expires if renewed else None
+    
+    def finish_job(self, job_id, lease_token, success, error=None):
+        """Close a job for the worker holding its lease; False if that lease is gone"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.execute('''
+            UPDATE transcription_jobs SET status = ?, error = ?, lease_token = NULL, updated = ?
+            WHERE id = ? AND status = 'leased' AND lease_token = ? AND lease_expires >= ?
+        ''', ('done' if success else 'failed', error, datetime.now().isoformat(), job_id, lease_token, time.time()))
+        finished = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        return finished
+    
+    def cancel_jobs(self, project_id):
+        """Cancel the project's queued and leased remote jobs; returns how many.
 
-            conn.commit()
+        A worker still holding a lease loses it: its heartbeats and result
+        are refused from then on.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.execute('''
+            UPDATE transcription_jobs SET status = 'cancelled', lease_token = NULL, updated = ?
+            WHERE project_id = ? AND status IN ('queued', 'leased')
+        ''', (datetime.now().isoformat(), project_id))
+        cancelled = cursor.rowcount
+        conn.commit()
+        conn.close()
+        return cancelled
+    
+    def audio_source_ingested(self, source_path, content_hash):
+        """Whether the audio now at source_path (sha256 content_hash) has already been stored"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute('SELECT file_path FROM audio_files WHERE source_path = ?',
+                                (str(source_path),)).fetchall()
+        finally:
             conn.close()
-        except Exception as e:
-            print(f"⚠️ Error during export_provenance migration/backfill: {e}")
-
+        return any(Path(row[0]).stem == content_hash for row in rows if row[0])
+    
     def get_latest_audio_for_project(self, project_id):
         """Return the latest audio_files record for a project, or None."""
         try:
@@ -703,230 +1518,1846 @@ class DatabaseManager:
     
     def create_project(self, name, assigned_to=""):
         """Create a new project with unique name handling"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, timeout=30)
         cursor = conn.cursor()
         
-        # Generate unique name if duplicate exists
-        unique_name = self._generate_unique_name(cursor, name)
-        
         project_id = str(uuid.uuid4())
         now = datetime.now().isoformat()
         
-        cursor.execute('''
-            INSERT INTO projects (id, name, assigned_to, start_date, status, created, updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (project_id, unique_name, assigned_to, now, 'new', now, now))
-        
-        conn.commit()
+        # Name selection and insert happen in one write transaction; the unique
+        # index on projects(name) is the final arbiter against races
+        for attempt in range(5):
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                unique_name = self._generate_unique_name(cursor, name)
+                cursor.execute('''
+                    INSERT INTO projects (id, name, assigned_to, start_date, status, created, updated)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (project_id, unique_name, assigned_to, now, 'new', now, now))
+                conn.commit()
+                break
+            except sqlite3.IntegrityError:
+                conn.rollback()
+                if attempt == 4:
+                    conn.close()
+                    raise
+        conn.close()
         
         # Get the created project
         project = self.get_project(project_id)
-        conn.close()
         
         print(f"✅ Created project: {unique_name} (ID: {project_id})")
         return project
     
     def _generate_unique_name(self, cursor, base_name):
-        """Generate unique project name by appending _1, _2, etc."""
-        cursor.execute('SELECT name FROM projects WHERE name LIKE ?', (f"{base_name}%",))
-        existing_names = [row[0] for row in cursor.fetchall()]
-        
-        if base_name not in existing_names:
+        """Generate unique project name by appending _1, _2, etc.
+
+        A free name costs one indexed lookup. Otherwise the next suffix comes
+        from project_name_counters, so repeated names do not rescan the
+        projects table.
+        """
+        cursor.execute('SELECT 1 FROM projects WHERE name = ?', (base_name,))
+        if not cursor.fetchone():
             return base_name
-            
-        counter = 1
-        while f"{base_name}_{counter}" in existing_names:
+        
+        cursor.execute('SELECT next_suffix FROM project_name_counters WHERE base_name = ?', (base_name,))
+        row = cursor.fetchone()
+        counter = row[0] if row else 1
+        
+        # Skip suffixes already taken by explicitly named projects
+        while True:
+            candidate = f"{base_name}_{counter}"
             counter += 1
-            
-        return f"{base_name}_{counter}"
+            cursor.execute('SELECT 1 FROM projects WHERE name = ?', (candidate,))
+            if not cursor.fetchone():
+                break
+        
+        cursor.execute('INSERT OR REPLACE INTO project_name_counters (base_name, next_suffix) VALUES (?, ?)',
+                       (base_name, counter))
+        return candidate
     
     def get_project(self, project_id):
         """Get project by ID"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM projects WHERE id = ?', (project_id,))
+        cursor.execute(f'SELECT {PROJECT_SELECT} FROM projects WHERE id = ?', (project_id,))
         row = cursor.fetchone()
+        texts = self._load_texts(cursor, [project_id])[project_id] if row else None
         conn.close()
         
         if row:
-            return self._row_to_project(row)
+            return self._row_to_project(row, texts)
         return None
     
-    def get_all_projects(self):
-        """Get all projects"""
+    def get_all_projects(self, include_text=True):
+        """Get all projects (text bodies are only loaded when include_text is set)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM projects ORDER BY created DESC')
+        cursor.execute(f'SELECT {PROJECT_SELECT} FROM projects ORDER BY created DESC')
         rows = cursor.fetchall()
+        texts = self._load_texts(cursor, [row[0] for row in rows]) if include_text else {}
         conn.close()
         
-        return [self._row_to_project(row) for row in rows]
+        return [self._row_to_project(row, texts.get(row[0])) for row in rows]
     
-    def update_project(self, project_id, updates):
-        """Update project with given fields"""
+    def get_collection_etag(self):
+        """Weak ETag for the project list: changes on any create, update or delete"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        # Bumped by the projects triggers in each writing transaction
+        cursor.execute('SELECT counter FROM collection_version WHERE id = 1')
+        counter = cursor.fetchone()[0]
+        conn.close()
         
-        # Build dynamic update query
-        update_fields = []
-        values = []
+        return f'W/"projects-{counter}"'
+    
+    def get_changes_since(self, since, include_text=True):
+        """Projects updated and ids deleted after the `since` watermark.
+
+        Returns (projects, deleted_ids, sync_token, full). `full` is set when
+        the watermark predates the retained tombstones, in which case all
+        projects are returned and the client must replace its list.
+        """
+        now = datetime.now()
+        sync_token = (now - timedelta(seconds=self.SYNC_SETTLE_SECONDS)).isoformat()
+        if since < (now - timedelta(days=self.TOMBSTONE_RETENTION_DAYS)).isoformat():
+            return self.get_all_projects(include_text=include_text), [], sync_token, True
         
-        for field, value in updates.items():
-            if field in ['name', 'assigned_to', 'status', 'transcription', 'formatted_text', 
-                        'edited_text', 'rich_content', 'word_count', 'processing_time', 
-                        'is_preview', 'error_message', 'audio_file_name', 'audio_file_path', 'export_provenance']:
-                update_fields.append(f"{field} = ?")
-                values.append(value)
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT {PROJECT_SELECT} FROM projects WHERE updated > ? ORDER BY created DESC', (since,))
+        rows = cursor.fetchall()
+        texts = self._load_texts(cursor, [row[0] for row in rows]) if include_text and rows else {}
+        cursor.execute('SELECT id FROM project_tombstones WHERE deleted > ?', (since,))
+        deleted = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        
+        projects = [self._row_to_project(row, texts.get(row[0])) for row in rows]
+        return projects, deleted, sync_token, False
+    
+    def get_segments(self, project_id, from_seconds=None, to_seconds=None):
+        """Return timestamped segments as [{'start', 'end', 'text'[, 'avg_logprob']}] (seconds).
+
+        When from_seconds/to_seconds are given only segments overlapping that
+        window are returned.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        query = 'SELECT start_ms, end_ms, text, avg_logprob FROM transcript_segments WHERE project_id = ?'
+        params = [project_id]
+        if from_seconds is not None:
+            query += ' AND end_ms > ?'
+            params.append(int(from_seconds * 1000))
+        if to_seconds is not None:
+            query += ' AND start_ms < ?'
+            params.append(int(to_seconds * 1000))
+        cursor.execute(query + ' ORDER BY start_ms', params)
+        rows = cursor.fetchall()
+        conn.close()
         
-        if update_fields:
-            values.append(datetime.now().isoformat())  # updated timestamp
-            values.append(project_id)  # WHERE clause
+        segments = []
+        for start_ms, end_ms, text, avg_logprob in rows:
+            segment = {'start': start_ms / 1000, 'end': end_ms / 1000, 'text': text}
+            if avg_logprob is not None:
+                segment['avg_logprob'] = avg_logprob
+            segments.append(segment)
+        return segments
+    
+    def _replace_segments(self, cursor, project_id, segments):
+        """Replace all stored segments of a project (segments in seconds)"""
+        cursor.execute('DELETE FROM transcript_segments WHERE project_id = ?', (project_id,))
+        cursor.executemany('''
+            INSERT INTO transcript_segments (project_id, start_ms, end_ms, text, avg_logprob)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(project_id, int(round(seg['start'] * 1000)), int(round(seg['end'] * 1000)),
+               seg['text'], seg.get('avg_logprob')) for seg in segments or []])
+    
+    def _store_texts(self, cursor, project_id, texts, version):
+        """Store text bodies for a project; identical bodies share one compressed blob"""
+        for kind, text in texts.items():
+            cursor.execute('SELECT content_hash FROM project_texts WHERE project_id = ? AND kind = ?', (project_id, kind))
+            row = cursor.fetchone()
+            old_hash = row[0] if row else None
             
-            query = f"UPDATE projects SET {', '.join(update_fields)}, updated = ? WHERE id = ?"
-            cursor.execute(query, values)
-            conn.commit()
+            if text is None or text == '':
+                cursor.execute('DELETE FROM project_texts WHERE project_id = ? AND kind = ?', (project_id, kind))
+            else:
+                data = text.encode('utf-8')
+                content_hash = hashlib.sha256(data).hexdigest()
+                cursor.execute('''
+                    INSERT OR IGNORE INTO text_blobs (content_hash, codec, size, data) VALUES (?, 'zlib', ?, ?)
+                ''', (content_hash, len(data), zlib.compress(data, 6)))
+                cursor.execute('''
+                    INSERT OR REPLACE INTO project_texts (project_id, kind, version, content_hash) VALUES (?, ?, ?, ?)
+                ''', (project_id, kind, version, content_hash))
+                if content_hash == old_hash:
+                    continue
+            if old_hash:
+                self._release_blob(cursor, old_hash)
+    
+    def _release_blob(self, cursor, content_hash):
+        """Delete a text blob once no project text or history snapshot references it"""
+        cursor.execute('''
+            DELETE FROM text_blobs WHERE content_hash = ?
+            AND NOT EXISTS (SELECT 1 FROM project_texts WHERE content_hash = ?)
+            AND NOT EXISTS (SELECT 1 FROM text_revisions WHERE snapshot_hash = ?)
+        ''', (content_hash, content_hash, content_hash))
+    
+    def _record_revision(self, cursor, project_id, kind, old_text, new_text, version, editor=None):
+        """Append a history revision: a delta from the previous revision, or a snapshot every SNAPSHOT_INTERVAL"""
+        cursor.execute('SELECT MAX(revision) FROM text_revisions WHERE project_id = ? AND kind = ?', (project_id, kind))
+        revision = (cursor.fetchone()[0] or 0) + 1
+        snapshot_hash = delta = None
+        if (revision - 1) % self.SNAPSHOT_INTERVAL == 0:
+            # The current text was just stored by _store_texts, so the snapshot shares its blob
+            cursor.execute('SELECT content_hash FROM project_texts WHERE project_id = ? AND kind = ?', (project_id, kind))
+            row = cursor.fetchone()
+            snapshot_hash = row[0] if row else hashlib.sha256(b'').hexdigest()
+            if not row:
+                cursor.execute("INSERT OR IGNORE INTO text_blobs (content_hash, codec, size, data) VALUES (?, 'zlib', 0, ?)",
+                               (snapshot_hash, zlib.compress(b'', 6)))
+        else:
+            delta = json.dumps(compute_text_delta(old_text, new_text), ensure_ascii=False, separators=(',', ':'))
+        cursor.execute('''
+            INSERT INTO text_revisions (project_id, kind, revision, version, created, editor, snapshot_hash, delta)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (project_id, kind, revision, version, datetime.now().isoformat(), editor, snapshot_hash, delta))
+    
+    def get_history(self, project_id, kind='edited_text'):
+        """List the recorded revisions of a project text (metadata only)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT revision, version, created, editor, snapshot_hash IS NOT NULL, LENGTH(delta)
+            FROM text_revisions WHERE project_id = ? AND kind = ? ORDER BY revision
+        ''', (project_id, kind))
+        rows = cursor.fetchall()
+        conn.close()
+        return [{'revision': revision, 'version': version, 'created': created, 'editor': editor,
+                 'snapshot': bool(snapshot), 'deltaBytes': delta_bytes or 0}
+                for revision, version, created, editor, snapshot, delta_bytes in rows]
+    
+    def get_text_at_version(self, project_id, version, kind='edited_text'):
+        """Rebuild a project text as of a content version.
+
+        Loads the nearest snapshot at or before the matching revision and
+        replays at most SNAPSHOT_INTERVAL - 1 deltas. Returns
+        (revision, text) or None if no revision exists at that version.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT MAX(revision) FROM text_revisions WHERE project_id = ? AND kind = ? AND version <= ?
+            ''', (project_id, kind, version))
+            target = cursor.fetchone()[0]
+            if target is None:
+                return None
+            cursor.execute('''
+                SELECT r.revision, b.codec, b.data FROM text_revisions r
+                JOIN text_blobs b ON b.content_hash = r.snapshot_hash
+                WHERE r.project_id = ? AND r.kind = ? AND r.revision <= ? AND r.snapshot_hash IS NOT NULL
+                ORDER BY r.revision DESC LIMIT 1
+            ''', (project_id, kind, target))
+            base_revision, codec, data = cursor.fetchone()
+            text = (zlib.decompress(data) if codec == 'zlib' else data).decode('utf-8')
+            cursor.execute('''
+                SELECT delta FROM text_revisions
+                WHERE project_id = ? AND kind = ? AND revision > ? AND revision <= ? ORDER BY revision
+            ''', (project_id, kind, base_revision, target))
+            for (delta,) in cursor.fetchall():
+                text = apply_text_delta(text, json.loads(delta))
+            return target, text
+        finally:
+            conn.close()
+    
+    def _load_texts(self, cursor, project_ids, kinds=None):
+        """Load and decompress text bodies: {project_id: {kind: text}}"""
+        kinds = kinds or self.TEXT_KINDS
+        texts = {project_id: {} for project_id in project_ids}
+        project_ids = list(texts)
+        kind_placeholders = ', '.join('?' * len(kinds))
+        # Ids go in chunks to stay under SQLite's host parameter limit
+        for i in range(0, len(project_ids), self.SQL_PARAMETER_CHUNK):
+            chunk = project_ids[i:i + self.SQL_PARAMETER_CHUNK]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT t.project_id, t.kind, b.codec, b.data
+                FROM project_texts t JOIN text_blobs b ON b.content_hash = t.content_hash
+                WHERE t.project_id IN ({placeholders}) AND t.kind IN ({kind_placeholders})
+            ''', [*chunk, *kinds])
+            for project_id, kind, codec, data in cursor.fetchall():
+                texts[project_id][kind] = (zlib.decompress(data) if codec == 'zlib' else data).decode('utf-8')
+        return texts
+    
+    def get_project_texts(self, project_id, kinds=None):
+        """Load selected text bodies of a single project on demand"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        texts = self._load_texts(cursor, [project_id], kinds)[project_id]
+        conn.close()
+        return texts
+    
+    def _reindex_project_text(self, cursor, project_id):
+        """Refresh the full-text index entry for a project's (edited or raw) text"""
+        cursor.execute('SELECT rowid FROM projects WHERE id = ?', (project_id,))
+        row = cursor.fetchone()
+        if not row:
+            return
+        rowid = row[0]
+        texts = self._load_texts(cursor, [project_id], ('transcription', 'edited_text'))[project_id]
+        cursor.execute('DELETE FROM project_text_fts WHERE rowid = ?', (rowid,))
+        body = strip_provenance_header(texts.get('edited_text') or texts.get('transcription') or '')
+        if body.strip():
+            cursor.execute('INSERT INTO project_text_fts (rowid, body) VALUES (?, ?)', (rowid, body))
+    
+    @staticmethod
+    def _fts_query(text):
+        """Turn free text into a safe FTS5 query: every word must match, 'word*' is a prefix search"""
+        terms = re.findall(r'\w+\*?', text)
+        return ' '.join(f'"{t[:-1]}"*' if t.endswith('*') else f'"{t}"' for t in terms)
+    
+    def search(self, query, limit=20):
+        """Search project text and segments; returns ranked hits with snippets and timestamps"""
+        fts_query = self._fts_query(query)
+        if not fts_query or not self.search_enabled:
+            return []
         
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        # Rank and snippet inside the FTS table first (top-N via the hidden
+        # rank column), then join only the surviving rows
+        cursor.execute('''
+            SELECT p.id, p.name, NULL, NULL, hit.snippet, hit.rank
+            FROM (
+                SELECT rowid, snippet(project_text_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet, rank
+                FROM project_text_fts WHERE project_text_fts MATCH ? ORDER BY rank LIMIT ?
+            ) AS hit JOIN projects p ON p.rowid = hit.rowid
+        ''', (fts_query, limit))
+        hits = cursor.fetchall()
+        
+        cursor.execute('''
+            SELECT s.project_id, p.name, s.start_ms, s.end_ms, hit.snippet, hit.rank
+            FROM (
+                SELECT rowid, snippet(segments_fts, 0, '<mark>', '</mark>', '…', 16) AS snippet, rank
+                FROM segments_fts WHERE segments_fts MATCH ? ORDER BY rank LIMIT ?
+            ) AS hit
+            JOIN transcript_segments s ON s.rowid = hit.rowid
+            JOIN projects p ON p.id = s.project_id
+        ''', (fts_query, limit))
+        hits += cursor.fetchall()
         conn.close()
+        
+        hits.sort(key=lambda h: h[5])
+        return [{
+            'projectId': project_id,
+            'projectName': name,
+            'start': start_ms / 1000 if start_ms is not None else None,
+            'end': end_ms / 1000 if end_ms is not None else None,
+            'snippet': snippet,
+            'score': -rank
+        } for project_id, name, start_ms, end_ms, snippet, rank in hits[:limit]]
+    
+    def update_project(self, project_id, updates, editor=None):
+        """Update project with given fields; editor is credited with the text revisions"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            if self._apply_updates(cursor, project_id, updates, editor):
+                conn.commit()
+        finally:
+            conn.close()
         print(f"✅ Updated project {project_id}")
     
+    def patch_project(self, project_id, expected_version, updates=None, edits=None, editor=None):
+        """Apply field updates and text range edits if the content version still matches.
+
+        `edits` maps a text kind to {start, end, text} replacements against
+        the text at `expected_version` (see apply_text_edits). Returns
+        (version, updated) after the write, or None if the project does not
+        exist; raises VersionConflictError if someone else saved first.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        cursor = conn.cursor()
+        try:
+            # Version check, delta application and write happen under one write lock
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT COALESCE(version, 0) FROM projects WHERE id = ?', (project_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            if row[0] != expected_version:
+                raise VersionConflictError(row[0])
+            
+            updates = dict(updates or {})
+            if edits:
+                base = self._load_texts(cursor, [project_id], list(edits))[project_id]
+                for kind, kind_edits in edits.items():
+                    updates[kind] = apply_text_edits(base.get(kind) or '', kind_edits)
+            
+            updated = self._apply_updates(cursor, project_id, updates, editor)
+            cursor.execute('SELECT COALESCE(version, 0), updated FROM projects WHERE id = ?', (project_id,))
+            version, updated = cursor.fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"✅ Patched project {project_id} (v{version})")
+        return version, updated
+    
+    def _apply_updates(self, cursor, project_id, updates, editor=None):
+        """Write `updates` in the caller's transaction; returns the new updated timestamp, or None if nothing changed"""
+        # Build dynamic update query
+        update_fields = []
+        values = []
+        
+        for field, value in updates.items():
+            if field in ['name', 'assigned_to', 'status', 'word_count', 'processing_time',
+                        'is_preview', 'error_message', 'audio_file_name', 'audio_file_path', 'export_provenance']:
+                update_fields.append(f"{field} = ?")
+                values.append(value)
+        
+        if 'audio_file_path' in updates:
+            audio_path = updates['audio_file_path']
+            update_fields.append("audio_available = ?")
+            values.append(1 if audio_path and os.path.exists(audio_path) else 0)
+        
+        if 'segments' in updates:
+            segments = updates['segments']
+            if isinstance(segments, str):
+                segments = json.loads(segments)
+            self._replace_segments(cursor, project_id, segments)
+
+        # Any content change produces a new content version (invalidates cached exports)
+        if any(field in updates for field in self.CONTENT_FIELDS):
+            update_fields.append("version = COALESCE(version, 0) + 1")
+
+        if not update_fields:
+            return None
+        
+        updated = datetime.now().isoformat()
+        values.append(updated)
+        values.append(project_id)  # WHERE clause
+        
+        query = f"UPDATE projects SET {', '.join(update_fields)}, updated = ? WHERE id = ?"
+        cursor.execute(query, values)
+        texts = {kind: updates[kind] for kind in self.TEXT_KINDS if kind in updates}
+        if texts:
+            cursor.execute('SELECT version FROM projects WHERE id = ?', (project_id,))
+            row = cursor.fetchone()
+            if row:
+                tracked = [kind for kind in self.HISTORY_KINDS if kind in texts]
+                previous = self._load_texts(cursor, [project_id], tracked)[project_id] if tracked else {}
+                self._store_texts(cursor, project_id, texts, row[0] or 0)
+                for kind in tracked:
+                    old_text, new_text = previous.get(kind) or '', texts[kind] or ''
+                    if new_text != old_text:
+                        self._record_revision(cursor, project_id, kind, old_text, new_text, row[0] or 0, editor)
+        if self.search_enabled and ('transcription' in updates or 'edited_text' in updates):
+            self._reindex_project_text(cursor, project_id)
+        return updated
+    
     def delete_project(self, project_id):
         """Delete project and associated files"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Get audio file path for cleanup
+        # Get audio file paths for cleanup
         cursor.execute('SELECT audio_file_path FROM projects WHERE id = ?', (project_id,))
         row = cursor.fetchone()
+        cursor.execute('SELECT file_path FROM audio_files WHERE project_id = ?', (project_id,))
+        audio_paths = {r[0] for r in cursor.fetchall() if r[0]}
+        if row and row[0]:
+            audio_paths.add(row[0])
         
         # Delete project record
+        if self.search_enabled:
+            cursor.execute('DELETE FROM project_text_fts WHERE rowid = (SELECT rowid FROM projects WHERE id = ?)', (project_id,))
         cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
         cursor.execute('DELETE FROM audio_files WHERE project_id = ?', (project_id,))
+        cursor.execute('DELETE FROM transcript_segments WHERE project_id = ?', (project_id,))
+        cursor.execute('''
+            SELECT content_hash FROM project_texts WHERE project_id = ?
+            UNION SELECT snapshot_hash FROM text_revisions WHERE project_id = ? AND snapshot_hash IS NOT NULL
+        ''', (project_id, project_id))
+        hashes = [r[0] for r in cursor.fetchall()]
+        cursor.execute('DELETE FROM project_texts WHERE project_id = ?', (project_id,))
+        cursor.execute('DELETE FROM text_revisions WHERE project_id = ?', (project_id,))
+        cursor.execute('DELETE FROM transcription_jobs WHERE project_id = ?', (project_id,))
+        for content_hash in hashes:
+            self._release_blob(cursor, content_hash)
+        
+        # Tombstone for incremental sync clients; expired ones are pruned here
+        now = datetime.now()
+        if row:
+            cursor.execute('INSERT OR REPLACE INTO project_tombstones (id, deleted) VALUES (?, ?)',
+                           (project_id, now.isoformat()))
+        cursor.execute('DELETE FROM project_tombstones WHERE deleted < ?',
+                       ((now - timedelta(days=self.TOMBSTONE_RETENTION_DAYS)).isoformat(),))
+        
+        # Audio files can be shared between projects; remove one only when its
+        # last reference is gone. This runs under the write lock taken by the
+        # deletes above, so a concurrent save_audio_file cannot re-reference it in between.
+        for audio_path in audio_paths:
+            if self._audio_referenced(cursor, audio_path) or not Path(audio_path).exists():
+                continue
+            try:
+                Path(audio_path).unlink()
+                Path(audio_path).with_suffix('.pdf').unlink(missing_ok=True)
+                Path(audio_path).with_suffix('.txt').unlink(missing_ok=True)
+                PcmCache.path_for(audio_path).unlink(missing_ok=True)
+                cursor.execute('DELETE FROM pcm_cache WHERE audio_path = ?', (audio_path,))
+                cursor.execute('DELETE FROM preview_results WHERE audio_hash = ?', (Path(audio_path).stem,))
+                print(f"✅ Deleted audio file: {audio_path}")
+            except Exception as e:
+                print(f"⚠️ Could not delete audio file: {e}")
         
         conn.commit()
         conn.close()
         
-        # Clean up audio file
-        if row and row[0]:
-            audio_path = Path(row[0])
-            if audio_path.exists():
-                try:
-                    audio_path.unlink()
-                    print(f"✅ Deleted audio file: {audio_path}")
-                except Exception as e:
-                    print(f"⚠️ Could not delete audio file: {e}")
+        # Exported PDFs and cached exports of the project
+        exports_dir = Path("exports") / project_id
+        if row and exports_dir.is_dir():
+            shutil.rmtree(exports_dir, ignore_errors=True)
         
         print(f"✅ Deleted project {project_id}")
     
     def save_audio_file(self, project_id, file_data, original_name, mime_type, source_path=None):
-        """Save audio file to disk and update project"""
-        # Create unique filename
-        file_extension = Path(original_name).suffix
+        """Save audio file to disk and update project.
+
+        Files are stored by content hash (see audio_blob_path), so uploading
+        the same recording into several projects keeps a single copy; the
+        audio_files rows pointing at it are its references.
+        """
+        def stage(staged_path):
+            with open(staged_path, 'wb') as f:
+                f.write(file_data)
+        filename = f"{hashlib.sha256(file_data).hexdigest()}{Path(original_name).suffix.lower()}"
+        return self._store_audio(project_id, filename, stage, original_name, mime_type, len(file_data), source_path)
+    
+    def save_audio_from_path(self, project_id, path, original_name=None, mime_type=None, move=False):
+        """Store an audio file already on disk (hot-folder ingest) and update project.
+
+        The file is hard-linked into the store, so nothing is copied when it
+        is on the same filesystem; across filesystems it falls back to a
+        copy. With move=True the source is removed only once the project
+        references the stored audio, so a failed insert leaves it in place.
+        Its absolute path is kept as the audio's source_path.
+        """
+        path = Path(path).resolve()
+        original_name = original_name or path.name
+        file_size = path.stat().st_size
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        def stage(staged_path):
+            try:
+                os.link(path, staged_path)
+            except OSError:
+                # Another filesystem (or no hard links there)
+                shutil.copy2(path, staged_path)
+        file_path = self._store_audio(project_id, f"{sha256.hexdigest()}{path.suffix.lower()}", stage, original_name,
+                                      mime_type or mimetypes.guess_type(original_name)[0] or 'audio/mpeg',
+                                      file_size, str(path))
+        if move:
+            path.unlink(missing_ok=True)
+        return file_path
+    
+    def _store_audio(self, project_id, filename, stage, original_name, mime_type, file_size, source_path):
+        """Publish content into the store as filename and reference it from the project.
+
+        stage(path) puts the content at a temporary path next to the target;
+        it is not called when the content is already stored. If the database
+        update fails, the staged (or just published) file is removed again.
+        """
         file_id = str(uuid.uuid4())
-        filename = f"{file_id}{file_extension}"
-        file_path = Path("uploads") / filename
+        file_path = audio_blob_path(filename)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Save file to disk
-        with open(file_path, 'wb') as f:
-            f.write(file_data)
+        # Stage new content outside the DB write lock; it is published below
+        staged_path = None
+        if not file_path.exists():
+            staged_path = file_path.with_name(f".{file_id}.part")
+            stage(staged_path)
         
         # Update database
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
-        # Insert audio file record (include optional source_path)
+        published = False
         try:
+            # Insert audio file record (include optional source_path)
+            try:
+                cursor.execute('''
+                    INSERT INTO audio_files (id, project_id, original_name, file_path, source_path, 
+                                           file_size, mime_type, created)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (file_id, project_id, original_name, str(file_path), source_path,
+                      file_size, mime_type, datetime.now().isoformat()))
+            except Exception:
+                # Fallback if the column doesn't exist for some reason
+                cursor.execute('''
+                    INSERT INTO audio_files (id, project_id, original_name, file_path, 
+                                           file_size, mime_type, created)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (file_id, project_id, original_name, str(file_path), 
+                      file_size, mime_type, datetime.now().isoformat()))
+            
+            # Update project with audio info
             cursor.execute('''
-                INSERT INTO audio_files (id, project_id, original_name, file_path, source_path, 
-                                       file_size, mime_type, created)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (file_id, project_id, original_name, str(file_path), source_path,
-                  len(file_data), mime_type, datetime.now().isoformat()))
+                UPDATE projects SET audio_file_name = ?, audio_file_path = ?, audio_available = 1, updated = ?
+                WHERE id = ?
+            ''', (original_name, str(file_path), datetime.now().isoformat(), project_id))
+            
+            # Publish while holding the write lock, so a concurrent delete_project
+            # cannot unlink the shared file between the check and the commit
+            deduplicated = file_path.exists()
+            if deduplicated:
+                if staged_path:
+                    staged_path.unlink()
+            else:
+                if not staged_path:
+                    staged_path = file_path.with_name(f".{file_id}.part")
+                    stage(staged_path)
+                os.replace(staged_path, file_path)
+                published = True
+            
+            conn.commit()
         except Exception:
-            # Fallback if the column doesn't exist for some reason
-            cursor.execute('''
-                INSERT INTO audio_files (id, project_id, original_name, file_path, 
-                                       file_size, mime_type, created)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (file_id, project_id, original_name, str(file_path), 
-                  len(file_data), mime_type, datetime.now().isoformat()))
-        
-        # Update project with audio info
-        cursor.execute('''
-            UPDATE projects SET audio_file_name = ?, audio_file_path = ?, updated = ?
-            WHERE id = ?
-        ''', (original_name, str(file_path), datetime.now().isoformat(), project_id))
-        
-        conn.commit()
-        conn.close()
+            # Undo the publish while the transaction still holds the write lock
+            if published:
+                file_path.unlink(missing_ok=True)
+            conn.rollback()
+            if staged_path:
+                staged_path.unlink(missing_ok=True)
+            raise
+        finally:
+            conn.close()
         
-        print(f"✅ Saved audio file: {filename} for project {project_id}")
+        if deduplicated:
+            print(f"♻️ Reused stored audio {filename} for project {project_id}")
+        else:
+            print(f"✅ Saved audio file: {filename} for project {project_id}")
         return str(file_path)
     
-    def _row_to_project(self, row):
-        """Convert database row to project dictionary"""
-        columns = ['id', 'name', 'assigned_to', 'start_date', 'end_date', 'status',
-                  'audio_file_name', 'audio_file_path', 'transcription', 'formatted_text',
-                  'edited_text', 'rich_content', 'word_count', 'processing_time',
-                  'is_preview', 'error_message', 'created', 'updated']
-        
-        project = dict(zip(columns, row))
-        
-        # Convert snake_case field names to camelCase for client compatibility
-        field_mapping = {
-            'assigned_to': 'assignedTo',
-            'start_date': 'startDate',
-            'end_date': 'endDate',
-            'audio_file_name': 'audioFileName',
-            'audio_file_path': 'audioFilePath',
-            'formatted_text': 'formattedText',
-            'edited_text': 'editedText',
-            'rich_content': 'richContent',
-            'word_count': 'wordCount',
-            'processing_time': 'processingTime',
-            'is_preview': 'isPreview',
-            'error_message': 'errorMessage',
-            'export_provenance': 'exportProvenance'
-        }
+    def _row_to_project(self, row, texts=None):
+        """Convert a PROJECT_SELECT row (plus its loaded text bodies) to a client project dict"""
+        project = dict(zip(PROJECT_CLIENT_KEYS, row))
+        project.update(EMPTY_CLIENT_TEXTS)
+        if texts:
+            for kind, text in texts.items():
+                project[TEXT_CLIENT_KEYS[kind]] = text
         
-        # Create new project dict with camelCase field names
-        converted_project = {}
-        for key, value in project.items():
-            new_key = field_mapping.get(key, key)
-            converted_project[new_key] = value
-        
-        # Add audio URL if file exists
-        print(f"🔍 _row_to_project: audioFilePath = {converted_project.get('audioFilePath')}")
-        if converted_project.get('audioFilePath'):
-            audio_path = Path(converted_project['audioFilePath'])
-            print(f"🔍 _row_to_project: audio_path = {audio_path}")
-            print(f"🔍 _row_to_project: audio_path.exists() = {audio_path.exists()}")
-            if audio_path.exists():
-                audio_url = f"/audio/{audio_path.name}"
-                converted_project['audioUrl'] = audio_url
-                print(f"✅ _row_to_project: Generated audioUrl = {audio_url}")
+        # Audio availability is tracked in the DB on upload/delete, not statted per read
+        if project['audioAvailable'] and project['audioFilePath']:
+            project['audioUrl'] = '/audio/' + os.path.basename(project['audioFilePath'])
+        return project
+
+# Trimmed preview audio, speech-only audio (VAD) and audio downloaded by
+# remote workers are written to the system temp dir under these prefixes
+PREVIEW_FILE_PREFIX = 'palascribe-preview-'
+SPEECH_FILE_PREFIX = 'palascribe-speech-'
+JOB_FILE_PREFIX = 'palascribe-job-'
+TEMP_AUDIO_PREFIXES = (PREVIEW_FILE_PREFIX, SPEECH_FILE_PREFIX, JOB_FILE_PREFIX)
+# Per-pass Whisper --output_dir, also in the temp dir
+WHISPER_OUTPUT_DIR_PREFIX = 'whisper-out-'
+
+def whisper_work_dir():
+    """Directory Whisper runs in, and so where it writes its output files"""
+    # Configurable via env var
+    project_dir = os.environ.get(
+        "AUDIO_TEXT_CONVERTER_DIR",
+        "/Users/vijayaraghavanvedantham/Documents/VRI Tech Projects/audio-text-converter",
+    )
+    if not os.path.exists(project_dir):
+        # Fall back to the directory containing this script
+        project_dir = os.path.dirname(os.path.abspath(__file__))
+    return project_dir
+
+def terminate_process_group(process, grace_seconds=5):
+    """Stop a worker started with start_new_session=True and everything it spawned.
+
+    SIGTERM goes to the whole process group, so ffmpeg started by Whisper
+    dies with it; whatever is left after grace_seconds gets SIGKILL. The
+    escalation runs on its own thread and the caller returns at once.
+    """
+    def signal_group(sig):
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, sig)
+            elif sig == signal.SIGTERM:
+                process.terminate()
             else:
-                print(f"❌ _row_to_project: Audio file does not exist at {audio_path}")
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass  # Already gone
+    def escalate():
+        try:
+            process.wait(timeout=grace_seconds)
+        except subprocess.TimeoutExpired:
+            print(f"🛑 Force killing process group {process.pid}")
+        # Children can outlive the group leader
+        signal_group(getattr(signal, 'SIGKILL', signal.SIGTERM))
+    signal_group(signal.SIGTERM)
+    threading.Thread(target=escalate, name=f'reap-{process.pid}', daemon=True).start()
+
+# Whisper logs of a project's latest passes kept in exports/{id}/logs/
+JOB_LOGS_KEPT = 10
+
+def job_log_path(project_id, run_id=None):
+    """Log for a new Whisper pass of the project, kept (and collected) with its exports.
+
+    Logs are named by start time and run_id (a remote job's id, else a fresh
+    one); starting a pass drops all but the newest JOB_LOGS_KEPT.
+    """
+    log_dir = Path('exports') / project_id / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    for old in sorted(log_dir.glob('whisper-*.log'))[:-(JOB_LOGS_KEPT - 1) or None]:
+        old.unlink(missing_ok=True)
+        old.with_name(old.name + '.1').unlink(missing_ok=True)
+    return log_dir / f"whisper-{datetime.now():%Y%m%d-%H%M%S-%f}-{run_id or uuid.uuid4().hex[:8]}.log"
+
+def latest_job_log(project_id, run_id=None):
+    """Newest log of the project (of run_id's passes, if given), or None"""
+    pattern = f"whisper-*-{run_id}.log" if run_id else 'whisper-*.log'
+    logs = sorted((Path('exports') / project_id / 'logs').glob(pattern))
+    return logs[-1] if logs else None
+
+def write_job_log(project_id, text, run_id=None):
+    """Log of a pass whose output was captured somewhere else"""
+    try:
+        job_log_path(project_id, run_id).write_text(text, encoding='utf-8')
+    except OSError as e:
+        print(f"⚠️ Could not write job log for {project_id}: {e}")
+
+def read_log_tail(path, lines=200):
+    """Last `lines` lines of a text file, reading back from its end"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= lines:
+            step = min(position, 64 * 1024)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    return b'\n'.join(data.split(b'\n')[-lines - 1:]).decode('utf-8', errors='replace')
+
+class OutputCapture:
+    """Bounded capture of a worker process's stdout and stderr.
+
+    Reader threads drain both pipes line by line while the process runs
+    (Whisper's progress bar redraws count as lines too), so a long verbose
+    run costs constant memory: the last `tail_lines` lines of each stream
+    stay in a ring buffer for the caller, and everything goes to the log
+    file, rotated to `<name>.1` once it passes max_log_bytes.
+    """
+
+    def __init__(self, log_path=None, tail_lines=200, max_log_bytes=5 * 1024 * 1024):
+        self.log_path = Path(log_path) if log_path else None
+        self.max_log_bytes = max_log_bytes
+        self.tails = {'stdout': deque(maxlen=tail_lines), 'stderr': deque(maxlen=tail_lines)}
+        self.threads = []
+        self.log = None
+        self.log_bytes = 0
+        self.lock = threading.Lock()
+
+    def start(self, process):
+        """Start draining a text-mode Popen's stdout and stderr pipes"""
+        if self.log_path:
+            try:
+                self.log_path.parent.mkdir(parents=True, exist_ok=True)
+                self.log = open(self.log_path, 'w', encoding='utf-8')
+            except OSError as e:
+                print(f"⚠️ Could not open job log {self.log_path}: {e}")
+        for name in ('stdout', 'stderr'):
+            thread = threading.Thread(target=self._drain, args=(name, getattr(process, name)),
+                                      name=f'{name}-{process.pid}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def _drain(self, name, pipe):
+        try:
+            for line in pipe:
+                self.tails[name].append(line)
+                if self.log:
+                    self._write(line if name == 'stdout' else f"[stderr] {line}")
+        except (OSError, ValueError):
+            pass  # Pipe closed under us
+        finally:
+            pipe.close()
+
+    def _write(self, text):
+        with self.lock:
+            if self.log is None:
+                return
+            try:
+                size = len(text.encode('utf-8'))
+                if self.log_bytes + size > self.max_log_bytes:
+                    self.log.close()
+                    os.replace(self.log_path, self.log_path.with_name(self.log_path.name + '.1'))
+                    self.log = open(self.log_path, 'w', encoding='utf-8')
+                    self.log_bytes = 0
+                self.log.write(text)
+                # Readable while the run is going
+                self.log.flush()
+                self.log_bytes += size
+            except OSError as e:
+                print(f"⚠️ Job log {self.log_path} disabled: {e}")
+                self.log = None
+
+    def finish(self, timeout=5):
+        """Wait for the pipes to close (children can hold them past the process's exit)"""
+        for thread in self.threads:
+            thread.join(timeout)
+        with self.lock:
+            if self.log:
+                self.log.close()
+                self.log = None
+
+    @property
+    def stdout(self):
+        return ''.join(self.tails['stdout'])
+
+    @property
+    def stderr(self):
+        return ''.join(self.tails['stderr'])
+
+def detect_speech_regions(samples, sample_rate=16000, frame_seconds=0.03, threshold_db=-45.0,
+                          min_silence_seconds=1.0, padding_seconds=0.25):
+    """Speech regions [(start, end), ...] in seconds of float samples, by frame energy.
+
+    A frame counts as speech when its level is above `threshold_db` (dBFS)
+    and at least 12 dB above the recording's noise floor (10th percentile
+    of frame levels). Pauses shorter than `min_silence_seconds` stay inside
+    a region and regions are padded so word onsets are not clipped.
+    """
+    frame = int(sample_rate * frame_seconds)
+    count = len(samples) // frame
+    duration = len(samples) / sample_rate
+    if not count:
+        return []
+    # Mean square per frame, in chunks so a memory-mapped recording is
+    # never copied whole
+    levels = np.empty(count, dtype=np.float32)
+    chunk = 20000
+    for first in range(0, count, chunk):
+        last = min(first + chunk, count)
+        frames = np.asarray(samples[first * frame:last * frame]).reshape(-1, frame)
+        levels[first:last] = np.einsum('ij,ij->i', frames, frames) / frame
+    levels = 10 * np.log10(levels + 1e-10)
+    threshold = max(threshold_db, float(np.percentile(levels, 10)) + 12)
+    
+    # Runs of speech frames, with short pauses bridged
+    edges = np.diff(np.concatenate(([0], (levels > threshold).view(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if not len(starts):
+        return []
+    keep = np.concatenate(([True], (starts[1:] - ends[:-1]) * frame_seconds >= min_silence_seconds))
+    starts, ends = starts[keep], ends[np.concatenate((keep[1:], [True]))]
+    
+    regions = []
+    for start, end in zip(starts * frame_seconds - padding_seconds, ends * frame_seconds + padding_seconds):
+        start, end = max(round(float(start), 3), 0.0), min(round(float(end), 3), duration)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
         else:
-            print(f"❌ _row_to_project: No audioFilePath found in project")
-        
-        print(f"📋 _row_to_project: Final project keys = {list(converted_project.keys())}")
-        return converted_project
+            regions.append((start, end))
+    return regions
+
+def audio_content_hash(audio_path):
+    """sha256 of an audio file; free for content-addressed uploads, which are named by it"""
+    stem = Path(audio_path).stem
+    if re.fullmatch(r'[0-9a-f]{64}', stem):
+        return stem
+    digest = hashlib.sha256()
+    with open(audio_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def plan_preview_windows(duration, budget_seconds, count):
+    """`count` windows [(start, end), ...] sharing `budget_seconds`, spread evenly from the beginning to the end"""
+    if duration <= budget_seconds:
+        return [(0.0, round(duration, 2))]
+    if count <= 1:
+        return [(0.0, float(budget_seconds))]
+    window = budget_seconds / count
+    step = (duration - window) / (count - 1)
+    return [(round(i * step, 2), round(i * step + window, 2)) for i in range(count)]
+
+def probe_audio_duration(audio_path):
+    """Duration in seconds from the container (ffprobe), or None"""
+    try:
+        result = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0',
+                                 str(audio_path)], capture_output=True, text=True, check=True, timeout=30)
+        return float(result.stdout.strip())
+    except Exception:
+        return None
+
+def whisper_segments(whisper_result):
+    """Non-empty segments of a Whisper JSON result, with their confidence"""
+    return [{
+        'start': seg['start'],
+        'end': seg['end'],
+        'text': seg['text'].strip(),
+        'avg_logprob': seg.get('avg_logprob'),
+        'no_speech_prob': seg.get('no_speech_prob')
+    } for seg in whisper_result.get('segments', []) if seg.get('text', '').strip()]
+
+def read_whisper_output(output_dir, audio_path):
+    """Whisper's JSON result for audio_path from its --output_dir, or None when it wrote none"""
+    try:
+        with open(os.path.join(output_dir, f"{Path(audio_path).stem}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def merge_regions(regions, padding_seconds=0.0, min_gap_seconds=0.0):
+    """Sorted, padded regions with overlaps and gaps under min_gap_seconds joined"""
+    merged = []
+    for start, end in sorted(regions):
+        start, end = max(start - padding_seconds, 0.0), end + padding_seconds
+        if merged and start - merged[-1][1] < min_gap_seconds:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return [(round(start, 3), round(end, 3)) for start, end in merged]
+
+# Rough decoding cost of each Whisper size relative to large, from its
+# published relative speeds
+MODEL_RELATIVE_COST = {'tiny': 1 / 32, 'base': 1 / 16, 'small': 1 / 6, 'medium': 1 / 2, 'large': 1.0}
+
+def model_relative_cost(model):
+    """Relative cost of a Whisper model name such as 'base.en' or 'large-v3'"""
+    return MODEL_RELATIVE_COST.get(re.split(r'[.\-]', model or '')[0], 1.0)
+
+def escalation_regions(segments, threshold=-0.6, no_speech_threshold=0.6, padding_seconds=0.2):
+    """Padded, merged regions around segments a fast model was unsure of.
+
+    A segment is escalated when its avg_logprob is below threshold, unless
+    Whisper thinks it is not speech at all.
+    """
+    unsure = [(seg['start'], seg['end']) for seg in segments
+              if seg.get('avg_logprob') is not None and seg['avg_logprob'] < threshold
+              and not (seg.get('no_speech_prob') or 0) > no_speech_threshold]
+    return merge_regions(unsure, padding_seconds, min_gap_seconds=2 * padding_seconds)
+
+def remap_to_regions(segments, regions):
+    """Move segment times from speech-only audio (the regions back to back) to the original timeline"""
+    offsets = list(accumulate((end - start for start, end in regions), initial=0.0))
+    for seg in segments:
+        i = min(max(bisect_right(offsets, seg['start']) - 1, 0), len(regions) - 1)
+        start, end = regions[i]
+        # A segment running over a join ends with the region it started in,
+        # rather than spanning the audio that was skipped
+        seg['start'] = round(min(start + seg['start'] - offsets[i], end), 3)
+        seg['end'] = round(max(min(start + seg['end'] - offsets[i], end), seg['start']), 3)
+    return segments
+
+class PcmCache:
+    """Uploads decoded once to 16 kHz mono float32, kept next to the audio.
+
+    Whisper resamples every input to 16 kHz mono through ffmpeg, so each
+    preview, full run or re-run with another model used to decode the
+    upload again. The cache stores `<stem>.16k.wav` beside the upload: a
+    44-byte header followed by raw little-endian float32 samples. The
+    whisper CLI reads it without resampling, and the in-process engine
+    memory-maps the samples, so concurrent jobs on the same audio share
+    page-cache pages. Least recently used files are evicted once the cache
+    exceeds `budget_bytes`.
+    """
+
+    SAMPLE_RATE = 16000
+    SUFFIX = '.16k.wav'
+    HEADER_BYTES = 44
+    # Samples copied at a time by write_regions (a minute, ~4 MB)
+    WRITE_CHUNK_SAMPLES = SAMPLE_RATE * 60
+    # Recently used files are not evicted: a job may be about to open them
+    PIN_SECONDS = 300
+
+    def __init__(self, db_manager, budget_bytes=8 * 1024 ** 3, root="uploads"):
+        self.db_manager = db_manager
+        self.budget_bytes = budget_bytes
+        self.root = Path(root).resolve()
+        self.lock = threading.Lock()
+        self._decoding = {}  # pcm path -> [lock held while it is decoded, jobs waiting on it]
+
+    @classmethod
+    def path_for(cls, audio_path):
+        audio_path = Path(audio_path)
+        return audio_path.with_name(audio_path.stem + cls.SUFFIX)
+
+    @classmethod
+    def wav_header(cls, data_bytes):
+        """RIFF header of a mono IEEE-float WAV at SAMPLE_RATE"""
+        return struct.pack('<4sI4s4sIHHIIHH4sI', b'RIFF', 36 + data_bytes, b'WAVE', b'fmt ', 16,
+                           3, 1, cls.SAMPLE_RATE, cls.SAMPLE_RATE * 4, 4, 32, b'data', data_bytes)
+
+    def covers(self, audio_path):
+        """Whether audio_path is a stored upload (temp files are not cached)"""
+        # Path.is_relative_to needs Python 3.9
+        try:
+            Path(audio_path).resolve().relative_to(self.root)
+            return True
+        except ValueError:
+            return False
+
+    def get(self, audio_path):
+        """Path of the decoded audio, decoding it on first use"""
+        pcm_path = self.path_for(audio_path)
+        with self.lock:
+            decoding = self._decoding.setdefault(str(pcm_path), [threading.Lock(), 0])
+            decoding[1] += 1
+        try:
+            with decoding[0]:
+                if not pcm_path.exists():
+                    started = time.time()
+                    self._decode(audio_path, pcm_path)
+                    print(f"🎛️ Decoded {Path(audio_path).name} to 16 kHz PCM in {time.time() - started:.1f}s")
+                self._touch(audio_path, pcm_path)
+        finally:
+            with self.lock:
+                # The last one out drops the lock
+                decoding[1] -= 1
+                if not decoding[1]:
+                    del self._decoding[str(pcm_path)]
+        return pcm_path
+
+    def duration(self, audio_path):
+        """Length in seconds of already decoded audio, or None"""
+        try:
+            return (self.path_for(audio_path).stat().st_size - self.HEADER_BYTES) / (4 * self.SAMPLE_RATE)
+        except OSError:
+            return None
+
+    def extract(self, audio_path, regions):
+        """The samples of regions [(start, end), ...] in seconds, back to back.
+
+        Several regions are copied into one array (64 KB per second of
+        audio, ~230 MB for an hour); a single region stays a memory map.
+        For the whisper CLI use write_regions, which does not hold them.
+        """
+        samples = self.load(audio_path)
+        rate = self.SAMPLE_RATE
+        parts = [samples[round(start * rate):round(end * rate)] for start, end in regions]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def write_regions(self, audio_path, regions, prefix):
+        """Write the samples of regions back to back to a temp WAV; returns its path.
+
+        The regions are streamed from the memory map a chunk at a time.
+        """
+        samples = self.load(audio_path)
+        rate = self.SAMPLE_RATE
+        data_bytes = 0
+        with tempfile.NamedTemporaryFile(delete=False, prefix=prefix, suffix='.wav') as f:
+            f.write(self.wav_header(0))
+            for start, end in regions:
+                region = samples[round(start * rate):round(end * rate)]
+                for i in range(0, len(region), self.WRITE_CHUNK_SAMPLES):
+                    chunk = region[i:i + self.WRITE_CHUNK_SAMPLES]
+                    f.write(chunk.tobytes())
+                    data_bytes += chunk.nbytes
+            f.seek(0)
+            f.write(self.wav_header(data_bytes))
+            return f.name
+
+    def load(self, audio_path, offset_seconds=0, duration_seconds=None):
+        """Samples of audio_path (float32 at SAMPLE_RATE) as a memory map"""
+        # Copy-on-write rather than read-only: torch warns on non-writable arrays
+        samples = np.memmap(self.get(audio_path), dtype='<f4', mode='c', offset=self.HEADER_BYTES)
+        start = int(offset_seconds * self.SAMPLE_RATE)
+        stop = None if duration_seconds is None else start + int(duration_seconds * self.SAMPLE_RATE)
+        return samples[start:stop]
+
+    def _decode(self, audio_path, pcm_path):
+        part_path = pcm_path.with_name(f".{uuid.uuid4()}.part")
+        try:
+            with open(part_path, 'wb') as f:
+                f.write(self.wav_header(0))
+                f.flush()
+                subprocess.run(['ffmpeg', '-nostdin', '-v', 'error', '-i', str(audio_path),
+                                '-ac', '1', '-ar', str(self.SAMPLE_RATE), '-f', 'f32le', 'pipe:1'],
+                               stdout=f, stderr=subprocess.PIPE, check=True)
+                data_bytes = os.fstat(f.fileno()).st_size - self.HEADER_BYTES
+                if data_bytes + 36 > 0xFFFFFFFF:
+                    raise ValueError("audio too long for a WAV cache file")
+                f.seek(0)
+                f.write(self.wav_header(data_bytes))
+            os.replace(part_path, pcm_path)
+        finally:
+            part_path.unlink(missing_ok=True)
+
+    def _touch(self, audio_path, pcm_path):
+        """Record a use of pcm_path and evict least recently used files over budget"""
+        now = datetime.now()
+        conn = sqlite3.connect(self.db_manager.db_path, timeout=30)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO pcm_cache (pcm_path, audio_path, bytes, last_used) VALUES (?, ?, ?, ?)
+            ON CONFLICT (pcm_path) DO UPDATE SET last_used = excluded.last_used, bytes = excluded.bytes
+        ''', (str(pcm_path), str(audio_path), pcm_path.stat().st_size, now.isoformat()))
+        cursor.execute('SELECT COALESCE(SUM(bytes), 0) FROM pcm_cache')
+        total = cursor.fetchone()[0]
+        if total > self.budget_bytes:
+            cursor.execute('SELECT pcm_path, bytes FROM pcm_cache WHERE last_used < ? ORDER BY last_used',
+                           ((now - timedelta(seconds=self.PIN_SECONDS)).isoformat(),))
+            for path, size in cursor.fetchall():
+                if total <= self.budget_bytes:
+                    break
+                Path(path).unlink(missing_ok=True)
+                cursor.execute('DELETE FROM pcm_cache WHERE pcm_path = ?', (path,))
+                total -= size
+                print(f"🧹 Evicted decoded audio {Path(path).name} ({size / 1e6:.1f}MB)")
+        conn.commit()
+        conn.close()
+
+class WhisperBatcher:
+    """Groups short CLI transcriptions with the same model and language into
+    one whisper process.
+
+    For a 1-3 minute chant or Q&A clip, loading the model takes about as
+    long as transcribing it. The first short job opens a batch and waits up
+    to `window_seconds` (less if the batch fills) for others to join, then
+    runs them all through one `run_batch(paths)` call. Every job of the
+    batch gets its result. Only passes of the given priorities are batched:
+    by default background ones, as an interactive preview should not sit
+    out the window.
+    """
+
+    def __init__(self, window_seconds=2.0, max_files=16, max_audio_seconds=240, priorities=('background',)):
+        self.window_seconds = window_seconds
+        self.max_files = max_files
+        self.max_audio_seconds = max_audio_seconds
+        self.priorities = tuple(priorities)
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, audio_path, run_batch):
+        """Result of the batch run that transcribed audio_path"""
+        with self.lock:
+            batch = self.pending.get(key)
+            # Files with the same name would write the same output file
+            leader = batch is None or Path(audio_path).stem in {Path(path).stem for path in batch['paths']}
+            if leader:
+                batch = {'paths': [], 'full': threading.Event(), 'done': threading.Event(), 'result': None}
+                self.pending[key] = batch
+            batch['paths'].append(audio_path)
+            if len(batch['paths']) >= self.max_files:
+                self.pending.pop(key, None)
+                batch['full'].set()
+        if not leader:
+            batch['done'].wait()
+            return batch['result']
+        batch['full'].wait(self.window_seconds)
+        with self.lock:
+            if self.pending.get(key) is batch:
+                del self.pending[key]
+        try:
+            batch['result'] = run_batch(list(batch['paths']))
+        except Exception as e:
+            batch['result'] = {'error': f'Batched Whisper run failed: {e}'}
+        finally:
+            batch['done'].set()
+        return batch['result']
+
+class ResourceManager:
+    """Splits the machine's cores between concurrent Whisper passes.
+
+    Left alone, every whisper process (and torch in the server) starts one
+    thread per core, so two or three jobs at once oversubscribe the CPU and
+    finish later than if they had run one after another. Each pass leases
+    a share of the cores: a thread count for OMP/MKL/torch, optionally the
+    least busy cores to pin to, and a nice level by priority (background
+    full runs yield to interactive previews). A lease is sized when the
+    pass starts; running passes keep theirs.
+
+    Shares are cpus / concurrency, the number of passes expected to run at
+    once, and never more than the cores no running pass holds, so the leased
+    threads add up to at most the core count. A pass beyond that (all cores
+    leased) still gets one thread.
+    """
+
+    NICE_LEVELS = {'interactive': 0, 'background': 10}
+    THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+    def __init__(self, cpus=None, pin=False, nice_levels=None, concurrency=1):
+        if cpus is None:
+            cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else range(os.cpu_count() or 1)
+        self.cpus = list(cpus)
+        self.pin = pin
+        self.concurrency = max(1, concurrency)
+        self.nice_levels = dict(self.NICE_LEVELS, **(nice_levels or {}))
+        self.leases = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, priority='background'):
+        """Lease {'id', 'threads', 'cpus', 'nice', 'priority'} for a pass starting now"""
+        with self.lock:
+            leased = sum(lease['threads'] for lease in self.leases.values())
+            threads = max(1, min(len(self.cpus) // self.concurrency, len(self.cpus) - leased))
+            # Least leased cores first, so concurrent passes land on different cores
+            load = {cpu: 0 for cpu in self.cpus}
+            for lease in self.leases.values():
+                for cpu in lease['cpus']:
+                    load[cpu] += 1
+            lease = {
+                'id': uuid.uuid4().hex,
+                'threads': threads,
+                'cpus': sorted(sorted(self.cpus, key=load.__getitem__)[:threads]),
+                'nice': self.nice_levels.get(priority, 0),
+                'priority': priority
+            }
+            self.leases[lease['id']] = lease
+            return lease
+
+    def release(self, lease):
+        with self.lock:
+            self.leases.pop(lease['id'], None)
+
+    def environment(self, lease, base=None):
+        """Environment for a worker process limited to the lease's threads"""
+        env = dict(os.environ if base is None else base)
+        env.update({name: str(lease['threads']) for name in self.THREAD_ENV_VARS})
+        return env
+
+    def command(self, lease, command):
+        """command run at the lease's nice level and pinned to its cores, through
+        nice(1) and taskset(1) when present (preexec_fn is unsafe in a threaded server)"""
+        prefix = []
+        if lease['nice'] and shutil.which('nice'):
+            prefix += ['nice', '-n', str(lease['nice'])]
+        if self.pin and shutil.which('taskset'):
+            prefix += ['taskset', '-c', ','.join(map(str, lease['cpus']))]
+        return prefix + list(command)
+
+    def snapshot(self):
+        with self.lock:
+            return {'cpus': len(self.cpus), 'pin': self.pin, 'concurrency': self.concurrency,
+                    'workers': [dict(lease) for lease in self.leases.values()]}
+
+class WhisperEngine:
+    """Whisper models loaded once and run inside the server process.
+
+    Used instead of the whisper CLI (`--engine inprocess`), it saves the
+    model load of every job and takes samples straight from the PCM cache.
+    Runs on one model are serialized: Whisper installs its key/value cache
+    hooks on the shared model for the duration of a decode.
+
+    With precision 'int8' the model's linear layers (nearly all of its
+    weights) are dynamically quantized for CPU inference: int8 weights,
+    activations quantized on the fly. The quantized model is saved under
+    `cache_dir`, so later loads skip both the fp32 load and quantization.
+    """
+
+    PRECISIONS = ('fp32', 'int8')
+
+    def __init__(self, precision='fp32', cache_dir=None):
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'")
+        self.precision = precision
+        self.cache_dir = Path(cache_dir or Path.home() / '.cache' / 'palascribe' / 'models')
+        self.models = {}
+        self.lock = threading.Lock()
+
+    def _model(self, name, precision):
+        with self.lock:
+            if (name, precision) not in self.models:
+                import whisper
+                if precision == 'int8':
+                    model = self._quantized_model(name)
+                else:
+                    print(f"🧠 Loading Whisper model '{name}' in-process")
+                    model = whisper.load_model(name)
+                self.models[(name, precision)] = (model, threading.Lock())
+            return self.models[(name, precision)]
+
+    def _quantized_model(self, name):
+        import torch
+        import whisper
+        # Pickled modules only load back into the versions that saved them
+        cache_path = self.cache_dir / f"{name}-int8-whisper{whisper.__version__}-torch{torch.__version__}.pt"
+        if cache_path.exists():
+            try:
+                print(f"🧠 Loading int8 Whisper model '{name}' from {cache_path}")
+                return torch.load(cache_path, map_location='cpu', weights_only=False)
+            except Exception as e:
+                print(f"⚠️ Could not load quantized model cache {cache_path}, quantizing again: {e}")
+        print(f"🧠 Loading Whisper model '{name}' and quantizing it to int8")
+        model = whisper.load_model(name, device='cpu')
+        # whisper.model.Linear only casts its weight to the input dtype, a
+        # no-op in fp32; as plain Linear layers quantize_dynamic swaps them
+        for module in model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.__class__ = torch.nn.Linear
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix='.tmp', delete=False) as tmp:
+                torch.save(model, tmp)
+            os.replace(tmp.name, cache_path)
+            print(f"💾 Cached int8 model at {cache_path}")
+        except Exception as e:
+            print(f"⚠️ Could not cache quantized model: {e}")
+        return model
+
+    def transcribe(self, samples, model="medium", language="English", precision=None, threads=None, **options):
+        """Whisper's result (text, segments, language) for 16 kHz float32 samples.
+
+        threads caps torch's intra-op threads for this run. The setting is
+        process-wide, so concurrent runs on other models share the last one.
+        """
+        precision = precision or self.precision
+        whisper_model, model_lock = self._model(model, precision)
+        if precision == 'int8':
+            # Quantized kernels are CPU fp32-in/fp32-out
+            options.setdefault('fp16', False)
+        with model_lock:
+            if threads:
+                import torch
+                torch.set_num_threads(threads)
+            return whisper_model.transcribe(samples, language=language, verbose=None, **options)
+
+class StorageGarbageCollector:
+    """Reconciles files on disk with the database and removes orphans.
+
+    Looks at uploads (unreferenced audio, PDFs of deleted audio, interrupted
+    uploads), exports/{id}/ of deleted projects, Whisper output files left in
+    the working directories, and trimmed or speech-only audio and Whisper
+    output directories in the temp dir. Only
+    entries older than `grace_seconds` are touched, so work in progress is
+    safe. Background runs are incremental: each examines at most
+    `max_entries` paths and reclaims at most `max_bytes`, resuming where the
+    previous run stopped.
+    """
+
+    # Whisper outputs named after temp, trimmed, uuid or content-hash audio
+    # names (or their PCM cache files)
+    WORK_FILE_PATTERN = re.compile(
+        r'^(tmp[a-z0-9_]{8}|(' + '|'.join(map(re.escape, TEMP_AUDIO_PREFIXES)) + r')[a-z0-9_]+|[0-9a-f]{64}|'
+        r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(\.16k)?\.(txt|srt|vtt|tsv|json)$'
+    )
+    # Files derived from an upload and named after it: (suffix, description)
+    COMPANIONS = (('.pdf', 'PDF'), ('.txt', 'provenance text'), (PcmCache.SUFFIX, 'decoded PCM'))
+    # Orphans listed in a report (totals always cover all of them)
+    REPORT_LIMIT = 100
+
+    def __init__(self, db_manager, grace_seconds=24 * 3600, max_entries=2000,
+                 max_bytes=512 * 1024 * 1024, work_dirs=None):
+        self.db_manager = db_manager
+        self.grace_seconds = grace_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.work_dirs = list(dict.fromkeys(work_dirs or [os.getcwd()]))
+        self.lock = threading.Lock()
+        self.totals = {'passes': 0, 'filesDeleted': 0, 'bytesReclaimed': 0}
+        self.last_report = None
+        self._pending = None  # candidates of the incremental pass in progress
+
+    def _candidates(self):
+        """Yield (category, path) for everything the collector inspects"""
+        for root, _, files in os.walk("uploads"):
+            for name in files:
+                yield 'uploads', Path(root) / name
+        if os.path.isdir("exports"):
+            for entry in os.scandir("exports"):
+                if entry.is_dir():
+                    yield 'exports', Path(entry.path)
+        for work_dir in self.work_dirs:
+            if os.path.isdir(work_dir):
+                for entry in os.scandir(work_dir):
+                    if entry.is_file() and self.WORK_FILE_PATTERN.match(entry.name):
+                        yield 'whisper_output', Path(entry.path)
+        for entry in os.scandir(tempfile.gettempdir()):
+            if entry.is_file() and entry.name.startswith(TEMP_AUDIO_PREFIXES):
+                yield 'temp_audio', Path(entry.path)
+            elif entry.is_dir() and entry.name.startswith(WHISPER_OUTPUT_DIR_PREFIX):
+                # Left by a pass the server did not live to clean up
+                yield 'whisper_output', Path(entry.path)
+
+    def _orphan_reason(self, cursor, category, path):
+        """Why `path` is garbage, or None if it is still in use"""
+        if category == 'uploads':
+            if path.name.endswith('.part'):
+                return 'interrupted upload'
+            companion = next((c for c in self.COMPANIONS if path.name.endswith(c[0])), None)
+            if companion:
+                # Companion of an upload: referenced if any audio with its stem is
+                suffix, kind = companion
+                prefix = str(path)[:-len(suffix)] + '.'
+                cursor.execute('''
+                    SELECT EXISTS (SELECT 1 FROM audio_files WHERE file_path >= ? AND file_path < ?)
+                        OR EXISTS (SELECT 1 FROM projects WHERE audio_file_path >= ? AND audio_file_path < ?)
+                ''', (prefix, prefix[:-1] + '/', prefix, prefix[:-1] + '/'))
+                return None if cursor.fetchone()[0] else f'{kind} of deleted audio'
+            return None if self.db_manager._audio_referenced(cursor, str(path)) else 'unreferenced audio'
+        if category == 'exports':
+            cursor.execute('SELECT 1 FROM projects WHERE id = ?', (path.name,))
+            return None if cursor.fetchone() else 'exports of deleted project'
+        return 'leftover Whisper output' if category == 'whisper_output' else 'leftover temp audio'
+
+    @staticmethod
+    def _size(path):
+        """(bytes, files) of a file or directory tree"""
+        if not path.is_dir():
+            return path.stat().st_size, 1
+        total, count = 0, 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                total += os.path.getsize(os.path.join(root, name))
+                count += 1
+        return total, count
+
+    def _collect(self, cursor, category, path, cutoff, dry_run):
+        """Delete `path` if it is an orphan past the grace period: (reason, bytes, files) or None"""
+        if path.stat().st_mtime > cutoff:
+            return None
+        # Uploads can be re-referenced by a deduplicated upload; decide and
+        # delete under the write lock that save_audio_file publishes under
+        locked = category == 'uploads' and not dry_run
+        if locked:
+            cursor.execute('BEGIN IMMEDIATE')
+        try:
+            reason = self._orphan_reason(cursor, category, path)
+            if not reason:
+                return None
+            size, files = self._size(path)
+            if not dry_run:
+                if path.is_dir():
+                    shutil.rmtree(path)
+                else:
+                    path.unlink()
+            return reason, size, files
+        finally:
+            if locked:
+                cursor.connection.commit()
+    
+    def run(self, dry_run=False, full_pass=False):
+        """Examine candidates and delete orphans past the grace period.
+
+        Background runs continue the pending incremental pass within the
+        budget. Dry runs and full passes walk everything on their own. In
+        dry-run mode nothing is deleted; the report lists what would be.
+        """
+        with self.lock:
+            if dry_run or full_pass:
+                candidates = self._candidates()
+            else:
+                if self._pending is None:
+                    self._pending = self._candidates()
+                candidates = self._pending
+            
+            report = {'dryRun': dry_run, 'complete': False, 'examined': 0, 'filesDeleted': 0,
+                      'bytesReclaimed': 0, 'byCategory': {}, 'orphans': []}
+            cutoff = time.time() - self.grace_seconds
+            conn = sqlite3.connect(self.db_manager.db_path, timeout=30)
+            cursor = conn.cursor()
+            try:
+                for category, path in candidates:
+                    report['examined'] += 1
+                    try:
+                        orphan = self._collect(cursor, category, path, cutoff, dry_run)
+                    except OSError:
+                        orphan = None  # vanished or unreadable meanwhile
+                    
+                    if orphan:
+                        reason, size, files = orphan
+                        report['examined'] += max(files - 1, 0)
+                        report['filesDeleted'] += files
+                        report['bytesReclaimed'] += size
+                        stats = report['byCategory'].setdefault(category, {'files': 0, 'bytes': 0})
+                        stats['files'] += files
+                        stats['bytes'] += size
+                        if len(report['orphans']) < self.REPORT_LIMIT:
+                            report['orphans'].append({'path': str(path), 'bytes': size, 'reason': reason})
+                    
+                    if not (dry_run or full_pass) and (report['examined'] >= self.max_entries
+                                                      or report['bytesReclaimed'] >= self.max_bytes):
+                        break
+                else:
+                    report['complete'] = True
+                    if not (dry_run or full_pass):
+                        self._pending = None
+            finally:
+                conn.close()
+            
+            if not dry_run:
+                self.totals['filesDeleted'] += report['filesDeleted']
+                self.totals['bytesReclaimed'] += report['bytesReclaimed']
+                if report['complete']:
+                    self.totals['passes'] += 1
+            self.last_report = {key: value for key, value in report.items() if key != 'orphans'}
+            return report
+
+    def start(self, interval_seconds=300):
+        """Run incrementally in a background thread"""
+        def loop():
+            while True:
+                time.sleep(interval_seconds)
+                try:
+                    report = self.run()
+                    if report['filesDeleted']:
+                        print(f"🧹 Storage GC removed {report['filesDeleted']} orphaned files "
+                              f"({report['bytesReclaimed'] / 1e6:.1f}MB)")
+                except Exception as e:
+                    print(f"⚠️ Storage GC run failed: {e}")
+        threading.Thread(target=loop, name='storage-gc', daemon=True).start()
+
+    def status(self):
+        """Configuration, totals since start and the last run's summary"""
+        return {
+            'graceSeconds': self.grace_seconds,
+            'budget': {'maxEntries': self.max_entries, 'maxBytes': self.max_bytes},
+            'workDirs': self.work_dirs,
+            'totals': dict(self.totals),
+            'lastRun': self.last_report
+        }
+
+class TranscriptionQueue:
+    """Transcription jobs run in the background by a fixed pool of workers.
+
+    Bulk ingest submits here instead of making a request per file, so the
+    number of workers (with the resource manager's core split and the
+    short-job batcher underneath) sets the throughput. `make_handler()`
+    returns a handler to run each job with (PALAScribeHandler.background).
+    """
+
+    def __init__(self, make_handler, workers=2):
+        self.make_handler = make_handler
+        self.workers = workers
+        self.jobs = queue.Queue()
+        # Project of each waiting job by submission token; cancel drops the
+        # tokens and workers skip queued items whose token is gone
+        self.waiting = {}
+        self.running = set()
+        self.totals = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'cancelled': 0}
+        self.lock = threading.Lock()
+
+    def submit(self, project_id, **options):
+        """Queue a transcription of the project's audio (execute_whisper_command options)"""
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.totals['submitted'] += 1
+            self.waiting[token] = project_id
+        self.jobs.put((token, project_id, options))
+
+    def cancel(self, project_id):
+        """Drop the project's jobs that have not started; returns how many"""
+        with self.lock:
+            tokens = [token for token, waiting_project in self.waiting.items() if waiting_project == project_id]
+            for token in tokens:
+                del self.waiting[token]
+            self.totals['cancelled'] += len(tokens)
+        return len(tokens)
+
+    def start(self):
+        """Start the worker threads"""
+        def work():
+            while True:
+                token, project_id, options = self.jobs.get()
+                with self.lock:
+                    cancelled = self.waiting.pop(token, None) is None
+                    if not cancelled:
+                        self.running.add(project_id)
+                if cancelled:
+                    self.jobs.task_done()
+                    continue
+                try:
+                    result = self.make_handler().run_transcription_job(project_id, **options)
+                except Exception as e:
+                    print(f"❌ Queued transcription of {project_id} failed: {e}")
+                    result = {'success': False}
+                finally:
+                    self.jobs.task_done()
+                with self.lock:
+                    self.running.discard(project_id)
+                    self.totals['succeeded' if result.get('success') else 'failed'] += 1
+        for i in range(self.workers):
+            threading.Thread(target=work, name=f'transcription-worker-{i}', daemon=True).start()
+
+    def status(self):
+        with self.lock:
+            return {'workers': self.workers, 'queued': len(self.waiting), 'running': sorted(self.running),
+                    'totals': dict(self.totals)}
+
+class HotFolderWatcher:
+    """Turns audio dropped into a folder into queued transcription projects.
+
+    The folder (and its subfolders) is polled: a file is taken once its
+    size and mtime have not changed for `settle_seconds`, so copies still
+    in progress are left alone. Each file becomes a project named after it,
+    its audio is moved into the store (or hard-linked, with move=False) and
+    a transcription is submitted to the queue. Linked files stay in the
+    folder and are recognised by their source_path and content on later scans.
+    """
+
+    AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac', '.ogg')
+
+    def __init__(self, db_manager, transcription_queue, folder, move=True, settle_seconds=10,
+                 assigned_to="Hot folder", job_options=None):
+        self.db_manager = db_manager
+        self.transcription_queue = transcription_queue
+        self.folder = Path(folder).resolve()
+        self.move = move
+        self.settle_seconds = settle_seconds
+        self.assigned_to = assigned_to
+        self.job_options = job_options or {}
+        self.seen = {}
+        self.done = set()
+        self.totals = {'ingested': 0, 'failed': 0}
+
+    def scan(self):
+        """Ingest every settled audio file; returns the project ids created"""
+        now = time.time()
+        present, created = set(), []
+        for root, dirs, files in os.walk(self.folder):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                path = Path(root) / name
+                if name.startswith('.') or path.suffix.lower() not in self.AUDIO_EXTENSIONS or path in self.done:
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                present.add(path)
+                signature = (stat.st_size, stat.st_mtime)
+                previous = self.seen.get(path)
+                if not previous or previous[0] != signature:
+                    self.seen[path] = (signature, now)
+                elif now - previous[1] >= self.settle_seconds:
+                    project_id = self.ingest(path)
+                    if project_id:
+                        created.append(project_id)
+        # Forget files that went away before settling
+        for path in set(self.seen) - present:
+            del self.seen[path]
+        return created
+
+    def ingest(self, path):
+        """Project, stored audio and queued job for one file"""
+        self.seen.pop(path, None)
+        self.done.add(path)
+        # Moved files leave the folder, so anything found there again is new;
+        # linked files stay, and are skipped unless their content changed
+        if not self.move and self.db_manager.audio_source_ingested(path, audio_content_hash(path)):
+            print(f"ℹ️ Skipping {path.relative_to(self.folder)}: already ingested")
+            return None
+        project = None
+        try:
+            project = self.db_manager.create_project(path.stem, self.assigned_to)
+            self.db_manager.save_audio_from_path(project['id'], path, move=self.move)
+            self.transcription_queue.submit(project['id'], **self.job_options)
+            if self.move:
+                # The name is free again for the next file dropped there
+                self.done.discard(path)
+            self.totals['ingested'] += 1
+            print(f"📥 Ingested {path.relative_to(self.folder)} as project {project['name']}")
+            return project['id']
+        except Exception as e:
+            # Retried once the file has settled again
+            if project:
+                self.db_manager.delete_project(project['id'])
+            self.done.discard(path)
+            self.seen[path] = (None, time.time())
+            self.totals['failed'] += 1
+            print(f"⚠️ Could not ingest {path}: {e}")
+            return None
+
+    def start(self, interval_seconds=5):
+        """Poll the folder in a background thread"""
+        def loop():
+            while True:
+                try:
+                    self.scan()
+                except Exception as e:
+                    print(f"⚠️ Hot folder scan failed: {e}")
+                time.sleep(interval_seconds)
+        threading.Thread(target=loop, name='hot-folder', daemon=True).start()
+
+class RemoteJobQueue:
+    """TranscriptionQueue stand-in that leaves jobs to remote workers (see RemoteWorker)"""
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def submit(self, project_id, model="medium", language="English", **options):
+        # A worker runs one plain Whisper pass; refuse what it would silently skip
+        unsupported = sorted(name for name, value in options.items() if value not in (None, False))
+        if unsupported:
+            raise ValueError(f"Remote workers do not support {', '.join(unsupported)}")
+        job = self.db_manager.enqueue_job(project_id, {'model': model, 'language': language})
+        self.db_manager.update_project(project_id, {'status': 'queued'})
+        return job
+
+class RemoteWorker:
+    """Pull-based worker transcribing jobs of a PALAScribe server on another host.
+
+    It leases a job (POST /workers/lease), downloads the audio in ranges,
+    keeps the lease alive with heartbeats from a background thread while
+    Whisper runs, and posts the raw text and segments back; the server does
+    the post-processing. `transcribe(audio_path, options)` returns
+    {'text', 'segments'}; by default Whisper runs here through
+    run_whisper_pass, with this machine's cores split by a ResourceManager.
+    """
+
+    def __init__(self, server_url, worker_id=None, transcribe=None, lease_seconds=120, poll_seconds=10,
+                 chunk_bytes=8 * 1024 * 1024):
+        self.server_url = server_url.rstrip('/')
+        self.worker_id = worker_id or f"{os.uname().nodename if hasattr(os, 'uname') else 'worker'}-{os.getpid()}"
+        self.transcribe = transcribe or self.transcribe_locally
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.chunk_bytes = chunk_bytes
+        self.handler = None
+
+    def request(self, method, path, payload=None, headers=None):
+        """(status, body bytes) of a request to the server"""
+        import urllib.request
+        import urllib.error
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(self.server_url + path, data=data, method=method,
+                                     headers=dict({'Content-Type': 'application/json'}, **(headers or {})))
+        try:
+            with urllib.request.urlopen(req, timeout=60) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def download(self, job, destination):
+        """Fetch the job's audio in chunk_bytes ranges, resuming after a dropped connection"""
+        size = job['audio']['bytes']
+        with open(destination, 'wb') as f:
+            while f.tell() < size:
+                start = f.tell()
+                end = min(start + self.chunk_bytes, size) - 1
+                status, body = self.request('GET', job['audio']['url'], headers={
+                    'X-Lease-Token': job['leaseToken'], 'Range': f"bytes={start}-{end}"})
+                if status not in (200, 206) or not body:
+                    raise RuntimeError(f"audio download failed with HTTP {status}")
+                # A server ignoring Range sends everything from byte 0
+                f.write(body if status == 206 else body[start:])
+
+    def transcribe_locally(self, audio_path, options):
+        if self.handler is None:
+            self.handler = PALAScribeHandler.background(resource_manager=ResourceManager())
+        run = self.handler.run_whisper_pass(audio_path, None, options.get('model', 'medium'),
+                                            options.get('language', 'English'))
+        if 'error' in run:
+            raise RuntimeError(run['error'])
+        whisper_result = run['result']
+        if whisper_result is None:
+            raise RuntimeError(f"Whisper produced no output (exit {run['returncode']}): {(run['stderr'] or '')[-500:]}")
+        return {'text': (whisper_result.get('text') or '').strip(), 'segments': whisper_segments(whisper_result),
+                'log': run['stdout'] + run['stderr']}
+
+    def run_once(self):
+        """Lease and finish one job; False when the server had none"""
+        status, body = self.request('POST', '/workers/lease',
+                                    {'workerId': self.worker_id, 'leaseSeconds': self.lease_seconds})
+        if status == 204:
+            return False
+        if status != 200:
+            raise RuntimeError(f"lease failed with HTTP {status}: {body[:200]!r}")
+        job = json.loads(body)
+        token = job['leaseToken']
+        progress = {'stage': 'downloading'}
+        stop = threading.Event()
+        def heartbeat():
+            while not stop.wait(self.lease_seconds / 3):
+                status, _ = self.request('POST', f"/workers/jobs/{job['jobId']}/heartbeat",
+                                         {'leaseToken': token, 'leaseSeconds': self.lease_seconds, 'progress': progress})
+                if status == 409:
+                    print(f"⚠️ Lost the lease on job {job['jobId']}; its result will be refused")
+                    return
+        threading.Thread(target=heartbeat, name=f"heartbeat-{job['jobId']}", daemon=True).start()
+        fd, audio_path = tempfile.mkstemp(prefix=JOB_FILE_PREFIX, suffix=Path(job['audio']['name']).suffix)
+        os.close(fd)
+        started = time.time()
+        try:
+            print(f"🛠️ Worker {self.worker_id} took job {job['jobId']} ({job['audio']['bytes'] / 1e6:.1f}MB)")
+            self.download(job, audio_path)
+            progress.update(stage='transcribing', downloadSeconds=round(time.time() - started, 1))
+            output = self.transcribe(audio_path, job['options'])
+            result = {'leaseToken': token, 'success': True, 'text': output['text'], 'segments': output['segments'],
+                      'processingTime': time.time() - started, 'log': output.get('log')}
+        except Exception as e:
+            print(f"❌ Job {job['jobId']} failed on this worker: {e}")
+            result = {'leaseToken': token, 'success': False, 'error': str(e)}
+        finally:
+            stop.set()
+            try:
+                os.unlink(audio_path)
+            except OSError:
+                pass
+        status, _ = self.request('POST', f"/workers/jobs/{job['jobId']}/result", result)
+        if status != 200:
+            print(f"⚠️ Server refused the result of job {job['jobId']} (HTTP {status})")
+        return True
+
+    def run_forever(self):
+        print(f"🛠️ Worker {self.worker_id} pulling jobs from {self.server_url}")
+        while True:
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                print(f"⚠️ Worker error: {e}")
+            time.sleep(self.poll_seconds)
 
 class PALAScribeHandler(BaseHTTPRequestHandler):
     """HTTP request handler for PALAScribe API"""
     
-    def __init__(self, *args, db_manager=None, **kwargs):
+    # Client (camelCase) field names accepted on updates -> DB columns
+    CLIENT_FIELD_MAPPING = {
+        'assignedTo': 'assigned_to',
+        'startDate': 'start_date',
+        'endDate': 'end_date',
+        'audioFileName': 'audio_file_name',
+        'audioFilePath': 'audio_file_path',
+        'formattedText': 'formatted_text',
+        'editedText': 'edited_text',
+        'richContent': 'rich_content',
+        'wordCount': 'word_count',
+        'processingTime': 'processing_time',
+        'isPreview': 'is_preview',
+        'errorMessage': 'error_message'
+    }
+    # VAD only pays off (its copy of the speech included) above this much silence
+    VAD_MIN_SKIP = 0.05
+    
+    def __init__(self, *args, db_manager=None, storage_gc=None, pcm_cache=None, whisper_engine=None,
+                 resource_manager=None, whisper_batcher=None, transcription_queue=None, archive_pdfs=False, **kwargs):
         self.db_manager = db_manager
+        self.storage_gc = storage_gc
+        self.pcm_cache = pcm_cache
+        self.whisper_engine = whisper_engine
+        self.resource_manager = resource_manager
+        self.whisper_batcher = whisper_batcher
+        self.transcription_queue = transcription_queue
+        self.archive_pdfs = archive_pdfs
         super().__init__(*args, **kwargs)
     
+    @classmethod
+    def background(cls, **components):
+        """A handler with no request, for running queued jobs with the server's components"""
+        handler = cls.__new__(cls)
+        for name in ('db_manager', 'storage_gc', 'pcm_cache', 'whisper_engine', 'resource_manager', 'whisper_batcher',
+                     'transcription_queue', 'archive_pdfs'):
+            setattr(handler, name, components.get(name))
+        return handler
+    
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, PATCH, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization, If-None-Match, If-Match')
         self.send_header('Access-Control-Max-Age', '86400')
         self.end_headers()
     
@@ -936,14 +3367,39 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             self.handle_health_check()
         elif self.path == '/api/dictionary':
             self.handle_get_dictionary()
-        elif self.path == '/projects':
-            self.handle_get_projects()
+        elif urllib.parse.urlsplit(self.path).path == '/projects':
+            self.handle_get_projects(urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query))
+        elif self.path == '/admin/gc':
+            self.send_json_response(self.storage_gc.status())
+        elif urllib.parse.urlsplit(self.path).path == '/search':
+            self.handle_search(urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query))
+        elif self.path.startswith('/projects/') and urllib.parse.urlsplit(self.path).path.endswith('/segments'):
+            parsed = urllib.parse.urlsplit(self.path)
+            project_id = parsed.path.split('/')[-2]
+            self.handle_get_segments(project_id, urllib.parse.parse_qs(parsed.query))
+        elif self.path.startswith('/projects/') and urllib.parse.urlsplit(self.path).path.endswith('/export'):
+            parsed = urllib.parse.urlsplit(self.path)
+            project_id = parsed.path.split('/')[-2]
+            self.handle_export_project(project_id, urllib.parse.parse_qs(parsed.query))
+        elif self.path.startswith('/projects/') and self.path.endswith('/history'):
+            project_id = self.path.split('/')[-2]
+            self.handle_get_history(project_id)
+        elif self.path.startswith('/projects/') and self.path.split('/')[-2] == 'versions':
+            project_id = self.path.split('/')[-3]
+            self.handle_get_version(project_id, self.path.split('/')[-1])
         elif self.path.startswith('/projects/'):
             project_id = self.path.split('/')[-1]
             self.handle_get_project(project_id)
         elif self.path.startswith('/audio/'):
             filename = self.path.split('/')[-1]
             self.handle_get_audio(filename)
+        elif self.path.startswith('/workers/jobs/') and self.path.endswith('/audio'):
+            self.handle_worker_audio(self.path.split('/')[-2])
+        elif self.path.startswith('/jobs/') and urllib.parse.urlsplit(self.path).path.endswith('/log'):
+            parsed = urllib.parse.urlsplit(self.path)
+            self.handle_get_job_log(parsed.path.split('/')[-2], urllib.parse.parse_qs(parsed.query))
+        elif self.path.startswith('/workers/jobs/'):
+            self.handle_get_job(self.path.split('/')[-1])
         else:
             # Handle static file serving
             self.handle_static_file()
@@ -1002,7 +3458,9 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
     
     def do_POST(self):
         """Handle POST requests"""
-        if self.path == '/process':
+        if urllib.parse.urlsplit(self.path).path == '/admin/gc':
+            self.handle_run_gc(urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query))
+        elif self.path == '/process':
             self.handle_audio_processing()  # Original Whisper processing
         elif self.path == '/projects':
             self.handle_create_project()
@@ -1015,6 +3473,12 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
         elif self.path.startswith('/projects/') and self.path.endswith('/cancel'):
             project_id = self.path.split('/')[-2]
             self.handle_cancel_transcription(project_id)
+        elif self.path == '/workers/lease':
+            self.handle_worker_lease()
+        elif self.path.startswith('/workers/jobs/') and self.path.endswith('/heartbeat'):
+            self.handle_worker_heartbeat(self.path.split('/')[-2])
+        elif self.path.startswith('/workers/jobs/') and self.path.endswith('/result'):
+            self.handle_worker_result(self.path.split('/')[-2])
         else:
             self.send_error(404, "Not Found")
     
@@ -1026,6 +3490,14 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
         else:
             self.send_error(404, "Not Found")
     
+    def do_PATCH(self):
+        """Handle PATCH requests"""
+        if self.path.startswith('/projects/'):
+            project_id = self.path.split('/')[-1]
+            self.handle_patch_project(project_id)
+        else:
+            self.send_error(404, "Not Found")
+    
     def do_DELETE(self):
         """Handle DELETE requests"""
         if self.path.startswith('/api/dictionary/'):
@@ -1096,14 +3568,47 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
         self.send_json_response({
             "status": "healthy",
             "service": "PALAScribe Multi-User Server",
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "workers": self.resource_manager.snapshot() if self.resource_manager else None
         })
     
-    def handle_get_projects(self):
-        """Get all projects"""
+    def handle_get_projects(self, query=None):
+        """Get projects, without their large text bodies unless ?fields=full.
+
+        With ?since=<syncToken> only projects changed after the token are
+        returned, plus the ids deleted since. Every response carries a
+        collection ETag so unchanged polls are answered with an empty 304.
+        """
         try:
-            projects = self.db_manager.get_all_projects()
-            self.send_json_response({"projects": projects})
+            query = query or {}
+            # Bodies are decompressed per project; a list only needs them on request
+            summary = query.get('fields', [''])[0] != 'full'
+            since = query.get('since', [''])[0]
+            if since:
+                try:
+                    since = datetime.fromisoformat(since).isoformat()
+                except ValueError:
+                    self.send_error_response(400, "'since' must be an ISO timestamp (the syncToken of a previous response)")
+                    return
+            
+            etag = self.db_manager.get_collection_etag()
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_header('Access-Control-Expose-Headers', 'ETag')
+                self.end_headers()
+                return
+            
+            if since:
+                projects, deleted, sync_token, full = self.db_manager.get_changes_since(since, include_text=not summary)
+                response = {"projects": projects, "deleted": deleted, "syncToken": sync_token, "full": full}
+            else:
+                # Token taken before the read so nothing written meanwhile is skipped
+                sync_token = (datetime.now() - timedelta(seconds=self.db_manager.SYNC_SETTLE_SECONDS)).isoformat()
+                projects = self.db_manager.get_all_projects(include_text=not summary)
+                response = {"projects": projects, "syncToken": sync_token}
+            self.send_json_response(response, headers={'ETag': etag, 'Access-Control-Expose-Headers': 'ETag'})
         except Exception as e:
             self.send_error_response(500, str(e))
     
@@ -1289,6 +3794,141 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             print(f"❌ Error getting project {project_id}: {e}")
             self.send_error_response(500, str(e))
     
+    def handle_search(self, query):
+        """Full-text search across all transcripts: GET /search?q=&limit="""
+        try:
+            q = (query.get('q') or [''])[0].strip()
+            if not q:
+                self.send_error_response(400, "Query parameter 'q' is required")
+                return
+            try:
+                limit = max(1, min(int((query.get('limit') or ['20'])[0]), 100))
+            except ValueError:
+                limit = 20
+            
+            start = time.perf_counter()
+            results = self.db_manager.search(q, limit=limit)
+            took_ms = (time.perf_counter() - start) * 1000
+            
+            self.send_json_response({'query': q, 'results': results, 'tookMs': round(took_ms, 2)})
+        except Exception as e:
+            print(f"❌ Search error: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_get_segments(self, project_id, query):
+        """Get timestamped segments, optionally only those overlapping ?from=&to= (seconds)"""
+        try:
+            try:
+                from_seconds = float(query['from'][0]) if query.get('from') else None
+                to_seconds = float(query['to'][0]) if query.get('to') else None
+            except ValueError:
+                self.send_error_response(400, "'from' and 'to' must be numbers of seconds")
+                return
+            
+            project = self.db_manager.get_project(project_id)
+            if not project:
+                self.send_error_response(404, "Project not found")
+                return
+            
+            segments = self.db_manager.get_segments(project_id, from_seconds, to_seconds)
+            self.send_json_response({
+                'projectId': project_id,
+                'version': project.get('version') or 0,
+                'segments': [{'start': seg['start'], 'end': seg['end'], 'text': seg['text'],
+                              'avgLogprob': seg.get('avg_logprob')} for seg in segments]
+            })
+        except Exception as e:
+            print(f"❌ Error getting segments for project {project_id}: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_get_history(self, project_id):
+        """List the edit history (revisions of the edited text) of a project"""
+        try:
+            project = self.db_manager.get_project(project_id)
+            if not project:
+                self.send_error_response(404, "Project not found")
+                return
+            self.send_json_response({
+                'projectId': project_id,
+                'version': project.get('version') or 0,
+                'revisions': self.db_manager.get_history(project_id)
+            })
+        except Exception as e:
+            print(f"❌ Error getting history for project {project_id}: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_get_version(self, project_id, version):
+        """Get the edited text of a project as of a past content version"""
+        try:
+            try:
+                version = int(version)
+            except ValueError:
+                self.send_error_response(400, "Version must be an integer")
+                return
+            
+            result = self.db_manager.get_text_at_version(project_id, version)
+            if result is None:
+                self.send_error_response(404, f"No edited text recorded at version {version}")
+                return
+            revision, text = result
+            self.send_json_response({
+                'projectId': project_id,
+                'version': version,
+                'revision': revision,
+                'editedText': text
+            })
+        except Exception as e:
+            print(f"❌ Error getting version {version} of project {project_id}: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_export_project(self, project_id, query):
+        """Serve a lazily built, cached export artifact (srt, vtt, json, txt or pdf)"""
+        try:
+            fmt = (query.get('format') or ['pdf'])[0].lower()
+            if fmt not in EXPORT_FORMATS:
+                self.send_error_response(400, f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+                return
+            if fmt == 'pdf' and not REPORTLAB_AVAILABLE:
+                self.send_error_response(503, "PDF export requires reportlab")
+                return
+
+            project = self.db_manager.get_project(project_id)
+            if not project:
+                self.send_error_response(404, "Project not found")
+                return
+
+            # Cheap revalidation: the ETag only depends on the content version
+            etag = f'"{project_id}-v{project.get("version") or 0}-{fmt}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                return
+
+            artifact_path, etag = get_or_build_export(self.db_manager, project, fmt)
+            if not artifact_path:
+                self.send_error_response(404, f"No content available for {fmt} export")
+                return
+
+            content_type, ext = EXPORT_FORMATS[fmt]
+            base = re.sub(r'[^A-Za-z0-9_.-]', '_', project.get('name') or project_id)
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(artifact_path.stat().st_size))
+            self.send_header('Content-Disposition', f'attachment; filename="{base}{ext}"')
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'private, no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Expose-Headers', 'ETag')
+            self.end_headers()
+            with open(artifact_path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile)
+
+        except Exception as e:
+            print(f"❌ Error exporting project {project_id}: {e}")
+            self.send_error_response(500, str(e))
+
     def handle_get_dictionary(self):
         """Get current dictionary mappings"""
         try:
@@ -1417,70 +4057,153 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             data = json.loads(post_data.decode('utf-8'))
             
             # Convert camelCase fields to snake_case for database
-            field_mapping = {
-                'assignedTo': 'assigned_to',
-                'startDate': 'start_date',
-                'endDate': 'end_date',
-                'audioFileName': 'audio_file_name',
-                'audioFilePath': 'audio_file_path',
-                'formattedText': 'formatted_text',
-                'editedText': 'edited_text',
-                'richContent': 'rich_content',
-                'wordCount': 'word_count',
-                'processingTime': 'processing_time',
-                'isPreview': 'is_preview',
-                'errorMessage': 'error_message'
-            }
-            
-            # Convert field names
             converted_data = {}
             for key, value in data.items():
                 # Use snake_case if conversion exists, otherwise keep original
-                db_key = field_mapping.get(key, key)
+                db_key = self.CLIENT_FIELD_MAPPING.get(key, key)
                 converted_data[db_key] = value
             
             print(f"🔄 Updating project {project_id} with fields: {list(converted_data.keys())}")
             
-            self.db_manager.update_project(project_id, converted_data)
+            try:
+                self.db_manager.update_project(project_id, converted_data, self.request_editor(data))
+            except sqlite3.IntegrityError:
+                self.send_error_response(409, f"A project named '{converted_data.get('name')}' already exists")
+                return
             
             # Return updated project
             project = self.db_manager.get_project(project_id)
             if project:
                 self.send_json_response(project)
-                # Trigger PDF regeneration when transcription or edited text changes,
-                # or when status transitions to 'ready'. Run in background.
-                try:
-                    should_regen = False
-                    if 'transcription' in converted_data or 'edited_text' in converted_data:
-                        should_regen = True
-                    if converted_data.get('status') == 'ready':
-                        should_regen = True
-
-                    if should_regen:
-                        # Determine transcription text to use
-                        transcription_text = converted_data.get('transcription') or converted_data.get('edited_text') or project.get('transcription') or project.get('editedText') or ''
-                        editor = None
-                        # Accept optional editor field from client (camelCase)
-                        if 'editedBy' in data:
-                            editor = data.get('editedBy')
-                        elif 'editor' in data:
-                            editor = data.get('editor')
-
-                        change_summary = data.get('changeSummary') or data.get('note') or None
-                        model = converted_data.get('processing_model') or None
-
-                        threading.Thread(
-                            target=regenerate_pdf_for_project,
-                            args=(self.db_manager, project_id, transcription_text, editor, change_summary, model),
-                            daemon=True
-                        ).start()
-                except Exception as e:
-                    print(f"⚠️ Failed to start background PDF regeneration: {e}")
+                self.schedule_pdf_regeneration(project_id, converted_data, data,
+                                               lambda: project.get('transcription') or project.get('editedText'))
             else:
                 self.send_error_response(404, "Project not found")
                 
         except Exception as e:
-            print(f"❌ Error updating project {project_id}: {e}")
+            print(f"❌ Error updating project {project_id}: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_patch_project(self, project_id):
+        """Partially update a project under optimistic concurrency.
+
+        Body: {"version": n, "fields": {...}, "edits": {"editedText": [{"start", "end", "text"}, ...]}}.
+        The expected content version may also be sent as If-Match. Text edits
+        are ranges against the text at that version. Replies with a compact
+        {"id", "version", "updated"} ack, or 409 with the current version.
+        """
+        try:
+            content_length = int(self.headers.get('Content-Length') or 0)
+            data = json.loads(self.rfile.read(content_length).decode('utf-8') or '{}')
+            
+            expected_version = data.get('version')
+            if expected_version is None and self.headers.get('If-Match'):
+                expected_version = self.headers['If-Match'].strip().strip('"')
+            try:
+                expected_version = int(expected_version)
+            except (TypeError, ValueError):
+                self.send_error_response(428, "PATCH requires the project 'version' (or an If-Match header)")
+                return
+            
+            fields = {self.CLIENT_FIELD_MAPPING.get(key, key): value for key, value in (data.get('fields') or {}).items()}
+            edits = {}
+            for key, kind_edits in (data.get('edits') or {}).items():
+                kind = self.CLIENT_FIELD_MAPPING.get(key, key)
+                if kind not in DatabaseManager.TEXT_KINDS or not isinstance(kind_edits, list):
+                    self.send_error_response(400, f"Cannot apply edits to '{key}'")
+                    return
+                edits[kind] = kind_edits
+            
+            try:
+                result = self.db_manager.patch_project(project_id, expected_version, fields, edits,
+                                                       self.request_editor(data))
+            except VersionConflictError as e:
+                self.send_json_response({
+                    "success": False,
+                    "error": "Project was changed by someone else; reload before saving",
+                    "version": e.current_version
+                }, status=409)
+                return
+            except ValueError as e:
+                self.send_error_response(400, str(e))
+                return
+            except sqlite3.IntegrityError:
+                self.send_error_response(409, f"A project named '{fields.get('name')}' already exists")
+                return
+            
+            if result is None:
+                self.send_error_response(404, "Project not found")
+                return
+            
+            version, updated = result
+            self.send_json_response({"success": True, "id": project_id, "version": version, "updated": updated},
+                                    headers={'ETag': f'"{version}"', 'Access-Control-Expose-Headers': 'ETag'})
+            
+            changed = dict(fields)
+            if edits:
+                texts = self.db_manager.get_project_texts(project_id, list(edits))
+                changed.update({kind: texts.get(kind, '') for kind in edits})
+            
+            def fallback_text():
+                texts = self.db_manager.get_project_texts(project_id, ['transcription', 'edited_text'])
+                return texts.get('transcription') or texts.get('edited_text')
+            self.schedule_pdf_regeneration(project_id, changed, data, fallback_text)
+        
+        except json.JSONDecodeError:
+            self.send_error_response(400, "Invalid JSON body")
+        except Exception as e:
+            print(f"❌ Error patching project {project_id}: {e}")
+            self.send_error_response(500, str(e))
+    
+    @staticmethod
+    def request_editor(data):
+        """Optional editor field from the client (camelCase)"""
+        if 'editedBy' in data:
+            return data.get('editedBy')
+        return data.get('editor')
+    
+    def schedule_pdf_regeneration(self, project_id, converted_data, data, fallback_text):
+        """Archive a versioned PDF in the background when transcription or edited text
+        changes, or when status transitions to 'ready'.
+
+        Only with --archive-pdfs: the current PDF is built on demand by
+        GET /projects/{id}/export?format=pdf and cached per version.
+        """
+        if not self.archive_pdfs:
+            return
+        try:
+            should_regen = False
+            if 'transcription' in converted_data or 'edited_text' in converted_data:
+                should_regen = True
+            if converted_data.get('status') == 'ready':
+                should_regen = True
+
+            if should_regen:
+                # Determine transcription text to use
+                transcription_text = converted_data.get('transcription') or converted_data.get('edited_text') or fallback_text() or ''
+                editor = self.request_editor(data)
+
+                change_summary = data.get('changeSummary') or data.get('note') or None
+                model = converted_data.get('processing_model') or None
+
+                threading.Thread(
+                    target=regenerate_pdf_for_project,
+                    args=(self.db_manager, project_id, transcription_text, editor, change_summary, model),
+                    daemon=True
+                ).start()
+        except Exception as e:
+            print(f"⚠️ Failed to start background PDF regeneration: {e}")
+    
+    def handle_run_gc(self, query):
+        """Run a full storage GC pass now; ?dryRun=1 only reports what would be reclaimed"""
+        try:
+            dry_run = (query.get('dryRun') or ['0'])[0].lower() in ('1', 'true', 'yes')
+            report = self.storage_gc.run(dry_run=dry_run, full_pass=True)
+            print(f"🧹 Storage GC {'dry run' if dry_run else 'pass'}: {report['filesDeleted']} files, "
+                  f"{report['bytesReclaimed'] / 1e6:.1f}MB")
+            self.send_json_response(report)
+        except Exception as e:
+            print(f"❌ Storage GC failed: {e}")
             self.send_error_response(500, str(e))
     
     def handle_delete_project(self, project_id):
@@ -1576,6 +4299,10 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             file_path = self.db_manager.save_audio_file(project_id, audio_data, filename, mime_type, source_path=source_path)
             print(f"✅ Audio file saved to: {file_path}")
             
+            # Decode for Whisper in the background, usually done before a preview starts
+            if self.pcm_cache and shutil.which('ffmpeg'):
+                threading.Thread(target=self.prewarm_pcm_cache, args=(file_path,), daemon=True).start()
+            
             # Update project status
             print(f"📝 Updating project {project_id} status to 'processing'")
             self.db_manager.update_project(project_id, {
@@ -1641,9 +4368,30 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             language = params.get('language', 'English')
             preview_mode = params.get('preview', False)
             preview_duration = params.get('previewDuration', 60)
+            preview_windows = int(params.get('previewWindows') or 0)
+            vad = bool(params.get('vad', False))
+            fast_model = (params.get('fastModel') or 'base') if params.get('cascade') else None
+            cascade_threshold = float(params.get('cascadeThreshold', -0.6))
+            precision = params.get('precision')
+            if precision not in (None, *WhisperEngine.PRECISIONS):
+                self.send_error_response(400, f"precision must be one of {', '.join(WhisperEngine.PRECISIONS)}")
+                return
+            
+            if params.get('remote'):
+                # Left for a remote worker to lease (POST /workers/lease)
+                try:
+                    job = RemoteJobQueue(self.db_manager).submit(
+                        project_id, model, language, preview=preview_mode, previewWindows=preview_windows, vad=vad,
+                        cascade=params.get('cascade'), precision=precision)
+                except ValueError as e:
+                    self.send_error_response(400, str(e))
+                    return
+                print(f"📮 Queued project {project_id} for remote workers (job {job['id']})")
+                self.send_json_response({'success': True, 'jobId': job['id'], 'status': job['status']}, status=202)
+                return
             
             print(f"🎙️ Starting transcription for project {project_id}")
-            print(f"🔧 Model: {model}, Language: {language}, Preview: {preview_mode}")
+            print(f"🔧 Model: {model}, Language: {language}, Preview: {preview_mode}, VAD: {vad}, Cascade: {fast_model or 'off'}")
             
             # Update project status
             self.db_manager.update_project(project_id, {'status': 'processing'})
@@ -1656,82 +4404,277 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                 language=language,
                 preview_mode=preview_mode,
                 preview_duration=preview_duration,
-                project_id=project_id
+                project_id=project_id,
+                vad=vad,
+                preview_windows=preview_windows,
+                fast_model=fast_model,
+                cascade_threshold=cascade_threshold,
+                precision=precision
             )
             
             # Update project with results
-            if result.get('success'):
-                # Check if the transcription was cancelled while we were processing
-                global active_transcriptions, transcription_lock
-                with transcription_lock:
-                    if project_id in active_transcriptions and active_transcriptions[project_id].get('cancelled'):
-                        print(f"🛑 Transcription was cancelled for project {project_id}, skipping result update")
-                        self.send_json_response({'success': False, 'error': 'Processing was cancelled'})
-                        return
-                
+            self.send_json_response(self.record_transcription_result(project_id, result))
+            
+        except Exception as e:
+            print(f"❌ Transcription error: {e}")
+            self.send_error_response(500, str(e))
+    
+    def record_transcription_result(self, project_id, result):
+        """Store a finished transcription (or its failure) on the project; returns the response to send"""
+        if result.get('success'):
+            # Check if the transcription was cancelled while we were processing
+            global active_transcriptions, transcription_lock
+            with transcription_lock:
+                if project_id in active_transcriptions and active_transcriptions[project_id].get('cancelled'):
+                    print(f"🛑 Transcription was cancelled for project {project_id}, skipping result update")
+                    return {'success': False, 'error': 'Processing was cancelled'}
+            
+            self.db_manager.update_project(project_id, {
+                'transcription': result.get('transcription', ''),
+                'formatted_text': result.get('formatted_text', ''),
+                'segments': result.get('segments') or [],
+                'word_count': result.get('word_count', 0),
+                'processing_time': result.get('processing_time', 0),
+                'status': 'Needs_Review'  # Set to ready for review status
+            })
+            print(f"✅ Transcription completed for project {project_id}")
+        else:
+            # For failed transcriptions, also check if it was cancelled
+            if result.get('error') == 'Processing was cancelled':
+                print(f"🛑 Transcription was cancelled for project {project_id}")
+            else:
                 self.db_manager.update_project(project_id, {
-                    'transcription': result.get('transcription', ''),
-                    'formatted_text': result.get('formatted_text', ''),
-                    'word_count': result.get('word_count', 0),
-                    'processing_time': result.get('processing_time', 0),
-                    'status': 'Needs_Review'  # Set to ready for review status
+                    'status': 'Error',  # Use consistent error status
+                    'error_message': result.get('error', 'Unknown error')
                 })
-                print(f"✅ Transcription completed for project {project_id}")
-            else:
-                # For failed transcriptions, also check if it was cancelled
-                if result.get('error') == 'Processing was cancelled':
-                    print(f"🛑 Transcription was cancelled for project {project_id}")
+                print(f"❌ Transcription failed for project {project_id}")
+        return result
+    
+    def run_transcription_job(self, project_id, **options):
+        """Transcribe a project's stored audio outside any request (queued jobs)"""
+        project = self.db_manager.get_project(project_id)
+        audio_file_path = project and project.get('audioFilePath')
+        if not audio_file_path:
+            print(f"⚠️ Queued project {project_id} has no audio; skipping")
+            return {'success': False, 'error': 'No audio file uploaded for this project'}
+        self.db_manager.update_project(project_id, {'status': 'processing'})
+        result = self.execute_whisper_command(audio_file_path, project_id=project_id, **options)
+        return self.record_transcription_result(project_id, result)
+    
+    # Remote worker protocol: a worker leases a queued job, fetches its audio
+    # (by range, with the lease token in X-Lease-Token), heartbeats to keep
+    # the lease and posts the raw text and segments. A lease not renewed in
+    # time is given to the next worker that asks.
+    
+    def read_json_body(self):
+        content_length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(content_length).decode('utf-8') or '{}')
+    
+    def handle_worker_lease(self):
+        """POST /workers/lease {"workerId", "leaseSeconds"} -> 200 with a job, or 204 when there is none"""
+        try:
+            data = self.read_json_body()
+            worker_id = data.get('workerId') or self.client_address[0]
+            lease_seconds = min(max(float(data.get('leaseSeconds', 60)), 5), 600)
+            job = self.db_manager.lease_job(worker_id, lease_seconds)
+            project = job and self.db_manager.get_project(job['project_id'])
+            audio_path = project and project.get('audioFilePath')
+            if job and not (audio_path and os.path.exists(audio_path)):
+                self.db_manager.finish_job(job['id'], job['lease_token'], False, 'Audio file missing')
+                self.record_transcription_result(job['project_id'], {'success': False, 'error': 'Audio file missing'})
+                job = None
+            if not job:
+                self.send_response(204)
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                return
+            self.db_manager.update_project(job['project_id'], {'status': 'processing'})
+            print(f"📤 Leased job {job['id']} (project {job['project_id']}) to worker {worker_id}")
+            self.send_json_response({
+                'jobId': job['id'],
+                'projectId': job['project_id'],
+                'leaseToken': job['lease_token'],
+                'leaseSeconds': lease_seconds,
+                'attempt': job['attempts'],
+                'options': job['options'],
+                'audio': {
+                    'url': f"/workers/jobs/{job['id']}/audio",
+                    'name': Path(audio_path).name,
+                    'bytes': os.path.getsize(audio_path)
+                }
+            })
+        except Exception as e:
+            print(f"❌ Worker lease error: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_worker_audio(self, job_id):
+        """GET /workers/jobs/{id}/audio, honouring a single `Range: bytes=a-b`"""
+        try:
+            job = self.db_manager.check_lease(job_id, self.headers.get('X-Lease-Token'))
+            if not job:
+                self.send_error_response(409, "No live lease on this job")
+                return
+            audio_path = self.db_manager.get_project(job['project_id'])['audioFilePath']
+            size = os.path.getsize(audio_path)
+            start, end = 0, size - 1
+            match = re.fullmatch(r'bytes=(\d*)-(\d*)', (self.headers.get('Range') or '').strip())
+            if match and (match.group(1) or match.group(2)):
+                if match.group(1):
+                    start = int(match.group(1))
+                    end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
                 else:
-                    self.db_manager.update_project(project_id, {
-                        'status': 'Error',  # Use consistent error status
-                        'error_message': result.get('error', 'Unknown error')
-                    })
-                    print(f"❌ Transcription failed for project {project_id}")
-            
-            self.send_json_response(result)
-            
+                    start = max(size - int(match.group(2)), 0)
+                if start > end:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f"bytes */{size}")
+                    self.end_headers()
+                    return
+            self.send_response(206 if match else 200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Content-Length', str(end - start + 1))
+            if match:
+                self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            with open(audio_path, 'rb') as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
         except Exception as e:
-            print(f"❌ Transcription error: {e}")
+            print(f"❌ Worker audio error: {e}")
+            self.send_error_response(500, str(e))
+    
+    def handle_worker_heartbeat(self, job_id):
+        """POST /workers/jobs/{id}/heartbeat {"leaseToken", "leaseSeconds", "progress"} renews the lease"""
+        try:
+            data = self.read_json_body()
+            lease_seconds = min(max(float(data.get('leaseSeconds', 60)), 5), 600)
+            expires = self.db_manager.heartbeat_job(job_id, data.get('leaseToken'), data.get('progress'), lease_seconds)
+            if expires is None:
+                self.send_error_response(409, "Lease lost; the job has been or will be given to another worker")
+                return
+            self.send_json_response({'success': True, 'leaseExpires': expires})
+        except Exception as e:
+            self.send_error_response(500, str(e))
+    
+    def handle_worker_result(self, job_id):
+        """POST /workers/jobs/{id}/result {"leaseToken", "success", "text", "segments", "processingTime", "error", "log"}.
+
+        Raw Whisper output is post-processed here as for a local run: Pali
+        corrections on the text and segments, then paragraph formatting.
+        """
+        try:
+            data = self.read_json_body()
+            job = self.db_manager.check_lease(job_id, data.get('leaseToken'))
+            if not job or not self.db_manager.finish_job(job_id, data['leaseToken'], bool(data.get('success')),
+                                                         data.get('error')):
+                self.send_error_response(409, "Lease lost; the result was not recorded")
+                return
+            if data.get('success'):
+                transcription = apply_pali_corrections((data.get('text') or '').strip())
+                segments = apply_pali_corrections_to_segments(data.get('segments') or [])
+                result = {
+                    'success': True,
+                    'transcription': transcription,
+                    'formatted_text': format_transcription_text(transcription),
+                    'segments': segments,
+                    'word_count': len(transcription.split()),
+                    'processing_time': data.get('processingTime', 0)
+                }
+            else:
+                result = {'success': False, 'error': data.get('error') or 'Remote worker failed'}
+            print(f"📥 Worker {job['worker_id']} finished job {job_id}: {'ok' if result['success'] else result['error']}")
+            if data.get('log') or data.get('error'):
+                write_job_log(job['project_id'], data.get('log') or data.get('error'), job_id)
+            self.send_json_response(self.record_transcription_result(job['project_id'], result))
+        except Exception as e:
+            print(f"❌ Worker result error: {e}")
             self.send_error_response(500, str(e))
     
+    def handle_get_job(self, job_id):
+        """GET /workers/jobs/{id}: status of a remote job (without its lease token)"""
+        job = self.db_manager.get_job(job_id)
+        if not job:
+            self.send_error_response(404, "Job not found")
+            return
+        job.pop('lease_token')
+        self.send_json_response(job)
+    
+    def handle_get_job_log(self, job_id, params):
+        """GET /jobs/{id}/log[?lines=N]: tail of the latest Whisper run's output.
+
+        A project id gives the log of its latest pass, a remote job id that job's own.
+        """
+        try:
+            lines = min(max(int(params.get('lines', ['200'])[0]), 1), 10000)
+        except ValueError:
+            self.send_error_response(400, "lines must be a number")
+            return
+        project, run_id = self.db_manager.get_project(job_id), None
+        if not project:
+            job = self.db_manager.get_job(job_id)
+            project = job and self.db_manager.get_project(job['project_id'])
+            run_id = job and job['id']
+        # Only ids found in the database become paths
+        path = latest_job_log(project['id'], run_id) if project else None
+        if not path:
+            self.send_error_response(404, "No log for this job")
+            return
+        body = read_log_tail(path, lines).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+    
     def handle_cancel_transcription(self, project_id):
-        """Cancel an active transcription"""
+        """Cancel a running transcription, and any still waiting in a queue"""
         try:
             print(f"🛑 Cancel request for project {project_id}")
             
             global active_transcriptions, transcription_lock
             
+            # Only bookkeeping under the lock; signalling happens outside it
             with transcription_lock:
-                if project_id in active_transcriptions:
-                    transcription_info = active_transcriptions[project_id]
-                    process = transcription_info.get('process')
-                    
-                    if process and process.poll() is None:  # Process is still running
-                        print(f"🛑 Terminating transcription process for project {project_id}")
-                        process.terminate()
-                        
-                        # Wait a bit for graceful termination
-                        try:
-                            process.wait(timeout=5)
-                        except subprocess.TimeoutExpired:
-                            print(f"🛑 Force killing transcription process for project {project_id}")
-                            process.kill()
-                    
-                    # Mark as cancelled and remove from active list
+                transcription_info = active_transcriptions.pop(project_id, None)
+                if transcription_info:
                     transcription_info['cancelled'] = True
-                    del active_transcriptions[project_id]
-                    
-                    # Update project status in database
-                    self.db_manager.update_project(project_id, {
-                        'status': 'new',
-                        'updated_at': datetime.now().isoformat()
-                    })
-                    
-                    print(f"✅ Successfully cancelled transcription for project {project_id}")
-                    self.send_json_response({'success': True, 'message': 'Transcription cancelled'})
-                else:
-                    print(f"ℹ️ No active transcription found for project {project_id}")
-                    self.send_json_response({'success': True, 'message': 'No active transcription to cancel'})
+            
+            queued = 0
+            if self.transcription_queue:
+                queued += self.transcription_queue.cancel(project_id)
+            queued += self.db_manager.cancel_jobs(project_id)
+            
+            if not transcription_info and not queued:
+                print(f"ℹ️ No active transcription found for project {project_id}")
+                self.send_json_response({'success': True, 'message': 'No active transcription to cancel'})
+                return
+            
+            if transcription_info:
+                process = transcription_info.get('process')
+                if process and process.poll() is None:  # Process is still running
+                    print(f"🛑 Terminating transcription process group for project {project_id}")
+                    terminate_process_group(process)
+                # Its cores go to the next pass now, not when the process has exited
+                if transcription_info.get('lease') and self.resource_manager:
+                    self.resource_manager.release(transcription_info['lease'])
+            
+            # Update project status in database
+            self.db_manager.update_project(project_id, {
+                'status': 'new',
+                'updated_at': datetime.now().isoformat()
+            })
+            
+            print(f"✅ Successfully cancelled transcription for project {project_id}"
+                  f"{f' ({queued} queued)' if queued else ''}")
+            self.send_json_response({'success': True, 'message': 'Transcription cancelled',
+                                     'running': bool(transcription_info), 'queued': queued})
                     
         except Exception as e:
             print(f"❌ Cancel transcription error: {e}")
@@ -1740,7 +4683,7 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
     def handle_get_audio(self, filename):
         """Serve audio files"""
         try:
-            file_path = Path("uploads") / filename
+            file_path = audio_blob_path(filename)
             if not file_path.exists():
                 self.send_error(404, "Audio file not found")
                 return
@@ -1812,6 +4755,7 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             language = "English"
             preview_mode = False
             preview_duration = 60
+            preview_windows = 0
             project_id = None
             
             # Parse form fields
@@ -1847,6 +4791,13 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                         except:
                             preview_duration = 60
                     
+                    elif b'name="previewWindows"' in part:
+                        windows_data = part.split(b'\r\n\r\n', 1)[1].split(b'\r\n--')[0]
+                        try:
+                            preview_windows = int(windows_data.decode('utf-8').strip())
+                        except ValueError:
+                            preview_windows = 0
+                    
                     elif b'name="projectId"' in part:
                         project_data = part.split(b'\r\n\r\n', 1)[1].split(b'\r\n--')[0]
                         project_id = project_data.decode('utf-8').strip()
@@ -1876,7 +4827,8 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                 model=model,
                 language=language,
                 preview_mode=preview_mode,
-                preview_duration=preview_duration
+                preview_duration=preview_duration,
+                preview_windows=preview_windows
             )
             
             # If we have a project ID, update the project with results
@@ -1885,6 +4837,7 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                     self.db_manager.update_project(project_id, {
                         'transcription': result.get('transcription', ''),
                         'formatted_text': result.get('formatted_text', ''),
+                        'segments': result.get('segments') or [],
                         'word_count': result.get('word_count', 0),
                         'processing_time': result.get('processing_time', 0),
                         'status': 'completed'
@@ -1917,27 +4870,133 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             traceback.print_exc()
             self.send_error_response(500, str(e))
 
-    def execute_whisper_command(self, audio_file_path, model="medium", language="English", preview_mode=False, preview_duration=60, project_id=None):
-        """Execute Whisper command and return results (adapted from whisper_server.py)"""
-        
-        # Determine project directory (configurable via env var)
-        project_dir = os.environ.get(
-            "AUDIO_TEXT_CONVERTER_DIR",
-            "/Users/vijayaraghavanvedantham/Documents/VRI Tech Projects/audio-text-converter",
-        )
-        if not os.path.exists(project_dir):
-            # Fall back to the directory containing this script
-            project_dir = os.path.dirname(os.path.abspath(__file__))
-        
+    def execute_whisper_command(self, audio_file_path, model="medium", language="English", preview_mode=False, preview_duration=60, project_id=None, vad=False, preview_windows=0, fast_model=None, cascade_threshold=-0.6, precision=None):
+        """Execute Whisper command and return results (adapted from whisper_server.py)
+
+        With fast_model set the run is a cascade: fast_model transcribes
+        everything, then `model` redoes only its low-confidence segments.
+        precision ('fp32' or 'int8') overrides the in-process engine's default.
+        """
+        global active_transcriptions, transcription_lock
+        # One tracking entry for the whole job, not per Whisper pass, so a
+        # cancel between passes (before the cascade's second) still stops it
+        job = {'process': None, 'start_time': time.time(), 'cancelled': False, 'lease': None}
+        if project_id:
+            with transcription_lock:
+                active_transcriptions[project_id] = job
+        try:
+            result = self._execute_whisper_command(audio_file_path, model, language, preview_mode, preview_duration,
+                                                   project_id, vad, preview_windows, fast_model, cascade_threshold,
+                                                   precision, job)
+        finally:
+            if project_id:
+                with transcription_lock:
+                    # Unless a newer run of the project took the slot
+                    if active_transcriptions.get(project_id) is job:
+                        del active_transcriptions[project_id]
+        if job['cancelled'] and result.get('success'):
+            print(f"🛑 Transcription was cancelled for project {project_id}")
+            return {'success': False, 'error': 'Processing was cancelled'}
+        return result
+
+    def _execute_whisper_command(self, audio_file_path, model, language, preview_mode, preview_duration, project_id,
+                                 vad, preview_windows, fast_model, cascade_threshold, precision, job):
         # Get file size for logging and time estimation
         file_size = os.path.getsize(audio_file_path)
         file_size_mb = file_size / (1024 * 1024)
         
-        # If preview mode is enabled, create a trimmed version of the audio
-        processed_audio_path = audio_file_path
-        if preview_mode:
+        # Stored uploads are decoded once to 16 kHz PCM and shared by every
+        # job on that audio; Whisper then has nothing left to resample
+        source_path = audio_file_path
+        if self.pcm_cache and self.pcm_cache.covers(audio_file_path) and shutil.which('ffmpeg'):
+            try:
+                source_path = str(self.pcm_cache.get(audio_file_path))
+            except Exception as e:
+                print(f"⚠️ Decoded audio cache unavailable, Whisper decodes the upload itself: {e}")
+        in_process = self.whisper_engine is not None and NUMPY_AVAILABLE and source_path != audio_file_path
+        # Previews are waited on; full runs can yield the CPU to them
+        priority = 'interactive' if preview_mode else 'background'
+        if precision and not in_process:
+            print(f"⚠️ {precision} weights need the in-process engine and decoded audio; the whisper CLI runs fp32")
+        
+        # A full run picks up after an earlier preview of the same audio
+        # with the same model and language (not for cascades, whose first
+        # pass is another model)
+        first_model = fast_model or model
+        audio_hash = None
+        try:
+            audio_hash = audio_content_hash(audio_file_path)
+        except OSError as e:
+            print(f"⚠️ Could not hash audio for preview reuse: {e}")
+        resume = None
+        if audio_hash and not preview_mode and not fast_model:
+            try:
+                resume = self.db_manager.get_preview_resume_point(audio_hash, model, language)
+            except Exception as e:
+                print(f"⚠️ Could not look up preview segments: {e}")
+        
+        # Whisper may get only some regions of the recording, back to back:
+        # windows spread across it (preview), its speech (VAD) or what
+        # follows a reused preview. Segment times are mapped back to the
+        # recording afterwards.
+        samples, regions, vad_report, windows = None, None, None, None
+        processed_audio_path = source_path
+        decoded = NUMPY_AVAILABLE and source_path != audio_file_path
+        if preview_mode and preview_windows > 1:
+            duration = self.pcm_cache.duration(audio_file_path) if decoded else probe_audio_duration(audio_file_path)
+            if duration and duration > preview_duration:
+                windows = plan_preview_windows(duration, preview_duration, preview_windows)
+                print(f"🔍 Preview mode enabled - {len(windows)} windows of "
+                      f"{windows[0][1] - windows[0][0]:.0f}s spread over {duration:.0f}s")
+                regions = windows
+                if vad and decoded:
+                    # Only the speech inside the windows is transcribed
+                    speech, vad_report = self.speech_regions(audio_file_path, windows)
+                    regions = speech or windows
+                elif vad:
+                    print("⚠️ VAD needs numpy and decoded audio (ffmpeg); previewing the whole windows")
+                if not decoded:
+                    processed_audio_path = self.extract_audio_windows(audio_file_path, windows) or source_path
+                    if processed_audio_path == source_path:
+                        print("⚠️ Warning: Preview windows could not be extracted, previewing the beginning")
+                        windows = regions = None
+        else:
+            offset = resume['seconds'] if resume else 0
+            if vad:
+                # Optional VAD pre-pass: only the speech regions are transcribed
+                if decoded:
+                    regions, vad_report = self.speech_regions(
+                        audio_file_path, [(offset, offset + preview_duration if preview_mode else None)])
+                else:
+                    print("⚠️ VAD needs numpy and decoded audio (ffmpeg); transcribing everything")
+            if resume and not regions:
+                # The rest of the recording after the reused preview
+                if decoded:
+                    regions = [(offset, self.pcm_cache.duration(audio_file_path))]
+                else:
+                    duration = probe_audio_duration(audio_file_path)
+                    processed_audio_path = (duration and self.extract_audio_windows(audio_file_path, [(offset, duration)])
+                                            or source_path)
+                    if processed_audio_path != source_path:
+                        regions = [(offset, duration)]
+                    else:
+                        print("⚠️ Warning: Could not cut the audio after the preview; transcribing it all")
+                        resume = None
+            if resume:
+                print(f"♻️ Reusing {len(resume['segments'])} preview segments, transcribing from {offset:.1f}s")
+        
+        # Decoded regions go to the in-process engine as one array, and to the
+        # CLI streamed into a temp WAV; otherwise a preview is a trimmed copy
+        # (the in-process engine just reads fewer samples)
+        if regions and decoded and in_process:
+            samples = self.pcm_cache.extract(audio_file_path, regions)
+        elif regions and decoded:
+            processed_audio_path = self.pcm_cache.write_regions(
+                audio_file_path, regions, SPEECH_FILE_PREFIX if vad_report else PREVIEW_FILE_PREFIX)
+            file_size_mb = os.path.getsize(processed_audio_path) / (1024 * 1024)
+        elif preview_mode and not in_process and not regions:
             print(f"🔍 Preview mode enabled - processing only first {preview_duration} seconds")
-            processed_audio_path = self.trim_audio_file(audio_file_path, preview_duration)
+            processed_audio_path = self.trim_audio_file(source_path, preview_duration)
             if processed_audio_path:
                 # Update file size for the trimmed version
                 file_size = os.path.getsize(processed_audio_path)
@@ -1945,7 +5004,7 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                 print(f"✅ Audio trimmed to {file_size_mb:.1f}MB")
             else:
                 print("⚠️ Warning: Audio trimming failed, processing full file")
-                processed_audio_path = audio_file_path
+                processed_audio_path = source_path
         
         # Estimate processing time
         estimated_minutes = max(1, int(file_size_mb * 1.5))
@@ -1954,35 +5013,8 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
         
         mode_text = f" (Preview: {preview_duration}s)" if preview_mode else ""
         print(f"🎙️ Processing audio file: {os.path.basename(audio_file_path)} ({file_size_mb:.1f}MB){mode_text}")
-        print(f"🔧 Using model: {model}, language: {language}")
-        
-        # Locate whisper executable inside possible virtualenv locations
-        possible_whisper = [
-            os.path.join(project_dir, 'whisper-env', 'bin', 'whisper'),
-            os.path.join(project_dir, 'whisper-env', 'whisper-env', 'bin', 'whisper'),
-        ]
-        whisper_exec = None
-        for p in possible_whisper:
-            if os.path.exists(p):
-                whisper_exec = p
-                break
-
-        # Fallback to system `whisper` if no bundled executable is found
-        if not whisper_exec:
-            whisper_exec = 'whisper'
-
-        # Construct the Whisper command
-        command = [
-            whisper_exec,
-            processed_audio_path,
-            "--model", model,
-            "--output_format", "txt",
-            "--output_format", "srt",
-            "--language", language
-        ]
-        
-        print(f"🚀 Executing command: {' '.join(command)}")
-        start_time = time.time()
+        print(f"🔧 Using model: {model}, language: {language}" +
+              (f" (cascade from {fast_model} below avg_logprob {cascade_threshold})" if fast_model else ""))
         
         try:
             # Set timeout based on file size
@@ -1995,86 +5027,32 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             
             print(f"⏰ Setting timeout to {timeout_seconds} seconds")
             
-            # Use Popen for better process control and cancellation support
-            global active_transcriptions, transcription_lock
-            
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=project_dir
-            )
-            
-            # Track the process if project_id is provided
-            if project_id:
-                with transcription_lock:
-                    active_transcriptions[project_id] = {
-                        'process': process,
-                        'start_time': start_time,
-                        'cancelled': False
-                    }
-                    print(f"📝 Tracking transcription process for project {project_id}")
-            
-            # Wait for process completion with timeout
-            try:
-                stdout, stderr = process.communicate(timeout=timeout_seconds)
-            except subprocess.TimeoutExpired:
-                print(f"⏰ Process timed out after {timeout_seconds} seconds")
-                process.kill()
-                stdout, stderr = process.communicate()
-                
-                # Clean up tracking
-                if project_id and project_id in active_transcriptions:
-                    with transcription_lock:
-                        del active_transcriptions[project_id]
-                
-                return {
-                    'success': False,
-                    'error': f'Processing timed out after {timeout_seconds} seconds',
-                    'processing_time': time.time() - start_time
-                }
-            
-            end_time = time.time()
-            processing_time = end_time - start_time
-            
-            # Check if process was cancelled (return code -15 = SIGTERM)
-            if process.returncode == -15:
-                print(f"🛑 Process was terminated (SIGTERM) for project {project_id}")
-                # Clean up tracking if still exists
-                if project_id:
-                    with transcription_lock:
-                        if project_id in active_transcriptions:
-                            del active_transcriptions[project_id]
-                return {
-                    'success': False,
-                    'error': 'Processing was cancelled',
-                    'processing_time': processing_time
-                }
-            
-            # Check if process was cancelled via tracking
-            if project_id:
-                with transcription_lock:
-                    if project_id in active_transcriptions:
-                        if active_transcriptions[project_id].get('cancelled'):
-                            print(f"🛑 Process was cancelled for project {project_id}")
-                            del active_transcriptions[project_id]
-                            return {
-                                'success': False,
-                                'error': 'Processing was cancelled',
-                                'processing_time': processing_time
-                            }
-                        # Remove from tracking since it completed
-                        del active_transcriptions[project_id]
+            if in_process and samples is None:
+                samples = self.pcm_cache.load(audio_file_path, duration_seconds=preview_duration if preview_mode else None)
+            # Short audio can share a whisper run with other jobs
+            audio_seconds = None
+            if self.whisper_batcher and not in_process:
+                if regions:
+                    audio_seconds = sum(end - start for start, end in regions)
+                elif preview_mode:
+                    audio_seconds = preview_duration
+                else:
+                    audio_seconds = self.pcm_cache.duration(audio_file_path) if decoded else probe_audio_duration(audio_file_path)
+            run = self.run_whisper_pass(processed_audio_path, samples if in_process else None, first_model, language,
+                                        project_id, timeout_seconds, precision, priority, audio_seconds, job)
+            if 'error' in run:
+                return run
+            returncode, stdout, stderr = run['returncode'], run['stdout'], run['stderr']
+            processing_time = run['processing_time']
             
             print(f"✅ Whisper processing completed in {processing_time:.1f} seconds")
-            print(f"🔍 Command return code: {process.returncode}")
+            print(f"🔍 Command return code: {returncode}")
             
             # Enhanced debugging - capture and display stdout/stderr
             if stdout:
-                print(f"📤 Whisper stdout: {stdout[:500]}...")
+                print(f"📤 Whisper stdout: ...{stdout[-500:]}")
             if stderr:
-                print(f"📤 Whisper stderr: {stderr[:500]}...")
+                print(f"📤 Whisper stderr: ...{stderr[-500:]}")
             
             # Find and read the generated text file
             audio_name = Path(processed_audio_path).stem
@@ -2147,6 +5125,17 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             except Exception as e:
                 print(f"❌ Error searching for .txt files: {e}")
             
+            # Preferred: Whisper's JSON result carries text plus per-segment
+            # timestamps and confidence (avg_logprob, no_speech_prob)
+            segments = []
+            if run['result'] is not None:
+                transcription = (run['result'].get('text') or '').strip()
+                word_count = len(transcription.split())
+                segments = whisper_segments(run['result'])
+                print(f"✅ Using Whisper's JSON result ({len(segments)} segments)")
+            if transcription.strip():
+                possible_files = []
+            
             print(f"🔍 Checking possible transcription files: {possible_files}")
             
             for potential_file in possible_files:
@@ -2216,20 +5205,69 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                     else:
                         print(f"❌ SRT file not found: {srt_file}")
             
+            # Fall back to Whisper's SRT output for timestamped segments
+            for srt_file in ([] if segments else srt_files):
+                if os.path.exists(srt_file):
+                    try:
+                        with open(srt_file, 'r', encoding='utf-8') as f:
+                            segments = parse_srt_content(f.read())
+                        print(f"⏱️ Parsed {len(segments)} timestamped segments from {srt_file}")
+                        break
+                    except Exception as e:
+                        print(f"⚠️ Could not parse segments from {srt_file}: {e}")
+            
+            # Whisper saw only some regions; put segments back on the recording's timeline
+            if regions:
+                remap_to_regions(segments, regions)
+            
+            # Cascade: the large model redoes only what the fast one was unsure of
+            cascade_report = None
+            if fast_model and segments:
+                if job['cancelled']:
+                    return {"success": False, "error": "Processing was cancelled"}
+                cascade = self.escalate_segments(audio_file_path, segments, fast_model, model, language,
+                                                 cascade_threshold, project_id, timeout_seconds, precision, job)
+                if cascade is None:
+                    return {"success": False, "error": "Processing was cancelled"}
+                segments, cascade_report = cascade
+                cascade_report['fastSeconds'] = round(processing_time, 1)
+                processing_time += cascade_report['escalationSeconds']
+                transcription = ' '.join(seg['text'] for seg in segments)
+                word_count = len(transcription.split())
+                print(f"🎯 Cascade escalated {cascade_report['escalatedSegments']}/{cascade_report['segments']} segments "
+                      f"(~{cascade_report['estimatedComputeSaved']:.0%} less compute than {model} alone)")
+            
+            # Keep a plain preview for the full run, which splices its segments in
+            if preview_mode and not windows and not fast_model and audio_hash and segments:
+                try:
+                    self.db_manager.save_preview_result(audio_hash, model, language, float(preview_duration),
+                                                        [dict(seg) for seg in segments])
+                except Exception as e:
+                    print(f"⚠️ Could not keep preview segments: {e}")
+            if resume:
+                segments = resume['segments'] + segments
+                transcription = f"{resume['text']} {transcription.strip()}".strip()
+                word_count = len(transcription.split())
+            if regions and vad_report:
+                print(f"🔇 VAD skipped {vad_report['skippedFraction']:.0%} of the audio "
+                      f"(~{vad_report['estimatedSpeedup']:.1f}x less to transcribe)")
+
                 # Initialize formatted_text as fallback
             formatted_text = transcription
 
             if transcription.strip():
                 print(f"📝 Generated transcription: {word_count} words")
-                
+
                 # Apply Pali corrections
                 print("🔍 Applying Pali corrections...")
                 original_transcription = transcription
                 transcription = apply_pali_corrections(transcription)
-                
+
                 if transcription != original_transcription:
                     print("✅ Pali corrections were applied!")
                     word_count = len(transcription.split())
+
+                apply_pali_corrections_to_segments(segments)
                 
                 # Apply text formatting as post-processing
                 print("📄 Applying text formatting...")
@@ -2272,7 +5310,13 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
 
                 # Generate a PDF with a provenance first page and the transcription
                 try:
-                    pdf_path = Path(audio_file_path).with_suffix('.pdf')
+                    if project_id:
+                        # Kept with the project: deduplicated audio is shared by
+                        # every project that uploaded the same recording
+                        pdf_path = Path('exports') / project_id / 'transcription.pdf'
+                        pdf_path.parent.mkdir(parents=True, exist_ok=True)
+                    else:
+                        pdf_path = Path(audio_file_path).with_suffix('.pdf')
                     metadata = provenance_meta
 
                     generated = generate_pdf_with_provenance(str(pdf_path), metadata, transcription)
@@ -2294,13 +5338,9 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                             prov_txt_path = pdf_path.with_suffix('.txt')
                             ok_txt = write_provenance_header_text_file(str(prov_txt_path), metadata, transcription)
                             if ok_txt:
-                                # Read back the file and replace the in-memory
-                                # transcription so the API response includes the header
-                                try:
-                                    with open(prov_txt_path, 'r', encoding='utf-8') as pf:
-                                        transcription = pf.read()
-                                except Exception as re:
-                                    print(f"⚠️ Could not read written provenance text file: {re}")
+                                # The API response includes the header too; built here rather
+                                # than read back, as another run may rewrite a shared file first
+                                transcription = provenance_header_text(metadata, transcription)
                         except Exception as e:
                             print(f"⚠️ Could not write companion provenance text file: {e}")
 
@@ -2316,14 +5356,14 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             if not transcription.strip():
                 error_msg = "No transcription generated by Whisper."
                 print(f"❌ {error_msg}")
-                if process.returncode != 0:
-                    print(f"❌ Whisper command failed with return code: {process.returncode}")
+                if returncode != 0:
+                    print(f"❌ Whisper command failed with return code: {returncode}")
                     if stderr:
                         print(f"❌ Error details: {stderr}")
                 return {"success": False, "error": error_msg}
             
             # Clean up trimmed audio if it was created
-            if processed_audio_path != audio_file_path:
+            if processed_audio_path != source_path:
                 try:
                     os.unlink(processed_audio_path)
                     print("🗑️ Cleaned up trimmed audio file")
@@ -2333,12 +5373,22 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
                 "success": True,
                 "transcription": transcription,
                 "formatted_text": formatted_text,  # Now contains properly formatted text
+                "segments": segments,
                 "word_count": word_count,
                 "processing_time": processing_time,
                 "output_file": text_file,
                 "model": model,
                 "language": language,
-                "preview_mode": preview_mode
+                "precision": (precision or self.whisper_engine.precision) if in_process else 'fp32',
+                "preview_mode": preview_mode,
+                "preview_windows": windows and [{
+                    'start': start,
+                    'end': end,
+                    'text': ' '.join(seg['text'] for seg in segments if start <= seg['start'] < end)
+                } for start, end in windows],
+                "vad": vad_report,
+                "cascade": cascade_report,
+                "reused_preview": resume and {'seconds': resume['seconds'], 'segments': len(resume['segments'])}
             }
             
         except subprocess.TimeoutExpired:
@@ -2356,12 +5406,357 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             print(f"❌ {error_msg}")
             return {"success": False, "error": error_msg}
 
+    def run_whisper_pass(self, processed_audio_path, samples, model, language, project_id=None, timeout_seconds=14400,
+                         precision=None, priority='background', audio_seconds=None, job=None):
+        """Run Whisper once.
+
+        With samples the in-process engine transcribes them; otherwise the
+        whisper CLI runs on processed_audio_path, together with other short
+        audio (audio_seconds) when a batcher is configured. The pass gets its
+        share of the cores from the resource manager for as long as it runs.
+        Returns returncode, stdout, stderr, processing_time and result (the
+        Whisper JSON result, None if there is none), or a failed result when
+        the run timed out or was cancelled. `job` is the tracking
+        entry of the execute_whisper_command run the pass belongs to; without
+        it the pass registers its own.
+        """
+        batched = (samples is None and self.whisper_batcher is not None and priority in self.whisper_batcher.priorities
+                   and audio_seconds is not None and audio_seconds <= self.whisper_batcher.max_audio_seconds)
+        # A batch takes its lease when it starts, not per waiting job
+        lease = self.resource_manager.acquire(priority) if self.resource_manager and not batched else None
+        if lease:
+            print(f"🧮 {priority.capitalize()} pass gets {lease['threads']} threads (nice {lease['nice']})")
+        try:
+            return self._whisper_pass(processed_audio_path, samples, model, language, project_id,
+                                      timeout_seconds, precision, lease, priority if batched else None, job)
+        finally:
+            if lease:
+                self.resource_manager.release(lease)
+
+    def whisper_executable(self):
+        """The bundled virtualenv's whisper, else the one on PATH"""
+        project_dir = whisper_work_dir()
+        # Locate whisper executable inside possible virtualenv locations
+        possible_whisper = [
+            os.path.join(project_dir, 'whisper-env', 'bin', 'whisper'),
+            os.path.join(project_dir, 'whisper-env', 'whisper-env', 'bin', 'whisper'),
+        ]
+        for p in possible_whisper:
+            if os.path.exists(p):
+                return p
+        # Fallback to system `whisper` if no bundled executable is found
+        return 'whisper'
+
+    def run_whisper_batch(self, audio_paths, model, language, timeout_seconds, priority='background'):
+        """One whisper CLI process for several files; results maps each path to its JSON result.
+
+        Whisper skips a file it cannot transcribe and goes on with the rest,
+        so a job's success is decided by its own output file. The batch
+        writes into a directory of its own, as other runs may be working on
+        files with the same names.
+        """
+        start_time = time.time()
+        lease = self.resource_manager.acquire(priority) if self.resource_manager else None
+        output_dir = tempfile.mkdtemp(prefix=WHISPER_OUTPUT_DIR_PREFIX)
+        try:
+            command = [self.whisper_executable(), *audio_paths, "--model", model, "--output_format", "json",
+                       "--output_dir", output_dir, "--language", language]
+            if lease:
+                command = self.resource_manager.command(lease, command)
+            print(f"📦 Batching {len(audio_paths)} short files into one Whisper run: {' '.join(command)}")
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                       cwd=whisper_work_dir(), start_new_session=True,
+                                       env=self.resource_manager.environment(lease) if lease else None)
+            capture = OutputCapture().start(process)
+            try:
+                process.wait(timeout=timeout_seconds)
+            except subprocess.TimeoutExpired:
+                terminate_process_group(process, grace_seconds=0)
+                process.wait()
+                return {'error': f'Processing timed out after {timeout_seconds} seconds'}
+            finally:
+                capture.finish()
+            return {'returncode': process.returncode, 'stdout': capture.stdout, 'stderr': capture.stderr,
+                    'processing_time': time.time() - start_time,
+                    'results': {path: read_whisper_output(output_dir, path) for path in audio_paths}}
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+            if lease:
+                self.resource_manager.release(lease)
+
+    def _whisper_pass(self, processed_audio_path, samples, model, language, project_id, timeout_seconds,
+                      precision, lease, batch_priority=None, job=None):
+        project_dir = whisper_work_dir()
+        start_time = time.time()
+        global active_transcriptions, transcription_lock
+        # Cancelling marks this, kills the process (if any) and frees the lease
+        if job:
+            tracking = job
+            with transcription_lock:
+                tracking.update(process=None, lease=lease)
+                cancelled_early = tracking['cancelled']
+            if cancelled_early:
+                return {'success': False, 'error': 'Processing was cancelled', 'processing_time': 0.0}
+        else:
+            tracking = {'process': None, 'start_time': start_time, 'cancelled': False, 'lease': lease}
+            if project_id:
+                with transcription_lock:
+                    active_transcriptions[project_id] = tracking
+        
+        whisper_result = None
+        if samples is not None:
+            # Same result as the CLI's JSON output
+            print(f"🧠 Transcribing {len(samples) / PcmCache.SAMPLE_RATE:.0f}s of audio in-process with {model}")
+            stdout, stderr = '', ''
+            try:
+                whisper_result = self.whisper_engine.transcribe(samples, model=model, language=language,
+                                                                precision=precision,
+                                                                threads=lease and lease['threads'])
+                returncode = 0
+            except Exception as e:
+                stderr, returncode = str(e), 1
+                if project_id:
+                    write_job_log(project_id, stderr)
+        elif batch_priority:
+            # Cancelling marks the job; the shared process runs on for the others
+            batch_timeout = timeout_seconds
+            batch = self.whisper_batcher.submit(
+                (model, language, batch_priority), processed_audio_path,
+                lambda paths: self.run_whisper_batch(paths, model, language, min(batch_timeout * len(paths), 14400),
+                                                     batch_priority))
+            if 'error' in batch:
+                self._untrack_pass(project_id, tracking, job)
+                return {'success': False, 'error': batch['error'], 'processing_time': time.time() - start_time}
+            stdout, stderr, returncode = batch['stdout'], batch['stderr'], batch['returncode']
+            if project_id:
+                # The tail of the shared run's output, written for each of its jobs
+                write_job_log(project_id, stdout + ''.join(f"[stderr] {line}\n" for line in stderr.splitlines()))
+            whisper_result = batch['results'].get(processed_audio_path)
+            if whisper_result is None:
+                returncode = returncode or 1
+        else:
+            whisper_exec = self.whisper_executable()
+            # A directory of its own per pass: stored uploads are shared, so
+            # other passes may be transcribing a file with the same name
+            output_dir = tempfile.mkdtemp(prefix=WHISPER_OUTPUT_DIR_PREFIX)
+
+            # Construct the Whisper command
+            command = [
+                whisper_exec,
+                processed_audio_path,
+                "--model", model,
+                "--output_format", "json",
+                "--output_dir", output_dir,
+                "--language", language
+            ]
+            if lease:
+                command = self.resource_manager.command(lease, command)
+            print(f"🚀 Executing command: {' '.join(command)}")
+            
+            try:
+                # Use Popen for better process control and cancellation support; its own
+                # process group lets a cancel take down the ffmpeg children with it
+                process = subprocess.Popen(
+                    command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    cwd=project_dir,
+                    start_new_session=True,
+                    env=self.resource_manager.environment(lease) if lease else None
+                )
+                
+                # Track the process if project_id is provided
+                if project_id:
+                    with transcription_lock:
+                        tracking['process'] = process
+                        cancelled_early = tracking['cancelled']
+                    print(f"📝 Tracking transcription process for project {project_id}")
+                    if cancelled_early:
+                        # The cancel came in before there was a process to stop
+                        terminate_process_group(process)
+                
+                # Output streams into a bounded tail and the job log instead of piling up in memory
+                capture = OutputCapture(job_log_path(project_id) if project_id else None).start(process)
+                
+                # Wait for process completion with timeout
+                try:
+                    process.wait(timeout=timeout_seconds)
+                except subprocess.TimeoutExpired:
+                    print(f"⏰ Process timed out after {timeout_seconds} seconds")
+                    terminate_process_group(process, grace_seconds=0)
+                    process.wait()
+                    capture.finish()
+                    
+                    # Clean up tracking
+                    self._untrack_pass(project_id, tracking, job)
+                    
+                    return {
+                        'success': False,
+                        'error': f'Processing timed out after {timeout_seconds} seconds',
+                        'processing_time': time.time() - start_time
+                    }
+                
+                capture.finish()
+                stdout, stderr = capture.stdout, capture.stderr
+                returncode = process.returncode
+                whisper_result = read_whisper_output(output_dir, processed_audio_path)
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+        
+        processing_time = time.time() - start_time
+        
+        self._untrack_pass(project_id, tracking, job)
+        
+        # Cancelled: marked by the cancel request, or the process was signalled
+        # (SIGTERM, or SIGKILL once the grace period ran out)
+        if tracking['cancelled'] or returncode in (-signal.SIGTERM, -getattr(signal, 'SIGKILL', 9)):
+            print(f"🛑 Process was cancelled for project {project_id}")
+            return {
+                'success': False,
+                'error': 'Processing was cancelled',
+                'processing_time': processing_time
+            }
+        
+        return {'returncode': returncode, 'stdout': stdout, 'stderr': stderr, 'processing_time': processing_time,
+                'result': whisper_result}
+
+    def _untrack_pass(self, project_id, tracking, job):
+        """Forget a finished pass: a job's entry stays registered for its next pass, a pass of its own is removed"""
+        with transcription_lock:
+            if job:
+                tracking.update(process=None, lease=None)
+            elif project_id and active_transcriptions.get(project_id) is tracking:
+                # Unless a newer run of the project took the slot
+                del active_transcriptions[project_id]
+
+    def escalate_segments(self, audio_file_path, segments, fast_model, model, language, threshold,
+                          project_id=None, timeout_seconds=14400, precision=None, job=None):
+        """Second cascade pass: re-transcribe the low-confidence segments of a
+        fast model's result with the large model.
+
+        Returns the merged segments and a report, or None when the second
+        pass was cancelled or timed out.
+        """
+        report = {
+            'fastModel': fast_model,
+            'model': model,
+            'threshold': threshold,
+            'segments': len(segments),
+            'escalatedSegments': 0,
+            'escalatedFraction': 0.0,
+            'escalationSeconds': 0.0
+        }
+        regions = escalation_regions(segments, threshold)
+        total = sum(seg['end'] - seg['start'] for seg in segments) or 1.0
+        if regions:
+            decoded = NUMPY_AVAILABLE and self.pcm_cache and self.pcm_cache.covers(audio_file_path) and shutil.which('ffmpeg')
+            in_process = bool(decoded) and self.whisper_engine is not None
+            samples, audio_path = None, None
+            if in_process:
+                samples = self.pcm_cache.extract(audio_file_path, regions)
+            elif decoded:
+                audio_path = self.pcm_cache.write_regions(audio_file_path, regions, SPEECH_FILE_PREFIX)
+            else:
+                audio_path = self.extract_audio_windows(audio_file_path, regions)
+            if in_process or audio_path:
+                print(f"🎯 Cascade: re-transcribing {len(regions)} low-confidence regions with {model}")
+                try:
+                    run = self.run_whisper_pass(audio_path or audio_file_path, samples if in_process else None, model,
+                                                language, project_id, timeout_seconds, precision,
+                                                audio_seconds=sum(end - start for start, end in regions), job=job)
+                    if 'error' in run:
+                        return None
+                    report['escalationSeconds'] = round(run['processing_time'], 1)
+                    if run['result'] is None:
+                        raise RuntimeError(f"no output (exit {run['returncode']})")
+                    better = remap_to_regions(whisper_segments(run['result']), regions)
+                    # The large model's segments replace every fast one centred in its regions
+                    kept = [seg for seg in segments
+                            if not any(start <= (seg['start'] + seg['end']) / 2 < end for start, end in regions)]
+                    report['escalatedSegments'] = len(segments) - len(kept)
+                    segments = sorted(kept + better, key=lambda seg: seg['start'])
+                except Exception as e:
+                    print(f"⚠️ Cascade second pass failed, keeping the {fast_model} result: {e}")
+                finally:
+                    if audio_path:
+                        try:
+                            os.unlink(audio_path)
+                        except OSError:
+                            pass
+            else:
+                print(f"⚠️ Could not cut low-confidence regions; keeping the {fast_model} result")
+        escalated = sum(end - start for start, end in regions) if report['escalatedSegments'] else 0.0
+        report['escalatedFraction'] = round(min(escalated / total, 1.0), 3)
+        # Share of the large-model-only cost that the cascade did not spend
+        fast_cost = model_relative_cost(fast_model) / model_relative_cost(model)
+        report['estimatedComputeSaved'] = round(max(0.0, 1 - fast_cost - report['escalatedFraction']), 3)
+        return segments, report
+
+    def speech_regions(self, audio_file_path, spans):
+        """(regions, report) for the speech within spans [(start, end), ...] of
+        a decoded upload, in seconds; an end of None runs to the end.
+
+        regions is None when there is too little non-speech for skipping it
+        to pay off.
+        """
+        started = time.time()
+        regions, total = [], 0.0
+        for span_start, span_end in spans:
+            samples = self.pcm_cache.load(audio_file_path, span_start,
+                                          None if span_end is None else span_end - span_start)
+            total += len(samples) / PcmCache.SAMPLE_RATE
+            regions += [(start + span_start, end + span_start)
+                        for start, end in detect_speech_regions(samples, PcmCache.SAMPLE_RATE)]
+        speech = sum(end - start for start, end in regions)
+        report = {
+            'totalSeconds': round(total, 1),
+            'speechSeconds': round(speech, 1),
+            'skippedFraction': round(1 - speech / total, 3) if total else 0.0,
+            'regions': len(regions),
+            'detectSeconds': round(time.time() - started, 2)
+        }
+        report['applied'] = bool(regions) and report['skippedFraction'] >= self.VAD_MIN_SKIP
+        # Whisper's cost is about linear in audio length
+        report['estimatedSpeedup'] = round(total / speech, 2) if report['applied'] else 1.0
+        return (regions if report['applied'] else None), report
+
+    def prewarm_pcm_cache(self, audio_file_path):
+        """Decode an upload into the PCM cache ahead of its first transcription"""
+        try:
+            self.pcm_cache.get(audio_file_path)
+        except Exception as e:
+            print(f"⚠️ Could not decode {audio_file_path} ahead of transcription: {e}")
+
+    def extract_audio_windows(self, audio_file_path, windows):
+        """Cut windows [(start, end), ...] out of an audio file into one temp WAV, using ffmpeg input seeking"""
+        try:
+            with tempfile.NamedTemporaryFile(delete=False, prefix=PREVIEW_FILE_PREFIX, suffix='.wav') as out:
+                out_path = out.name
+            command = ['ffmpeg', '-nostdin', '-v', 'error']
+            for start, end in windows:
+                # -ss before -i seeks in the input instead of decoding up to the window
+                command += ['-ss', f"{start:.2f}", '-t', f"{end - start:.2f}", '-i', audio_file_path]
+            inputs = ''.join(f"[{i}:a]" for i in range(len(windows)))
+            command += ['-filter_complex', f"{inputs}concat=n={len(windows)}:v=0:a=1[out]", '-map', '[out]',
+                        '-ac', '1', '-ar', str(PcmCache.SAMPLE_RATE), '-y', out_path]
+            subprocess.run(command, capture_output=True, text=True, check=True, timeout=120)
+            return out_path
+        except Exception as e:
+            print(f"⚠️ Extracting preview windows failed: {e}")
+            try:
+                os.unlink(out_path)
+            except Exception:
+                pass
+            return None
+
     def trim_audio_file(self, audio_file_path, duration_seconds):
         """Trim audio file to specified duration using ffmpeg"""
         try:
             original_ext = os.path.splitext(audio_file_path)[1].lower()
             
-            with tempfile.NamedTemporaryFile(delete=False, suffix=original_ext or '.wav') as trimmed_file:
+            with tempfile.NamedTemporaryFile(delete=False, prefix=PREVIEW_FILE_PREFIX,
+                                             suffix=original_ext or '.wav') as trimmed_file:
                 trimmed_path = trimmed_file.name
             
             command = [
@@ -2383,11 +5778,13 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             print(f"⚠️ Audio trimming failed: {e}")
             return None
     
-    def send_json_response(self, data, status=200):
-        """Send JSON response with CORS headers"""
+    def send_json_response(self, data, status=200, headers=None):
+        """Send JSON response with CORS headers (plus any extra headers)"""
         self.send_response(status)
         self.send_header('Content-Type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         
         response = json.dumps(data, indent=2)
@@ -2400,39 +5797,143 @@ class PALAScribeHandler(BaseHTTPRequestHandler):
             "error": message
         }, status=status)
 
-def create_handler_with_db(db_manager):
-    """Create handler class with database manager"""
+def create_handler_with_db(db_manager, storage_gc=None, pcm_cache=None, whisper_engine=None, resource_manager=None,
+                           whisper_batcher=None, transcription_queue=None, archive_pdfs=False):
+    """Create handler class with database manager (and the storage GC behind /admin/gc).
+
+    Without a whisper_engine, transcription runs through the whisper CLI;
+    with a whisper_batcher, short CLI jobs share whisper processes. A
+    transcription_queue lets cancel requests drop its waiting jobs. With
+    archive_pdfs, every text edit also keeps a versioned PDF in exports/.
+    """
+    storage_gc = storage_gc or StorageGarbageCollector(db_manager)
+    pcm_cache = pcm_cache or PcmCache(db_manager)
+    resource_manager = resource_manager or ResourceManager()
     def handler(*args, **kwargs):
-        return PALAScribeHandler(*args, db_manager=db_manager, **kwargs)
+        return PALAScribeHandler(*args, db_manager=db_manager, storage_gc=storage_gc, pcm_cache=pcm_cache,
+                                 whisper_engine=whisper_engine, resource_manager=resource_manager,
+                                 whisper_batcher=whisper_batcher, transcription_queue=transcription_queue,
+                                 archive_pdfs=archive_pdfs, **kwargs)
     return handler
 
 def main():
     """Start the PALAScribe multi-user server"""
+    import argparse
+    parser = argparse.ArgumentParser(description="PALAScribe multi-user server")
+    parser.add_argument('--engine', choices=['cli', 'inprocess'], default='cli',
+                        help="run Whisper through its CLI per job, or keep models loaded in the server")
+    parser.add_argument('--pcm-cache-gb', type=float, default=8,
+                        help="disk budget for audio decoded to 16 kHz PCM")
+    parser.add_argument('--precision', choices=WhisperEngine.PRECISIONS, default='fp32',
+                        help="default weights for the in-process engine (jobs may override); int8 is faster on CPU")
+    parser.add_argument('--pin-cpus', action='store_true',
+                        help="pin each Whisper process to its share of the cores")
+    parser.add_argument('--background-nice', type=int, default=ResourceManager.NICE_LEVELS['background'],
+                        help="nice level of full transcriptions, so previews stay responsive")
+    parser.add_argument('--batch-window', type=float, default=2.0,
+                        help="seconds a short CLI job waits for others to share its whisper run (0 disables)")
+    parser.add_argument('--batch-previews', action='store_true',
+                        help="batch short previews too (by default they run at once)")
+    parser.add_argument('--archive-pdfs', action='store_true',
+                        help="keep a versioned PDF of every transcription edit in exports/ (needs reportlab)")
+    parser.add_argument('--watch', metavar='DIR',
+                        help="hot folder: audio dropped here becomes a project and is transcribed")
+    parser.add_argument('--watch-link', action='store_true',
+                        help="hard-link watched files into the store and leave them in place, instead of moving them")
+    parser.add_argument('--watch-model', default='medium', help="Whisper model for hot-folder jobs")
+    parser.add_argument('--watch-language', default='English', help="language of hot-folder audio")
+    parser.add_argument('--workers', type=int, default=2,
+                        help="concurrent background transcriptions (hot-folder jobs)")
+    parser.add_argument('--watch-remote', action='store_true',
+                        help="leave hot-folder jobs to remote workers instead of transcribing them here")
+    parser.add_argument('--host', default='localhost',
+                        help="interface to listen on (0.0.0.0 lets remote workers reach the server)")
+    parser.add_argument('--worker-of', metavar='URL',
+                        help="run as a remote worker of the server at URL instead of serving")
+    parser.add_argument('--worker-id', help="name this worker reports to the server (default host-pid)")
+    args = parser.parse_args()
     port = 8765
     
+    if args.worker_of:
+        RemoteWorker(args.worker_of, worker_id=args.worker_id).run_forever()
+        return
+    
     print("🚀 Starting PALAScribe Multi-User Server...")
     
     # Initialize database
     db_manager = DatabaseManager()
+    pcm_cache = PcmCache(db_manager, budget_bytes=int(args.pcm_cache_gb * 1024 ** 3))
+    whisper_engine = None
+    if args.engine == 'inprocess':
+        if NUMPY_AVAILABLE and WHISPER_AVAILABLE:
+            whisper_engine = WhisperEngine(precision=args.precision)
+        else:
+            print("⚠️ In-process engine needs numpy and openai-whisper; using the whisper CLI")
+    
+    # Background reconciliation of uploads, exports and leftover artifacts
+    storage_gc = StorageGarbageCollector(db_manager, work_dirs=[os.getcwd(), whisper_work_dir()])
+    storage_gc.start()
     
     # Create server
-    handler_class = create_handler_with_db(db_manager)
-    server = ThreadingHTTPServer(('localhost', port), handler_class)
+    # A full run per background worker (one without the queue), plus an interactive preview
+    concurrency = (args.workers if args.watch and not args.watch_remote else 1) + 1
+    resource_manager = ResourceManager(pin=args.pin_cpus, nice_levels={'background': args.background_nice},
+                                       concurrency=concurrency)
+    whisper_batcher = (WhisperBatcher(window_seconds=args.batch_window,
+                                      priorities=('background', 'interactive') if args.batch_previews else ('background',))
+                       if args.batch_window > 0 else None)
+    components = dict(db_manager=db_manager, storage_gc=storage_gc, pcm_cache=pcm_cache,
+                      whisper_engine=whisper_engine, resource_manager=resource_manager,
+                      whisper_batcher=whisper_batcher, archive_pdfs=args.archive_pdfs)
+    if args.watch and not args.watch_remote:
+        # Known to the handlers, so a cancel can drop its waiting jobs
+        components['transcription_queue'] = TranscriptionQueue(lambda: PALAScribeHandler.background(**components),
+                                                               workers=args.workers)
+    handler_class = create_handler_with_db(**components)
+    server = ThreadingHTTPServer((args.host, port), handler_class)
+    
+    # Hot folder: ingest straight into the database, transcribe through the queue
+    if args.watch:
+        if args.watch_remote:
+            transcription_queue = RemoteJobQueue(db_manager)
+        else:
+            transcription_queue = components['transcription_queue']
+            transcription_queue.start()
+        watcher = HotFolderWatcher(db_manager, transcription_queue, args.watch, move=not args.watch_link,
+                                   job_options={'model': args.watch_model, 'language': args.watch_language})
+        watcher.start()
+        print(f"📥 Watching {watcher.folder} ({'linking' if args.watch_link else 'moving'} audio into the store, "
+              f"{'remote workers' if args.watch_remote else f'{args.workers} workers'})")
     
-    print(f"✅ Server running on http://localhost:{port}")
+    print(f"✅ Server running on http://{args.host}:{port}")
     print("📊 Database initialized")
+    print(f"🧠 Whisper engine: {f'in-process ({whisper_engine.precision})' if whisper_engine else 'CLI'}")
+    print(f"🧮 {len(resource_manager.cpus)} cores shared between concurrent transcriptions"
+          f"{', pinned' if resource_manager.pin else ''}")
     print("🎯 API Endpoints:")
     print("   GET  /health - Health check")
-    print("   GET  /projects - List all projects")
+    print("   GET  /projects[?fields=full][&since=token] - List projects (or changes since a sync token)")
     print("   POST /projects - Create project")
     print("   GET  /projects/{id} - Get project")
     print("   PUT  /projects/{id} - Update project")
+    print("   PATCH /projects/{id} - Versioned partial update with text edits")
     print("   DELETE /projects/{id} - Delete project")
     print("   POST /projects/{id}/audio - Upload audio")
     print("   POST /projects/{id}/transcribe - Start transcription")
     print("   POST /projects/{id}/cancel - Cancel transcription")
+    print("   GET  /search?q= - Full-text search across transcripts")
+    print("   GET  /projects/{id}/segments?from=&to= - Get timestamped segments")
+    print("   GET  /projects/{id}/export?format=srt|vtt|json|txt|pdf - Export project")
+    print("   GET  /projects/{id}/history - Edit history")
+    print("   GET  /projects/{id}/versions/{n} - Edited text as of version n")
     print("   GET  /audio/{filename} - Get audio file")
+    print("   GET  /jobs/{id}/log[?lines=N] - Tail of a transcription's Whisper output")
+    print("   GET  /admin/gc - Storage GC status")
+    print("   POST /admin/gc[?dryRun=1] - Run a full storage GC pass (dry run lists orphans only)")
     print("   POST /process - Whisper processing (legacy)")
+    print("   POST /workers/lease - Remote worker: lease the next queued job")
+    print("   GET  /workers/jobs/{id}[/audio] - Remote job status (or its audio, by range)")
+    print("   POST /workers/jobs/{id}/heartbeat|result - Remote worker: renew lease / report result")
     
     try:
         server.serve_forever()
@@ -9,9 +9,12 @@ import json
 import sqlite3
 import tempfile
 import shutil
+import hashlib
+import struct
 from pathlib import Path
 import requests
 import time
+from datetime import datetime
 import threading
 import sys
 import os
@@ -20,7 +23,12 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import server modules
-from palascribe_server import DatabaseManager, PALAScribeHandler, create_handler_with_db
+from palascribe_server import (JOB_LOGS_KEPT, NUMPY_AVAILABLE, DatabaseManager, HotFolderWatcher, OutputCapture, PALAScribeHandler,
+                               PcmCache, RemoteJobQueue, RemoteWorker, ResourceManager, StorageGarbageCollector, TranscriptionQueue,
+                               VersionConflictError, WhisperBatcher,
+                               WhisperEngine, apply_text_edits, audio_content_hash, create_handler_with_db, detect_speech_regions,
+                               escalation_regions, model_relative_cost, parse_srt_content, plan_preview_windows,
+                               read_log_tail, remap_to_regions, write_job_log)
 from http.server import HTTPServer
 
 class TestDatabaseManager(unittest.TestCase):
@@ -55,6 +63,40 @@ class TestDatabaseManager(unittest.TestCase):
         
         conn.close()
     
+    def test_schema_migrations_run_once(self):
+        """Test migrations are recorded and not re-applied on restart"""
+        conn = sqlite3.connect(self.db_path)
+        applied = conn.execute("SELECT version FROM schema_version ORDER BY version").fetchall()
+        conn.close()
+        self.assertEqual([v for (v,) in applied], [v for v, _ in DatabaseManager.MIGRATIONS])
+        
+        DatabaseManager(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM schema_version").fetchone()[0], len(applied))
+        conn.close()
+
+    def test_inline_segments_migrated_out_of_projects(self):
+        """Test a database from before schema_version keeps its inline segments, in transcript_segments only"""
+        legacy_path = os.path.join(self.temp_dir, "legacy.db")
+        conn = sqlite3.connect(legacy_path)
+        conn.execute('''
+            CREATE TABLE projects (id TEXT PRIMARY KEY, name TEXT NOT NULL, assigned_to TEXT, start_date TEXT,
+                                   end_date TEXT, status TEXT DEFAULT 'new', audio_file_name TEXT, audio_file_path TEXT,
+                                   transcription TEXT, formatted_text TEXT, edited_text TEXT, rich_content TEXT,
+                                   word_count INTEGER DEFAULT 0, processing_time REAL, is_preview BOOLEAN DEFAULT 0,
+                                   error_message TEXT, created TEXT NOT NULL, updated TEXT NOT NULL, segments TEXT)
+        ''')
+        conn.execute("INSERT INTO projects (id, name, created, updated, segments) VALUES ('old', 'Old', 'x', 'x', ?)",
+                     (json.dumps([[0, 1500, "Namo"], [1500, 40000, "tassa"]]),))
+        conn.commit()
+        conn.close()
+        
+        db_manager = DatabaseManager(legacy_path)
+        self.assertEqual(db_manager.get_segments('old', 30, 31), [{'start': 1.5, 'end': 40.0, 'text': 'tassa'}])
+        conn = sqlite3.connect(legacy_path)
+        self.assertNotIn('segments', DatabaseManager._table_columns(conn.cursor(), 'projects'))
+        conn.close()
+    
     def test_create_project(self):
         """Test project creation"""
         project = self.db_manager.create_project("Test Project", "Test User")
@@ -158,32 +200,962 @@ class TestDatabaseManager(unittest.TestCase):
         
     def test_save_audio_file(self):
         """Test audio file saving"""
-        # Create project
-        project = self.db_manager.create_project("Audio Test", "Test User")
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            # Create project
+            project = self.db_manager.create_project("Audio Test", "Test User")
+            project_id = project['id']
+        
+            # Create test audio data
+            test_audio_data = b"fake audio data for testing"
+            original_name = "test_audio.mp3"
+            mime_type = "audio/mpeg"
+        
+            # Save audio file
+            file_path = self.db_manager.save_audio_file(
+                project_id, test_audio_data, original_name, mime_type
+            )
+        
+            # Verify file was saved
+            self.assertTrue(Path(file_path).exists())
+        
+            # Verify project was updated
+            updated_project = self.db_manager.get_project(project_id)
+            self.assertEqual(updated_project['audio_file_name'], original_name)
+            self.assertEqual(updated_project['audio_file_path'], file_path)
+        
+            # Verify file contents
+            with open(file_path, 'rb') as f:
+                saved_data = f.read()
+            self.assertEqual(saved_data, test_audio_data)
+        finally:
+            os.chdir(original_cwd)
+
+    def test_audio_url_tracks_availability(self):
+        """Test audioUrl comes from the stored availability flag"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            project = self.db_manager.create_project("Audio URL Test", "Test User")
+            project_id = project['id']
+            self.assertNotIn('audioUrl', self.db_manager.get_project(project_id))
+        
+            file_path = self.db_manager.save_audio_file(project_id, b"fake audio", "talk.mp3", "audio/mpeg")
+            loaded = self.db_manager.get_project(project_id)
+            self.assertEqual(loaded['audioUrl'], f"/audio/{Path(file_path).name}")
+        
+            # A path that does not exist on disk is not served
+            self.db_manager.update_project(project_id, {'audio_file_path': 'uploads/missing.mp3'})
+            self.assertNotIn('audioUrl', self.db_manager.get_project(project_id))
+            os.remove(file_path)
+        finally:
+            os.chdir(original_cwd)
+
+    def test_changes_since_and_tombstones(self):
+        """Test incremental sync returns only changes and deletions after the watermark"""
+        kept = self.db_manager.create_project("Sync Kept", "Test User")
+        removed = self.db_manager.create_project("Sync Removed", "Test User")
+        watermark = datetime.now().isoformat()
+        time.sleep(0.01)
+        
+        projects, deleted, _, full = self.db_manager.get_changes_since(watermark)
+        self.assertEqual((projects, deleted, full), ([], [], False))
+        
+        etag = self.db_manager.get_collection_etag()
+        self.db_manager.update_project(kept['id'], {'status': 'Needs_Review'})
+        self.db_manager.delete_project(removed['id'])
+        self.assertNotEqual(self.db_manager.get_collection_etag(), etag)
+        
+        projects, deleted, sync_token, full = self.db_manager.get_changes_since(watermark)
+        self.assertEqual([p['id'] for p in projects], [kept['id']])
+        self.assertEqual(deleted, [removed['id']])
+        self.assertFalse(full)
+        self.assertLess(sync_token, datetime.now().isoformat())
+        
+        # A watermark older than the tombstone retention forces a full list
+        projects, deleted, _, full = self.db_manager.get_changes_since('2000-01-01T00:00:00')
+        self.assertTrue(full)
+        self.assertEqual([p['id'] for p in projects], [kept['id']])
+        
+        # A write committed late, stamped before the newest row, still changes the ETag
+        self.db_manager.create_project("Sync Newest", "Test User")
+        etag = self.db_manager.get_collection_etag()
+        conn = sqlite3.connect(self.db_manager.db_path)
+        conn.execute("UPDATE projects SET status = 'new', updated = ? WHERE id = ?", (watermark, kept['id']))
+        conn.commit()
+        conn.close()
+        self.assertNotEqual(self.db_manager.get_collection_etag(), etag)
+
+    def test_patch_project_applies_edits_and_detects_conflicts(self):
+        """Test versioned text edits and optimistic concurrency"""
+        project = self.db_manager.create_project("Patch Test", "Test User")
+        project_id = project['id']
+        self.db_manager.update_project(project_id, {'edited_text': 'Mettā practice 😀 daily'})
+        version = self.db_manager.get_project(project_id)['version']
+        
+        # Offsets are UTF-16 code units: the emoji counts as two
+        new_version, _ = self.db_manager.patch_project(project_id, version, {'status': 'Needs_Review'}, {
+            'edited_text': [{'start': 0, 'end': 5, 'text': 'Karuṇā'}, {'start': 18, 'end': 23, 'text': 'always'}]
+        })
+        self.assertEqual(new_version, version + 1)
+        loaded = self.db_manager.get_project(project_id)
+        self.assertEqual(loaded['editedText'], 'Karuṇā practice 😀 always')
+        self.assertEqual(loaded['status'], 'Needs_Review')
+        
+        # A second editor still holding the old version is rejected
+        with self.assertRaises(VersionConflictError) as ctx:
+            self.db_manager.patch_project(project_id, version, edits={'edited_text': [{'start': 0, 'end': 0, 'text': 'x'}]})
+        self.assertEqual(ctx.exception.current_version, new_version)
+        
+        with self.assertRaises(ValueError):
+            apply_text_edits('abc', [{'start': 0, 'end': 2, 'text': ''}, {'start': 1, 'end': 3, 'text': ''}])
+        self.assertIsNone(self.db_manager.patch_project('missing', 0, {'status': 'x'}))
+
+    def test_edit_history_rebuilds_every_version(self):
+        """Test snapshot-plus-delta history reproduces each saved text"""
+        project = self.db_manager.create_project("History Test", "Test User")
         project_id = project['id']
         
-        # Create test audio data
-        test_audio_data = b"fake audio data for testing"
-        original_name = "test_audio.mp3"
-        mime_type = "audio/mpeg"
+        saved = {}
+        text = "Satipaṭṭhāna practice.\nObserve the breath.\n" * 30
+        for i in range(45):
+            text = text.replace("breath.", f"breath {i}.", 1) if i % 2 else text + f"Line {i}\n"
+            self.db_manager.update_project(project_id, {'edited_text': text}, editor=f"Reviewer {i % 2}")
+            saved[self.db_manager.get_project(project_id)['version']] = text
+        # Unrelated content changes do not add revisions
+        self.db_manager.update_project(project_id, {'transcription': 'raw'})
+        
+        history = self.db_manager.get_history(project_id)
+        self.assertEqual(len(history), 45)
+        self.assertEqual([r['revision'] for r in history if r['snapshot']], [1, 21, 41])
+        self.assertLess(max(r['deltaBytes'] for r in history), 100)
+        self.assertEqual([r['editor'] for r in history[:3]], ['Reviewer 0', 'Reviewer 1', 'Reviewer 0'])
+        
+        for version, expected in saved.items():
+            self.assertEqual(self.db_manager.get_text_at_version(project_id, version)[1], expected)
+        last_version = max(saved)
+        self.assertEqual(self.db_manager.get_text_at_version(project_id, last_version + 1)[1], saved[last_version])
+        self.assertIsNone(self.db_manager.get_text_at_version(project_id, 0))
         
-        # Save audio file
-        file_path = self.db_manager.save_audio_file(
-            project_id, test_audio_data, original_name, mime_type
-        )
+        self.db_manager.delete_project(project_id)
+        self.assertEqual(self.db_manager.get_history(project_id), [])
+
+    def test_identical_audio_is_stored_once(self):
+        """Test content-addressed audio is shared and removed with its last reference"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            first = self.db_manager.create_project("Shared Audio A", "Test User")
+            second = self.db_manager.create_project("Shared Audio B", "Test User")
+            audio = b"identical retreat recording"
+        
+            path_a = self.db_manager.save_audio_file(first['id'], audio, "day1.MP3", "audio/mpeg")
+            path_b = self.db_manager.save_audio_file(second['id'], audio, "copy.mp3", "audio/mpeg")
+            self.assertEqual(path_a, path_b)
+            digest = hashlib.sha256(audio).hexdigest()
+            self.assertEqual(Path(path_a), Path("uploads") / digest[:2] / digest[2:4] / f"{digest}.mp3")
+            self.assertEqual(self.db_manager.get_project(second['id'])['audioUrl'], f"/audio/{digest}.mp3")
+        
+            self.db_manager.delete_project(first['id'])
+            self.assertTrue(Path(path_a).exists())
+            self.db_manager.delete_project(second['id'])
+            self.assertFalse(Path(path_a).exists())
+        finally:
+            os.chdir(original_cwd)
+
+    def test_storage_gc_removes_only_old_orphans(self):
+        """Test the GC reconciles uploads, exports and leftovers against the DB"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            project = self.db_manager.create_project("GC Test", "Test User")
+            kept_audio = Path(self.db_manager.save_audio_file(project['id'], b"kept", "kept.mp3", "audio/mpeg"))
+            kept_export = Path("exports") / project['id'] / "v1.pdf"
+            kept_pdf = kept_audio.with_suffix('.pdf')
+            # Written instead of the PDF when reportlab is missing
+            kept_txt = kept_audio.with_suffix('.txt')
+            kept_pcm = PcmCache.path_for(kept_audio)
+            orphans = [
+                Path("uploads") / "ab" / "cd" / ("ab" + "cd" + "0" * 60 + ".mp3"),
+                Path("uploads") / "ab" / "cd" / ".upload.part",
+                kept_audio.parent / ("1" * 64 + ".pdf"),
+                kept_audio.parent / ("1" * 64 + ".txt"),
+                kept_audio.parent / ("1" * 64 + PcmCache.SUFFIX),
+                Path("exports") / "deleted-project" / "v1.pdf",
+                Path("tmpabcd1234.srt"),
+            ]
+            fresh_orphan = Path("uploads") / ("2" * 64 + ".wav")
+            for path in orphans + [kept_export, kept_pdf, kept_txt, kept_pcm, fresh_orphan]:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b"x" * 10)
+            old = time.time() - 7200
+            for path in orphans + [kept_audio, kept_pdf, kept_txt, kept_pcm, kept_export, kept_export.parent,
+                                   Path("exports") / "deleted-project"]:
+                os.utime(path, (old, old))
+            
+            gc = StorageGarbageCollector(self.db_manager, grace_seconds=3600, work_dirs=[self.temp_dir])
+            # A Whisper output dir outlived by its pass, in the system temp dir
+            output_dir = Path(tempfile.mkdtemp(prefix="whisper-out-"))
+            (output_dir / "talk.json").write_bytes(b"{}")
+            os.utime(output_dir, (old, old))
+            self.assertIn({'path': str(output_dir), 'bytes': 2, 'reason': 'leftover Whisper output'},
+                          gc.run(dry_run=True)['orphans'])
+            shutil.rmtree(output_dir)
+            report = gc.run(dry_run=True)
+            self.assertEqual(report['filesDeleted'], len(orphans))
+            self.assertTrue(all(path.exists() for path in orphans))
+            
+            # Incremental runs with a tiny budget complete the same pass
+            gc.max_entries = 1
+            for _ in range(50):
+                report = gc.run()
+                if report['complete']:
+                    break
+            self.assertTrue(report['complete'])
+            self.assertEqual(gc.totals['filesDeleted'], len(orphans))
+            self.assertEqual(gc.totals['bytesReclaimed'], 10 * len(orphans))
+            self.assertFalse(any(path.exists() for path in orphans))
+            for path in (kept_audio, kept_pdf, kept_txt, kept_pcm, kept_export, fresh_orphan):
+                self.assertTrue(path.exists(), path)
+            
+            # Deleting the project takes the audio's companions with it
+            self.db_manager.delete_project(project['id'])
+            for path in (kept_audio, kept_pdf, kept_txt, kept_pcm):
+                self.assertFalse(path.exists(), path)
+        finally:
+            os.chdir(original_cwd)
+
+    def test_hot_folder_ingest(self):
+        """Test settled files in a watched folder become queued projects without copying the audio"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            submitted = []
+            fake_queue = type('FakeQueue', (), {'submit': lambda self, project_id, **options: submitted.append((project_id, options))})()
+            inbox = Path(self.temp_dir) / "inbox"
+            (inbox / "tape 12").mkdir(parents=True)
+            (inbox / "tape 12" / "side A.mp3").write_bytes(b"cassette side A")
+            (inbox / "notes.txt").write_text("not audio")
+            (inbox / "side B.mp3.part").write_bytes(b"still copying")
+            
+            watcher = HotFolderWatcher(self.db_manager, fake_queue, inbox, move=False, settle_seconds=0,
+                                       job_options={'model': 'small'})
+            # The first scan only notes the file; it is taken once unchanged
+            self.assertEqual(watcher.scan(), [])
+            created = watcher.scan()
+            self.assertEqual(len(created), 1)
+            self.assertEqual(submitted, [(created[0], {'model': 'small'})])
+            
+            project = self.db_manager.get_project(created[0])
+            self.assertEqual(project['name'], "side A")
+            stored = Path(project['audioFilePath'])
+            source = inbox / "tape 12" / "side A.mp3"
+            self.assertEqual(stored.read_bytes(), b"cassette side A")
+            self.assertEqual(stored.stat().st_ino, source.stat().st_ino)
+            
+            # A restarted watcher recognises the linked file by its source path
+            watcher = HotFolderWatcher(self.db_manager, fake_queue, inbox, move=False, settle_seconds=0)
+            watcher.scan()
+            self.assertEqual(watcher.scan(), [])
+            
+            # Moving takes the file out of the folder
+            (inbox / "side C.wav").write_bytes(b"cassette side C")
+            watcher.move = True
+            watcher.scan()
+            moved = self.db_manager.get_project(watcher.scan()[0])
+            self.assertFalse((inbox / "side C.wav").exists())
+            self.assertEqual(Path(moved['audioFilePath']).read_bytes(), b"cassette side C")
+            
+            # A later tape dropped under a moved file's name is new audio
+            (inbox / "side C.wav").write_bytes(b"cassette 13 side C")
+            watcher.scan()
+            again = watcher.scan()
+            self.assertEqual(len(again), 1)
+            self.assertEqual(Path(self.db_manager.get_project(again[0])['audioFilePath']).read_bytes(),
+                             b"cassette 13 side C")
+            
+            # So is a linked file whose content was replaced
+            (inbox / "tape 12" / "side A.mp3").unlink()
+            (inbox / "tape 12" / "side A.mp3").write_bytes(b"cassette side A, re-recorded")
+            watcher = HotFolderWatcher(self.db_manager, fake_queue, inbox, move=False, settle_seconds=0)
+            watcher.scan()
+            self.assertEqual(len(watcher.scan()), 1)
+        finally:
+            os.chdir(original_cwd)
+
+    def test_pdf_archived_on_edit_only_when_asked(self):
+        """Test text edits archive a versioned PDF only with archive_pdfs; exports are otherwise built on demand"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            project_id = self.db_manager.create_project("Archive")['id']
+            exports_dir = Path("exports") / project_id
+            for archive_pdfs in (False, True):
+                handler = PALAScribeHandler.background(db_manager=self.db_manager, archive_pdfs=archive_pdfs)
+                threads = threading.active_count()
+                handler.schedule_pdf_regeneration(project_id, {'transcription': 'sutta'}, {}, lambda: None)
+                if not archive_pdfs:
+                    self.assertEqual(threading.active_count(), threads)
+                    self.assertFalse(exports_dir.exists())
+            for _ in range(100):
+                if list(exports_dir.glob("*_v1.*")):
+                    break
+                time.sleep(0.05)
+            self.assertTrue(list(exports_dir.glob("*_v1.*")))
+        finally:
+            os.chdir(original_cwd)
+
+    def test_failed_audio_insert_keeps_source(self):
+        """Test a move-mode ingest whose insert fails leaves the source in place and no staged file"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            source = Path(self.temp_dir) / "tape.wav"
+            source.write_bytes(b"the only copy")
+            project_id = self.db_manager.create_project("Tape")['id']
+            conn = sqlite3.connect(self.db_manager.db_path)
+            conn.execute("CREATE TRIGGER fail_audio BEFORE INSERT ON audio_files BEGIN SELECT RAISE(ABORT, 'database is locked'); END")
+            conn.commit()
+            
+            with self.assertRaises(sqlite3.DatabaseError):
+                self.db_manager.save_audio_from_path(project_id, source, move=True)
+            self.assertEqual(source.read_bytes(), b"the only copy")
+            self.assertEqual([p for p in Path("uploads").rglob("*") if p.is_file()], [])
+            self.assertIsNone(self.db_manager.get_project(project_id)['audioFilePath'])
+            
+            # Once the database recovers the file is stored and only then removed
+            conn.execute("DROP TRIGGER fail_audio")
+            conn.commit()
+            conn.close()
+            stored = self.db_manager.save_audio_from_path(project_id, source, move=True)
+            self.assertFalse(source.exists())
+            self.assertEqual(Path(stored).read_bytes(), b"the only copy")
+        finally:
+            os.chdir(original_cwd)
+
+    def test_job_lease_expires_to_another_worker(self):
+        """Test a job whose lease ran out goes to the next worker and the stale token is refused"""
+        project_id = self.db_manager.create_project("Remote Job")["id"]
+        job_id = self.db_manager.enqueue_job(project_id, {'model': 'small'})['id']
+        
+        stale = self.db_manager.lease_job('dead-worker', lease_seconds=-1)
+        self.assertEqual(stale['id'], job_id)
+        job = self.db_manager.lease_job('live-worker', lease_seconds=60)
+        self.assertEqual((job['id'], job['attempts'], job['options']), (job_id, 2, {'model': 'small'}))
+        self.assertIsNone(self.db_manager.lease_job('idle-worker'))
+        
+        self.assertIsNone(self.db_manager.heartbeat_job(job_id, stale['lease_token']))
+        self.assertFalse(self.db_manager.finish_job(job_id, stale['lease_token'], True))
+        self.assertIsNotNone(self.db_manager.heartbeat_job(job_id, job['lease_token'], {'stage': 'transcribing'}))
+        self.assertTrue(self.db_manager.finish_job(job_id, job['lease_token'], True))
+        self.assertEqual(self.db_manager.get_job(job_id)['status'], 'done')
+
+    def test_job_failing_every_lease_fails_project(self):
+        """Test a job out of lease attempts marks its project as errored, and remote jobs refuse local-only options"""
+        project_id = self.db_manager.create_project("Flaky Worker")["id"]
+        job_id = self.db_manager.enqueue_job(project_id)['id']
+        for _ in range(DatabaseManager.JOB_MAX_ATTEMPTS):
+            self.assertEqual(self.db_manager.lease_job('dying-worker', lease_seconds=-1)['id'], job_id)
+        self.assertIsNone(self.db_manager.lease_job('next-worker'))
+
+        self.assertEqual(self.db_manager.get_job(job_id)['status'], 'failed')
+        project = self.db_manager.get_project(project_id)
+        self.assertEqual((project['status'], project['errorMessage']), ('Error', 'Lease expired too many times'))
+
+        remote = RemoteJobQueue(self.db_manager)
+        with self.assertRaises(ValueError):
+            remote.submit(project_id, model='small', vad=True)
+        remote.submit(project_id, model='small', vad=False)
+        self.assertEqual(self.db_manager.get_project(project_id)['status'], 'queued')
+
+    def test_cancel_kills_process_group_and_queued_jobs(self):
+        """Test cancel stops Whisper with its children, frees its cores and drops waiting jobs"""
+        project_id = self.db_manager.create_project("Cancel Me")['id']
+        fake_whisper = Path(self.temp_dir) / "whisper"
+        # Stands in for whisper and the ffmpeg it starts
+        fake_whisper.write_text('#!/bin/sh\nsleep 60 &\necho $! > child.pid\nwait\n')
+        fake_whisper.chmod(0o755)
+        queue_jobs = TranscriptionQueue(lambda: None)
+        queue_jobs.submit(project_id)
+        self.db_manager.enqueue_job(project_id)
+        
+        resource_manager = ResourceManager(cpus=range(2))
+        handler = PALAScribeHandler.background(db_manager=self.db_manager, resource_manager=resource_manager,
+                                               transcription_queue=queue_jobs)
+        handler.whisper_executable = lambda: str(fake_whisper)
+        responses = []
+        handler.send_json_response = lambda data, status=200, headers=None: responses.append(data)
+        results = []
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        original_dir = os.environ.get('AUDIO_TEXT_CONVERTER_DIR')
+        os.environ['AUDIO_TEXT_CONVERTER_DIR'] = self.temp_dir
+        try:
+            run = threading.Thread(target=lambda: results.append(
+                handler.run_whisper_pass('talk.wav', None, 'base', 'English', project_id=project_id)))
+            run.start()
+            child_pid_file = Path(self.temp_dir) / "child.pid"
+            for _ in range(100):
+                if child_pid_file.exists() and child_pid_file.read_text().strip():
+                    break
+                time.sleep(0.05)
+            child_pid = int(child_pid_file.read_text())
+            
+            started = time.time()
+            handler.handle_cancel_transcription(project_id)
+            self.assertLess(time.time() - started, 1)
+            self.assertEqual(responses[-1]['queued'], 2)
+            self.assertTrue(responses[-1]['running'])
+            self.assertEqual(resource_manager.snapshot()['workers'], [])
+            
+            run.join(timeout=10)
+            self.assertEqual(results[0]['error'], 'Processing was cancelled')
+            for _ in range(100):
+                try:
+                    os.kill(child_pid, 0)
+                except ProcessLookupError:
+                    break
+                time.sleep(0.05)
+            else:
+                self.fail("the child of the cancelled process survived")
+            self.assertEqual(queue_jobs.status()['queued'], 0)
+            self.assertIsNone(self.db_manager.lease_job('late-worker'))
+        finally:
+            os.chdir(original_cwd)
+            if original_dir is None:
+                os.environ.pop('AUDIO_TEXT_CONVERTER_DIR', None)
+            else:
+                os.environ['AUDIO_TEXT_CONVERTER_DIR'] = original_dir
+
+    def test_cancel_between_cascade_passes(self):
+        """Test a cancel after the fast pass stops the job before the large model runs"""
+        project_id = self.db_manager.create_project("Cancel Cascade")['id']
+        audio_path = Path(self.temp_dir) / "talk.wav"
+        audio_path.write_bytes(b"RIFF" + b"\0" * 1024)
+        fake_whisper = Path(self.temp_dir) / "whisper"
+        # Every segment is unsure, so the cascade would escalate all of them
+        fake_whisper.write_text(f'''#!{sys.executable}
+import json, os, sys
+with open('calls.log', 'a') as f:
+    f.write(sys.argv[1] + '\\n')
+stem = os.path.splitext(os.path.basename(sys.argv[1]))[0]
+with open(os.path.join(sys.argv[sys.argv.index('--output_dir') + 1], stem + '.json'), 'w') as f:
+    json.dump({{'text': ' sutta', 'segments': [{{'start': 0.0, 'end': 4.0, 'text': 'sutta', 'avg_logprob': -1.5}}]}}, f)
+''')
+        fake_whisper.chmod(0o755)
+        handler = PALAScribeHandler.background(db_manager=self.db_manager)
+        handler.whisper_executable = lambda: str(fake_whisper)
+        handler.send_json_response = lambda data, status=200, headers=None: None
+        run_whisper_pass = handler.run_whisper_pass
+        def pass_then_cancel(*args, **kwargs):
+            result = run_whisper_pass(*args, **kwargs)
+            handler.handle_cancel_transcription(project_id)
+            return result
+        handler.run_whisper_pass = pass_then_cancel
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        original_dir = os.environ.get('AUDIO_TEXT_CONVERTER_DIR')
+        os.environ['AUDIO_TEXT_CONVERTER_DIR'] = self.temp_dir
+        try:
+            result = handler.execute_whisper_command(str(audio_path), model='large', fast_model='base',
+                                                     project_id=project_id)
+            self.assertEqual(result, {'success': False, 'error': 'Processing was cancelled'})
+            self.assertEqual(len((Path(self.temp_dir) / "calls.log").read_text().splitlines()), 1)
+        finally:
+            os.chdir(original_cwd)
+            if original_dir is None:
+                os.environ.pop('AUDIO_TEXT_CONVERTER_DIR', None)
+            else:
+                os.environ['AUDIO_TEXT_CONVERTER_DIR'] = original_dir
+
+    def test_concurrent_cli_passes_on_shared_audio(self):
+        """Test whisper CLI runs on the same stored file with different models keep their own results"""
+        fake_whisper = Path(self.temp_dir) / "whisper"
+        # base writes first and exits last, so a shared output file would hold small's result by then
+        fake_whisper.write_text(f'''#!{sys.executable}
+import json, os, sys, time
+model = sys.argv[sys.argv.index('--model') + 1]
+time.sleep(0.0 if model == 'base' else 0.3)
+stem = os.path.splitext(os.path.basename(sys.argv[1]))[0]
+output_dir = sys.argv[sys.argv.index('--output_dir') + 1] if '--output_dir' in sys.argv else '.'
+with open(os.path.join(output_dir, stem + '.json'), 'w') as f:
+    json.dump({{'text': 'heard by ' + model, 'segments': []}}, f)
+time.sleep(0.6 if model == 'base' else 0.0)
+''')
+        fake_whisper.chmod(0o755)
+        handler = PALAScribeHandler.background(db_manager=self.db_manager)
+        handler.whisper_executable = lambda: str(fake_whisper)
+        original_dir = os.environ.get('AUDIO_TEXT_CONVERTER_DIR')
+        os.environ['AUDIO_TEXT_CONVERTER_DIR'] = self.temp_dir
+        try:
+            audio_path = str(Path(self.temp_dir) / f"{'ab' * 32}.mp3")
+            results = {}
+            def run(model):
+                results[model] = handler.run_whisper_pass(audio_path, None, model, 'English')
+            threads = [threading.Thread(target=run, args=(model,)) for model in ('base', 'small')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+            
+            for model in ('base', 'small'):
+                self.assertEqual(results[model].get('result'), {'text': f'heard by {model}', 'segments': []})
+            self.assertEqual(list(Path(self.temp_dir).glob("*.json")), [])
+        finally:
+            if original_dir is None:
+                os.environ.pop('AUDIO_TEXT_CONVERTER_DIR', None)
+            else:
+                os.environ['AUDIO_TEXT_CONVERTER_DIR'] = original_dir
+
+    def test_pcm_cache_evicts_least_recently_used(self):
+        """Test decoded audio is tracked, evicted over budget and removed with its audio"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            cache = PcmCache(self.db_manager, budget_bytes=2 * (PcmCache.HEADER_BYTES + 64000))
+            cache.PIN_SECONDS = 0
+            audio_paths = []
+            for i in range(3):
+                project = self.db_manager.create_project(f"PCM {i}", "Test User")
+                audio_path = self.db_manager.save_audio_file(project['id'], f"talk {i}".encode(), "talk.mp3", "audio/mpeg")
+                audio_paths.append((project['id'], audio_path))
+                # Already decoded: one second of silence, as ffmpeg would have written it
+                PcmCache.path_for(audio_path).write_bytes(PcmCache.wav_header(64000) + b"\0" * 64000)
+            
+            self.assertTrue(cache.covers(audio_paths[0][1]))
+            self.assertFalse(cache.covers(os.path.join(tempfile.gettempdir(), "upload.mp3")))
+            header = struct.unpack('<4sI4s4sIHHIIHH4sI', PcmCache.path_for(audio_paths[0][1]).read_bytes()[:44])
+            self.assertEqual((header[0], header[5], header[6], header[7], header[12]), (b'RIFF', 3, 1, 16000, 64000))
+            self.assertEqual(cache.duration(audio_paths[0][1]), 1.0)
+            
+            for _, audio_path in audio_paths:
+                self.assertEqual(cache.get(audio_path), PcmCache.path_for(audio_path))
+                time.sleep(0.01)
+            # The least recently used file went once the third exceeded the budget
+            self.assertEqual([PcmCache.path_for(a).exists() for _, a in audio_paths], [False, True, True])
+            self.assertEqual(cache._decoding, {})
+            
+            self.db_manager.delete_project(audio_paths[1][0])
+            self.assertFalse(PcmCache.path_for(audio_paths[1][1]).exists())
+            conn = sqlite3.connect(self.db_path)
+            rows = conn.execute('SELECT audio_path FROM pcm_cache').fetchall()
+            conn.close()
+            self.assertEqual(rows, [(audio_paths[2][1],)])
+        finally:
+            os.chdir(original_cwd)
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "in-process engine needs numpy")
+    def test_concurrent_in_process_jobs_on_shared_audio(self):
+        """Test in-process jobs on the same decoded audio keep their own results"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        original_path, original_dir = os.environ.get('PATH', ''), os.environ.get('AUDIO_TEXT_CONVERTER_DIR')
+        try:
+            project = self.db_manager.create_project("Shared PCM", "Test User")
+            audio_path = self.db_manager.save_audio_file(project['id'], b"shared talk", "talk.mp3", "audio/mpeg")
+            PcmCache.path_for(audio_path).write_bytes(PcmCache.wav_header(64000) + b"\0" * 64000)
+            # Never run: the audio is already decoded, the server only checks ffmpeg is there
+            fake_ffmpeg = Path(self.temp_dir) / "bin" / "ffmpeg"
+            fake_ffmpeg.parent.mkdir()
+            fake_ffmpeg.write_text("#!/bin/sh\nexit 1\n")
+            fake_ffmpeg.chmod(0o755)
+            os.environ['PATH'] = f"{fake_ffmpeg.parent}{os.pathsep}{original_path}"
+            os.environ['AUDIO_TEXT_CONVERTER_DIR'] = self.temp_dir
+            
+            class FakeEngine:
+                precision = 'fp32'
+                def transcribe(self, samples, model, language, precision=None, threads=None):
+                    return {'text': f"heard by {model}", 'segments': [{'start': 0.0, 'end': 1.0, 'text': model}]}
+            handler = PALAScribeHandler.background(db_manager=self.db_manager, pcm_cache=PcmCache(self.db_manager),
+                                                   whisper_engine=FakeEngine(), resource_manager=ResourceManager())
+            # Both passes have written their result before either reads it back
+            both_done = threading.Barrier(2)
+            run_whisper_pass = handler.run_whisper_pass
+            handler.run_whisper_pass = lambda *args, **kwargs: (run_whisper_pass(*args, **kwargs), both_done.wait(10))[0]
+            results = {}
+            def run(model):
+                results[model] = handler.execute_whisper_command(audio_path, model=model)
+            threads = [threading.Thread(target=run, args=(model,)) for model in ('base', 'small')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=30)
+            
+            for model in ('base', 'small'):
+                self.assertTrue(results[model]['success'], results[model])
+                self.assertIn(f"heard by {model}", results[model]['transcription'])
+        finally:
+            os.environ['PATH'] = original_path
+            if original_dir is None:
+                os.environ.pop('AUDIO_TEXT_CONVERTER_DIR', None)
+            else:
+                os.environ['AUDIO_TEXT_CONVERTER_DIR'] = original_dir
+            os.chdir(original_cwd)
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+    def test_vad_inside_preview_windows(self):
+        """Test a windowed preview with VAD transcribes only the speech inside its windows"""
+        import numpy as np
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        original_path = os.environ.get('PATH', '')
+        try:
+            project = self.db_manager.create_project("Windowed VAD", "Test User")
+            audio_path = self.db_manager.save_audio_file(project['id'], b"long talk", "talk.mp3", "audio/mpeg")
+            rate = PcmCache.SAMPLE_RATE
+            rng = np.random.default_rng(0)
+            samples = (rng.standard_normal(300 * rate) * 1e-4).astype(np.float32)
+            # Speech in both windows, (0, 30) and (270, 300), and between them
+            for start, end in ((10, 20), (150, 200), (280, 285)):
+                samples[start * rate:end * rate] = np.sin(np.arange((end - start) * rate) * 0.1) * 0.3
+            PcmCache.path_for(audio_path).write_bytes(PcmCache.wav_header(samples.nbytes) + samples.tobytes())
+            fake_ffmpeg = Path(self.temp_dir) / "bin" / "ffmpeg"
+            fake_ffmpeg.parent.mkdir()
+            fake_ffmpeg.write_text("#!/bin/sh\nexit 1\n")
+            fake_ffmpeg.chmod(0o755)
+            os.environ['PATH'] = f"{fake_ffmpeg.parent}{os.pathsep}{original_path}"
+            
+            handler = PALAScribeHandler.background(db_manager=self.db_manager, pcm_cache=PcmCache(self.db_manager))
+            transcribed = []
+            def run_whisper_pass(processed_audio_path, *args, **kwargs):
+                transcribed.append((os.path.getsize(processed_audio_path) - PcmCache.HEADER_BYTES) / (4 * rate))
+                os.unlink(processed_audio_path)
+                return {'success': False, 'error': 'stop here'}
+            handler.run_whisper_pass = run_whisper_pass
+            handler.execute_whisper_command(audio_path, preview_mode=True, preview_duration=60, preview_windows=2, vad=True)
+            self.assertEqual(len(transcribed), 1)
+            self.assertAlmostEqual(transcribed[0], 16, delta=1)
+        finally:
+            os.environ['PATH'] = original_path
+            os.chdir(original_cwd)
+
+    def test_preview_windows_spread_across_recording(self):
+        """Test preview windows share the budget and cover beginning to end"""
+        windows = plan_preview_windows(3600, 60, 4)
+        self.assertEqual(windows, [(0.0, 15.0), (1195.0, 1210.0), (2390.0, 2405.0), (3585.0, 3600.0)])
+        self.assertEqual(plan_preview_windows(45, 60, 4), [(0.0, 45.0)])
+        
+        # One batched transcription of the windows maps back to where each came from
+        segments = remap_to_regions([{'start': 14.0, 'end': 17.0, 'text': 'a'}, {'start': 31.0, 'end': 33.0, 'text': 'b'}], windows)
+        self.assertEqual([(s['start'], s['end']) for s in segments], [(14.0, 15.0), (2391.0, 2393.0)])
+        
+        if NUMPY_AVAILABLE:
+            import numpy as np
+            original_cwd = os.getcwd()
+            os.chdir(self.temp_dir)
+            try:
+                project = self.db_manager.create_project("Windows", "Test User")
+                audio_path = self.db_manager.save_audio_file(project['id'], b"talk", "talk.mp3", "audio/mpeg")
+                samples = np.arange(10 * PcmCache.SAMPLE_RATE, dtype=np.float32)
+                PcmCache.path_for(audio_path).write_bytes(PcmCache.wav_header(samples.nbytes) + samples.tobytes())
+                cache = PcmCache(self.db_manager)
+                extracted = cache.extract(audio_path, [(0, 1), (9, 10)])
+                self.assertEqual(len(extracted), 2 * PcmCache.SAMPLE_RATE)
+                self.assertEqual(extracted[PcmCache.SAMPLE_RATE], 9 * PcmCache.SAMPLE_RATE)
+                # The CLI gets the same samples streamed into a WAV, a chunk at a time
+                cache.WRITE_CHUNK_SAMPLES = 3000
+                wav_path = Path(cache.write_regions(audio_path, [(0, 1), (9, 10)], "palascribe-test-"))
+                try:
+                    self.assertEqual(wav_path.read_bytes(), PcmCache.wav_header(extracted.nbytes) + extracted.tobytes())
+                finally:
+                    wav_path.unlink()
+            finally:
+                os.chdir(original_cwd)
+
+    def test_preview_segments_reused_by_full_run(self):
+        """Test a stored preview gives a full run its resume point and earlier segments"""
+        original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+        try:
+            project = self.db_manager.create_project("Resume", "Test User")
+            audio_path = self.db_manager.save_audio_file(project['id'], b"dhamma talk", "talk.mp3", "audio/mpeg")
+            audio_hash = audio_content_hash(audio_path)
+            self.assertEqual(audio_hash, hashlib.sha256(b"dhamma talk").hexdigest())
+            
+            self.db_manager.save_preview_result(audio_hash, 'small', 'English', 60.0, [
+                {'start': 0.0, 'end': 24.0, 'text': 'Welcome to the retreat.'},
+                {'start': 24.0, 'end': 52.5, 'text': 'Tonight we begin with the breath.'},
+                {'start': 52.5, 'end': 59.8, 'text': 'Sit comfort'}
+            ])
+            resume = self.db_manager.get_preview_resume_point(audio_hash, 'small', 'English')
+            self.assertEqual(resume['seconds'], 52.5)
+            self.assertEqual(len(resume['segments']), 2)
+            self.assertEqual(resume['text'], 'Welcome to the retreat. Tonight we begin with the breath.')
+            
+            # Keyed by model and language; removed with the audio
+            self.assertIsNone(self.db_manager.get_preview_resume_point(audio_hash, 'medium', 'English'))
+            self.db_manager.delete_project(project['id'])
+            self.assertIsNone(self.db_manager.get_preview_result(audio_hash, 'small', 'English'))
+        finally:
+            os.chdir(original_cwd)
+
+    def test_segments_and_content_version(self):
+        """Test segment storage and content version bumps"""
+        project = self.db_manager.create_project("Segments Test", "Test User")
+        project_id = project['id']
+        self.assertEqual(project['version'], 0)
+        
+        segments = parse_srt_content("1\n00:00:00,000 --> 00:00:02,500\nHello\n\n2\n00:00:02,500 --> 00:00:05,000\nworld\n")
+        self.db_manager.update_project(project_id, {'transcription': 'Hello world', 'segments': segments})
+        
+        self.assertEqual(self.db_manager.get_segments(project_id), [
+            {'start': 0.0, 'end': 2.5, 'text': 'Hello'},
+            {'start': 2.5, 'end': 5.0, 'text': 'world'}
+        ])
+        self.assertEqual(self.db_manager.get_project(project_id)['version'], 1)
+        
+        # Non-content updates keep the version
+        self.db_manager.update_project(project_id, {'status': 'ready'})
+        self.assertEqual(self.db_manager.get_project(project_id)['version'], 1)
+        
+        # A window finds segments by their end, however long ago they started
+        chant = {'start': 5.0, 'end': 95.0, 'text': 'long chant'}
+        self.db_manager.update_project(project_id, {'segments': segments + [chant]})
+        self.assertEqual(self.db_manager.get_segments(project_id, 80, 90), [chant])
+        self.assertEqual([seg['text'] for seg in self.db_manager.get_segments(project_id, 2.5, 5)], ['world'])
+
+    def test_text_bodies_deduplicated_and_compressed(self):
+        """Test text bodies are stored once per distinct content, outside the projects row"""
+        project = self.db_manager.create_project("Texts Test", "Test User")
+        project_id = project['id']
+        body = "Sabbe sattā bhavantu sukhitattā. " * 500
+        self.db_manager.update_project(project_id, {'transcription': body, 'formatted_text': body, 'edited_text': body})
+        
+        retrieved = self.db_manager.get_project(project_id)
+        self.assertEqual(retrieved['transcription'], body)
+        self.assertEqual(retrieved['editedText'], body)
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), SUM(LENGTH(data)) FROM text_blobs")
+        count, stored = cursor.fetchone()
+        self.assertEqual(count, 1)
+        self.assertLess(stored, len(body.encode('utf-8')) / 10)
+        cursor.execute("SELECT transcription FROM projects WHERE id = ?", (project_id,))
+        self.assertIsNone(cursor.fetchone()[0])
+        conn.close()
         
-        # Verify file was saved
-        self.assertTrue(Path(file_path).exists())
+        # Summary listing skips bodies; full listings load them a chunk of ids at a time
+        self.assertIsNone(self.db_manager.get_all_projects(include_text=False)[0]['transcription'])
+        others = [self.db_manager.create_project(f"Texts Test {i}", "Test User")['id'] for i in range(4)]
+        for i, other_id in enumerate(others):
+            self.db_manager.update_project(other_id, {'edited_text': f"Draft {i}"})
+        self.db_manager.SQL_PARAMETER_CHUNK = 2
+        listed = {p['id']: p for p in self.db_manager.get_all_projects()}
+        self.assertEqual([listed[other_id]['editedText'] for other_id in others], [f"Draft {i}" for i in range(4)])
+        self.assertEqual(listed[project_id]['transcription'], body)
+        # Deleting the project releases the blob
+        self.db_manager.delete_project(project_id)
+        conn = sqlite3.connect(self.db_path)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM text_blobs").fetchone()[0], len(others))
+        conn.close()
+    
+    def test_search_folds_diacritics(self):
+        """Test full-text search over text and segments with diacritic folding"""
+        project = self.db_manager.create_project("Search Test", "Test User")
+        project_id = project['id']
+        self.db_manager.update_project(project_id, {
+            'transcription': 'Today we discuss the Satipaṭṭhāna Sutta.',
+            'segments': [
+                {'start': 0.0, 'end': 3.0, 'text': 'Today we discuss'},
+                {'start': 3.0, 'end': 6.0, 'text': 'the Satipaṭṭhāna Sutta.'}
+            ]
+        })
+        
+        results = self.db_manager.search('satipatthana')
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(r['projectId'] == project_id for r in results))
+        segment_hit = [r for r in results if r['start'] is not None][0]
+        self.assertEqual((segment_hit['start'], segment_hit['end']), (3.0, 6.0))
+        self.assertIn('<mark>Satipaṭṭhāna</mark>', segment_hit['snippet'])
+        
+        # Edits replace the indexed text; deletion removes the project from results
+        self.db_manager.update_project(project_id, {'edited_text': 'Anicca and anattā'})
+        self.assertEqual(len([r for r in self.db_manager.search('anatta') if r['start'] is None]), 1)
+        self.db_manager.delete_project(project_id)
+        self.assertEqual(self.db_manager.search('satipatthana'), [])
+        self.assertEqual(self.db_manager.search('"'), [])
+
+class TestAudioRegions(unittest.TestCase):
+    """Test which parts of a recording Whisper is given"""
+
+    def setUp(self):
+        """Set up a scratch directory"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test files"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    @unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+    def test_detect_speech_regions(self):
+        """Test the energy VAD finds speech between long silences"""
+        import numpy as np
+        rate = 16000
+        rng = np.random.default_rng(0)
+        silence = lambda seconds: (rng.standard_normal(int(seconds * rate)) * 1e-4).astype(np.float32)
+        speech = lambda seconds: (np.sin(np.arange(int(seconds * rate)) * 0.1) * 0.3).astype(np.float32)
+        # A short pause inside speech is kept; a long sitting is skipped
+        samples = np.concatenate([silence(30), speech(5), silence(0.5), speech(5), silence(60), speech(10)])
+        regions = detect_speech_regions(samples, rate)
+        self.assertEqual(len(regions), 2)
+        self.assertAlmostEqual(regions[0][0], 29.75, delta=0.05)
+        self.assertAlmostEqual(regions[0][1], 40.75, delta=0.05)
+        self.assertAlmostEqual(regions[1][0], 100.25, delta=0.05)
+        self.assertAlmostEqual(regions[1][1], 110.5, delta=0.05)
+        self.assertEqual(detect_speech_regions(silence(5), rate), [])
+
+    def test_segments_remapped_to_original_timeline(self):
+        """Test segments of speech-only audio are moved back to the recording's timeline"""
+        regions = [(10.0, 20.0), (100.0, 105.0)]
+        segments = remap_to_regions([
+            {'start': 0.0, 'end': 4.0, 'text': 'first'},
+            {'start': 8.0, 'end': 10.0, 'text': 'ends at the join'},
+            {'start': 10.0, 'end': 15.5, 'text': 'after the silence'}
+        ], regions)
+        self.assertEqual([(s['start'], s['end']) for s in segments],
+                         [(10.0, 14.0), (18.0, 20.0), (100.0, 105.0)])
+
+    def test_cascade_escalates_low_confidence_segments(self):
+        """Test only unsure speech segments go to the large model, padded and merged"""
+        segments = [
+            {'start': 0.0, 'end': 5.0, 'text': 'clear', 'avg_logprob': -0.2, 'no_speech_prob': 0.0},
+            {'start': 5.0, 'end': 8.0, 'text': 'unsure', 'avg_logprob': -1.1, 'no_speech_prob': 0.1},
+            {'start': 8.2, 'end': 9.0, 'text': 'unsure too', 'avg_logprob': -0.9, 'no_speech_prob': 0.1},
+            {'start': 20.0, 'end': 22.0, 'text': 'noise', 'avg_logprob': -1.5, 'no_speech_prob': 0.9},
+            {'start': 30.0, 'end': 31.0, 'text': 'mumbled', 'avg_logprob': -0.7, 'no_speech_prob': None}
+        ]
+        self.assertEqual(escalation_regions(segments, threshold=-0.6), [(4.8, 9.2), (29.8, 31.2)])
+        self.assertEqual(escalation_regions(segments, threshold=-2.0), [])
+        self.assertEqual(model_relative_cost('base.en') / model_relative_cost('large-v3'), 1 / 16)
+
+    def test_whisper_engine_precision(self):
+        """Test the in-process engine takes fp32 or int8 weights and caches models per precision"""
+        engine = WhisperEngine(precision='int8', cache_dir=self.temp_dir)
+        self.assertEqual(engine.precision, 'int8')
+        self.assertEqual(engine.cache_dir, Path(self.temp_dir))
+        with self.assertRaises(ValueError):
+            WhisperEngine(precision='int4')
+        
+        # Jobs override the server default; each precision is its own loaded model
+        loaded = []
+        fake_model = type('FakeModel', (), {'transcribe': lambda self, samples, **options: options})()
+        engine._model = lambda name, precision: loaded.append((name, precision)) or (fake_model, threading.Lock())
+        self.assertFalse(engine.transcribe([], model='base')['fp16'])
+        self.assertNotIn('fp16', engine.transcribe([], model='base', precision='fp32'))
+        self.assertEqual(loaded, [('base', 'int8'), ('base', 'fp32')])
+
+class TestWhisperScheduling(unittest.TestCase):
+    """Test how Whisper runs share the machine and report back"""
+
+    def setUp(self):
+        """Set up a scratch directory"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Clean up test files"""
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_resource_manager_splits_cores(self):
+        """Test concurrent passes share the cores instead of each taking all of them"""
+        manager = ResourceManager(cpus=range(8), pin=True, concurrency=3)
+        background = manager.acquire('background')
+        preview = manager.acquire('interactive')
+        self.assertEqual((background['threads'], background['nice']), (2, 10))
+        self.assertEqual((preview['threads'], preview['nice']), (2, 0))
+        third = manager.acquire('interactive')
+        # The least used cores go to the newest pass
+        self.assertEqual(len(set(preview['cpus']) & set(third['cpus'])), 0)
+        self.assertEqual(len(set(background['cpus']) | set(preview['cpus']) | set(third['cpus'])), 6)
+        self.assertEqual(manager.environment(third, base={})['OMP_NUM_THREADS'], '2')
+        self.assertEqual(manager.command(third, ['whisper', 'a.wav'])[-2:], ['whisper', 'a.wav'])
+        self.assertLessEqual(sum(lease['threads'] for lease in (background, preview, third)), 8)
+        
+        for lease in (background, preview, third):
+            manager.release(lease)
+        self.assertEqual(manager.snapshot()['workers'], [])
+        
+        # A lone pass gets every core; later ones only what is left, down to one thread
+        manager = ResourceManager(cpus=range(8))
+        leases = [manager.acquire() for _ in range(3)]
+        self.assertEqual([lease['threads'] for lease in leases], [8, 1, 1])
+        manager = ResourceManager(cpus=range(8), concurrency=2)
+        leases = [manager.acquire() for _ in range(3)]
+        self.assertEqual([lease['threads'] for lease in leases], [4, 4, 1])
+        manager.release(leases[0])
+        self.assertEqual(manager.acquire()['threads'], 3)
+
+    def test_short_jobs_batched_into_one_run(self):
+        """Test short jobs with the same model and language share one Whisper run"""
+        batcher = WhisperBatcher(window_seconds=1, max_files=3)
+        runs, results = [], {}
+        def run_batch(paths):
+            runs.append(paths)
+            return {'returncode': 0, 'paths': paths}
+        def submit(key, path):
+            results[path] = batcher.submit(key, path, run_batch)
+        
+        threads = [threading.Thread(target=submit, args=(('base', 'English'), f"clip{i}.wav")) for i in range(3)]
+        threads.append(threading.Thread(target=submit, args=(('small', 'English'), 'other.wav')))
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        for thread in threads:
+            thread.join()
         
-        # Verify project was updated
-        updated_project = self.db_manager.get_project(project_id)
-        self.assertEqual(updated_project['audio_file_name'], original_name)
-        self.assertEqual(updated_project['audio_file_path'], file_path)
+        # A full batch runs without waiting out the window; other keys run apart
+        self.assertEqual(sorted(map(sorted, runs)), [['clip0.wav', 'clip1.wav', 'clip2.wav'], ['other.wav']])
+        self.assertEqual(results['clip1.wav']['paths'], results['clip0.wav']['paths'])
         
-        # Verify file contents
-        with open(file_path, 'rb') as f:
-            saved_data = f.read()
-        self.assertEqual(saved_data, test_audio_data)
+        batcher.window_seconds = 0
+        self.assertIn('error', batcher.submit(('base', 'English'), 'bad.wav', lambda paths: 1 / 0))
+
+        # Previews run at once unless interactive batching is asked for
+        handler = PALAScribeHandler.background(whisper_batcher=WhisperBatcher(window_seconds=30))
+        passes = []
+        handler._whisper_pass = lambda *args: passes.append(args[8]) or {}
+        for priority in ('interactive', 'background'):
+            handler.run_whisper_pass('clip.wav', None, 'base', 'English', priority=priority, audio_seconds=60)
+        handler.whisper_batcher.priorities = ('background', 'interactive')
+        handler.run_whisper_pass('clip.wav', None, 'base', 'English', priority='interactive', audio_seconds=60)
+        self.assertEqual(passes, [None, 'background', 'interactive'])
+
+    def test_cancelled_queue_item_not_run_on_resubmit(self):
+        """Test resubmitting a cancelled project runs only the new submission's options"""
+        ran = []
+        handler = type('FakeHandler', (), {
+            'run_transcription_job': lambda self, project_id, **options: ran.append(options) or {'success': True}})()
+        queue_jobs = TranscriptionQueue(lambda: handler, workers=1)
+        queue_jobs.submit('p1', model='base')
+        self.assertEqual(queue_jobs.cancel('p1'), 1)
+        queue_jobs.submit('p1', model='large')
+        queue_jobs.start()
+        queue_jobs.jobs.join()
+        self.assertEqual(ran, [{'model': 'large'}])
+        self.assertEqual(queue_jobs.status()['totals'], {'submitted': 2, 'succeeded': 1, 'failed': 0, 'cancelled': 1})
+
+    def test_output_capture_is_bounded(self):
+        """Test child output is streamed to a tail and a rotating log instead of held whole"""
+        import subprocess
+        log_path = Path(self.temp_dir) / "job" / "whisper.log"
+        process = subprocess.Popen([sys.executable, '-c', (
+            "import sys\n"
+            "print('Traceback: out of memory', file=sys.stderr)\n"
+            "for i in range(5000):\n"
+            "    print(f'[{i}] saṃyutta ñāṇa')\n")],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8',
+            env=dict(os.environ, PYTHONIOENCODING='utf-8'))
+        capture = OutputCapture(log_path, tail_lines=10, max_log_bytes=20000).start(process)
+        process.wait(timeout=30)
+        capture.finish()
+        
+        self.assertEqual(capture.stdout.splitlines(), [f"[{i}] saṃyutta ñāṇa" for i in range(4990, 5000)])
+        self.assertEqual(capture.stderr, "Traceback: out of memory\n")
+        # Rotation counts bytes, not characters
+        self.assertLessEqual(log_path.stat().st_size, 20000)
+        self.assertLessEqual(log_path.with_name("whisper.log.1").stat().st_size, 20000)
+        self.assertEqual(read_log_tail(log_path, 2).splitlines(), ["[4998] saṃyutta ñāṇa", "[4999] saṃyutta ñāṇa"])
 
 class TestServerAPI(unittest.TestCase):
     """Test HTTP API endpoints"""
@@ -272,6 +1244,14 @@ class TestServerAPI(unittest.TestCase):
         self.assertIn('projects', data)
         self.assertGreaterEqual(len(data['projects']), 3)
         
+        # Text bodies only on request
+        project_id = data['projects'][0]['id']
+        self.db_manager.update_project(project_id, {'edited_text': 'Listed draft'})
+        listed = {p['id']: p for p in requests.get(f"{self.base_url}/projects").json()['projects']}
+        self.assertIsNone(listed[project_id]['editedText'])
+        listed = {p['id']: p for p in requests.get(f"{self.base_url}/projects?fields=full").json()['projects']}
+        self.assertEqual(listed[project_id]['editedText'], 'Listed draft')
+        
     def test_get_single_project_api(self):
         """Test retrieving single project via API"""
         # Create project
@@ -393,6 +1373,233 @@ class TestServerAPI(unittest.TestCase):
         project3 = response3.json()
         self.assertEqual(project3['name'], 'Duplicate Test_2')
 
+    def test_segments_window_api(self):
+        """Test fetching only the segments overlapping a time window"""
+        created = requests.post(f"{self.base_url}/projects", json={'name': 'Segments API Test'}).json()
+        project_id = created['id']
+        self.db_manager.update_project(project_id, {'segments': [
+            {'start': 0.0, 'end': 4.0, 'text': 'one', 'avg_logprob': -0.2},
+            {'start': 4.0, 'end': 8.0, 'text': 'two'},
+            {'start': 8.0, 'end': 12.0, 'text': 'three'}
+        ]})
+        
+        response = requests.get(f"{self.base_url}/projects/{project_id}/segments?from=5&to=9")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['text'] for s in response.json()['segments']], ['two', 'three'])
+        
+        segments = requests.get(f"{self.base_url}/projects/{project_id}/segments").json()['segments']
+        self.assertEqual(len(segments), 3)
+        self.assertEqual(segments[0]['avgLogprob'], -0.2)
+        
+        response = requests.get(f"{self.base_url}/projects/{project_id}/segments?from=abc")
+        self.assertEqual(response.status_code, 400)
+    
+    def test_export_formats_api(self):
+        """Test lazy export with caching and ETag revalidation"""
+        created = requests.post(f"{self.base_url}/projects", json={'name': 'Export Test'}).json()
+        project_id = created['id']
+        self.db_manager.update_project(project_id, {
+            'transcription': 'Hello world',
+            'segments': [{'start': 0.0, 'end': 1.25, 'text': 'Hello world'}]
+        })
+        
+        response = requests.get(f"{self.base_url}/projects/{project_id}/export?format=srt")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "1\n00:00:00,000 --> 00:00:01,250\nHello world\n")
+        etag = response.headers['ETag']
+        
+        # Unchanged content revalidates with an empty 304
+        response = requests.get(f"{self.base_url}/projects/{project_id}/export?format=srt",
+                                headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        
+        response = requests.get(f"{self.base_url}/projects/{project_id}/export?format=vtt")
+        self.assertTrue(response.text.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.250"))
+        
+        # Editing the text produces a new version and a new artifact
+        self.db_manager.update_project(project_id, {'edited_text': 'Edited text'})
+        response = requests.get(f"{self.base_url}/projects/{project_id}/export?format=txt",
+                                headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, 'Edited text')
+        self.assertNotEqual(response.headers['ETag'], etag)
+        
+        response = requests.get(f"{self.base_url}/projects/{project_id}/export?format=doc")
+        self.assertEqual(response.status_code, 400)
+
+    def test_incremental_project_sync_api(self):
+        """Test ?since= delta sync and collection ETag revalidation"""
+        response = requests.get(f"{self.base_url}/projects?fields=summary")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        sync_token = response.json()['syncToken']
+        
+        # Unchanged collection: empty 304
+        response = requests.get(f"{self.base_url}/projects", params={'since': sync_token},
+                                headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        
+        created = requests.post(f"{self.base_url}/projects", json={'name': 'Sync API Test'}).json()
+        response = requests.get(f"{self.base_url}/projects", params={'since': sync_token},
+                                headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn(created['id'], [p['id'] for p in data['projects']])
+        self.assertFalse(data['full'])
+        
+        requests.delete(f"{self.base_url}/projects/{created['id']}")
+        data = requests.get(f"{self.base_url}/projects", params={'since': sync_token}).json()
+        self.assertIn(created['id'], data['deleted'])
+        self.assertNotIn(created['id'], [p['id'] for p in data['projects']])
+        
+        response = requests.get(f"{self.base_url}/projects?since=yesterday")
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch_project_api(self):
+        """Test PATCH acks with the new version and returns 409 on conflict"""
+        created = requests.post(f"{self.base_url}/projects", json={'name': 'Patch API Test'}).json()
+        project_id = created['id']
+        self.db_manager.update_project(project_id, {'edited_text': 'Hello world'})
+        version = self.db_manager.get_project(project_id)['version']
+        
+        edit = {'editedText': [{'start': 6, 'end': 11, 'text': 'Dhamma'}]}
+        response = requests.patch(f"{self.base_url}/projects/{project_id}",
+                                  json={'version': version, 'edits': edit, 'editedBy': 'Ajahn Reviewer'})
+        self.assertEqual(response.status_code, 200)
+        ack = response.json()
+        self.assertEqual(ack['version'], version + 1)
+        self.assertNotIn('editedText', ack)
+        self.assertEqual(self.db_manager.get_project(project_id)['editedText'], 'Hello Dhamma')
+        self.assertEqual(self.db_manager.get_history(project_id)[-1]['editor'], 'Ajahn Reviewer')
+        
+        # Stale version via If-Match
+        response = requests.patch(f"{self.base_url}/projects/{project_id}", json={'edits': edit},
+                                  headers={'If-Match': f'"{version}"'})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], version + 1)
+        
+        response = requests.patch(f"{self.base_url}/projects/{project_id}", json={'edits': edit})
+        self.assertEqual(response.status_code, 428)
+        response = requests.patch(f"{self.base_url}/projects/{project_id}",
+                                  json={'version': version + 1, 'edits': {'editedText': [{'start': 0, 'end': 99, 'text': ''}]}})
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_api(self):
+        """Test history listing and rebuilding a past version"""
+        created = requests.post(f"{self.base_url}/projects", json={'name': 'History API Test'}).json()
+        project_id = created['id']
+        requests.put(f"{self.base_url}/projects/{project_id}", json={'editedText': 'First draft'})
+        requests.put(f"{self.base_url}/projects/{project_id}", json={'editedText': 'Second draft'})
+        
+        response = requests.get(f"{self.base_url}/projects/{project_id}/history")
+        self.assertEqual(response.status_code, 200)
+        revisions = response.json()['revisions']
+        self.assertEqual([r['revision'] for r in revisions], [1, 2])
+        
+        response = requests.get(f"{self.base_url}/projects/{project_id}/versions/{revisions[0]['version']}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['editedText'], 'First draft')
+        
+        self.assertEqual(requests.get(f"{self.base_url}/projects/{project_id}/versions/0").status_code, 404)
+        self.assertEqual(requests.get(f"{self.base_url}/projects/{project_id}/versions/latest").status_code, 400)
+
+    def test_storage_gc_api(self):
+        """Test GC status and dry-run reporting endpoints"""
+        response = requests.get(f"{self.base_url}/admin/gc")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('totals', response.json())
+        
+        response = requests.post(f"{self.base_url}/admin/gc?dryRun=1")
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertTrue(report['dryRun'])
+        self.assertTrue(report['complete'])
+
+    def test_remote_workers_api(self):
+        """Test remote workers lease queued jobs, fetch audio by range and report results"""
+        audio = bytes(range(256)) * 40
+        project_ids = []
+        for n in range(3):
+            project = requests.post(f"{self.base_url}/projects", json={'name': f"Remote {n}"}).json()
+            response = requests.post(f"{self.base_url}/projects/{project['id']}/audio",
+                                     files={'audio': (f"remote{n}.wav", audio + bytes([n]), 'audio/wav')})
+            self.assertEqual(response.status_code, 200)
+            response = requests.post(f"{self.base_url}/projects/{project['id']}/transcribe",
+                                     json={'model': 'small', 'remote': True})
+            self.assertEqual(response.status_code, 202)
+            project_ids.append(project['id'])
+        
+        # What a worker would not do is refused rather than dropped
+        for option in ({'preview': True}, {'previewWindows': 4}, {'vad': True}, {'cascade': True}, {'precision': 'int8'}):
+            response = requests.post(f"{self.base_url}/projects/{project_ids[0]}/transcribe",
+                                     json={'model': 'small', 'remote': True, **option})
+            self.assertEqual(response.status_code, 400, option)
+            self.assertIn(next(iter(option)), response.json()['error'])
+        
+        received = []
+        def transcribe(audio_path, options):
+            data = Path(audio_path).read_bytes()
+            received.append(data)
+            return {'text': f"sutta {data[10240]} {options['model']}", 'segments': [{'start': 0, 'end': 1, 'text': 'sutta'}]}
+        workers = [RemoteWorker(self.base_url, worker_id=f"w{n}", transcribe=transcribe, chunk_bytes=4000)
+                   for n in range(2)]
+        def drain(worker):
+            while worker.run_once():
+                pass
+        threads = [threading.Thread(target=drain, args=(worker,)) for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+        
+        self.assertEqual(len(received), 3)
+        for n, project_id in enumerate(project_ids):
+            project = requests.get(f"{self.base_url}/projects/{project_id}").json()
+            self.assertIn(Path(project['audioFilePath']).read_bytes(), received)
+            self.assertEqual(project['status'], 'Needs_Review')
+            # Corrected on the server, as for a local run
+            self.assertEqual(project['transcription'], f"Sutta {n} small")
+        
+        # Without the lease token neither the audio nor a result is accepted
+        self.db_manager.enqueue_job(project_ids[0])
+        job = requests.post(f"{self.base_url}/workers/lease", json={'workerId': 'w3'}).json()
+        self.assertEqual(requests.get(f"{self.base_url}{job['audio']['url']}").status_code, 409)
+        response = requests.post(f"{self.base_url}/workers/jobs/{job['jobId']}/result",
+                                 json={'leaseToken': 'guess', 'success': True, 'text': 'forged'})
+        self.assertEqual(response.status_code, 409)
+        self.assertNotIn('lease_token', requests.get(f"{self.base_url}/workers/jobs/{job['jobId']}").json())
+
+    def test_job_log_api(self):
+        """Test the tail of a run's Whisper output is served by project or remote job id"""
+        project = requests.post(f"{self.base_url}/projects", json={'name': 'Logged Run'}).json()
+        self.assertEqual(requests.get(f"{self.base_url}/jobs/{project['id']}/log").status_code, 404)
+        write_job_log(project['id'], ''.join(f"line {i}\n" for i in range(300)))
+        
+        response = requests.get(f"{self.base_url}/jobs/{project['id']}/log?lines=3")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text.splitlines(), ["line 297", "line 298", "line 299"])
+        
+        # A remote job's id gives its own log; the project's gives the latest pass
+        job = self.db_manager.enqueue_job(project['id'])
+        self.db_manager.cancel_jobs(project['id'])
+        self.assertEqual(requests.get(f"{self.base_url}/jobs/{job['id']}/log").status_code, 404)
+        time.sleep(0.01)
+        write_job_log(project['id'], ''.join(f"remote {i}\n" for i in range(300)), job['id'])
+        self.assertEqual(len(requests.get(f"{self.base_url}/jobs/{job['id']}/log").text.splitlines()), 200)
+        time.sleep(0.01)
+        write_job_log(project['id'], "next pass\n")
+        self.assertEqual(requests.get(f"{self.base_url}/jobs/{project['id']}/log").text, "next pass\n")
+        self.assertEqual(requests.get(f"{self.base_url}/jobs/{job['id']}/log?lines=1").text, "remote 299\n")
+        self.assertEqual(requests.get(f"{self.base_url}/jobs/..%2F..%2Fetc/log").status_code, 404)
+        
+        # Earlier passes are kept, up to JOB_LOGS_KEPT
+        for i in range(JOB_LOGS_KEPT + 2):
+            write_job_log(project['id'], f"pass {i}\n")
+        logs = sorted((Path("exports") / project['id'] / "logs").glob("whisper-*.log"))
+        self.assertEqual(len(logs), JOB_LOGS_KEPT)
+        self.assertEqual(logs[-1].read_text(), f"pass {JOB_LOGS_KEPT + 1}\n")
+
 class TestMultiUserFunctionality(unittest.TestCase):
     """Test multi-user scenarios"""
     
@@ -442,6 +1649,33 @@ class TestMultiUserFunctionality(unittest.TestCase):
         project_ids = [p['id'] for p in results]
         self.assertEqual(len(set(project_ids)), 10)  # All unique
         
+    def test_concurrent_duplicate_names(self):
+        """Test concurrent creation with the same name yields unique names"""
+        results = []
+        errors = []
+        
+        def create_project():
+            try:
+                results.append(self.db_manager.create_project("Same Name", "User"))
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=create_project) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(errors), 0, f"Errors occurred: {errors}")
+        names = sorted(p['name'] for p in results)
+        self.assertEqual(names, sorted(["Same Name"] + [f"Same Name_{i}" for i in range(1, 10)]))
+        
+        # Suffixes taken explicitly are skipped, renames into a taken name fail
+        self.db_manager.create_project("Same Name_10", "User")
+        self.assertEqual(self.db_manager.create_project("Same Name", "User")['name'], "Same Name_11")
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db_manager.update_project(results[0]['id'], {'name': 'Same Name_11'})
+        
     def test_data_persistence_across_instances(self):
         """Test that data persists across database manager instances"""
         # Create project with first instance
@@ -467,6 +1701,8 @@ def run_server_tests():
     
     # Add test classes
     suite.addTests(loader.loadTestsFromTestCase(TestDatabaseManager))
+    suite.addTests(loader.loadTestsFromTestCase(TestAudioRegions))
+    suite.addTests(loader.loadTestsFromTestCase(TestWhisperScheduling))
     suite.addTests(loader.loadTestsFromTestCase(TestServerAPI))
     suite.addTests(loader.loadTestsFromTestCase(TestMultiUserFunctionality))
     
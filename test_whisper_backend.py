@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Whisper Backend Batch CLI Tests
+Input expansion, resume bookkeeping and parallel runs against a stub whisper
+"""
+
+import unittest
+import json
+import tempfile
+import shutil
+import subprocess
+import importlib.util
+import sys
+import os
+from pathlib import Path
+
+# Add the project directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from palascribe_server import apply_pali_corrections
+from whisper_backend import completed_files, expand_inputs
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'whisper_backend.py')
+
+# Writes <stem>.json into --output_dir like the whisper CLI; the text is the audio file's content
+STUB_WHISPER = '''#!{python}
+import json, os, sys, time
+args = sys.argv[1:]
+output_dir = args[args.index('--output_dir') + 1] if '--output_dir' in args else '.'
+audio = args[0]
+time.sleep(0.5)  # Long enough for parallel runs to overlap
+with open(audio, encoding='utf-8') as f:
+    text = f.read()
+stem = os.path.splitext(os.path.basename(audio))[0]
+with open(os.path.join(output_dir, stem + '.json'), 'w', encoding='utf-8') as f:
+    json.dump({{'text': ' ' + text, 'segments': [{{'start': 0.0, 'end': 1.0, 'text': text}}]}}, f)
+'''
+
+class TestInputBookkeeping(unittest.TestCase):
+    """Test which files a batch run takes on"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_expand_inputs(self):
+        """Test files, recursive globs and a manifest expand in order, once each"""
+        root = Path(self.temp_dir)
+        for name in ("side_a/tape01.mp3", "side_b/tape01.mp3", "side_b/tape02.mp3", "loose.wav"):
+            (root / name).parent.mkdir(parents=True, exist_ok=True)
+            (root / name).write_text("audio")
+        manifest = root / "manifest.txt"
+        manifest.write_text(f"# retreat tapes\n\n{root / 'loose.wav'}\n{root / 'side_a' / 'tape01.mp3'}\n")
+
+        files = expand_inputs([str(root / "**" / "tape*.mp3")], str(manifest))
+        self.assertEqual(files, [str(root / "side_a" / "tape01.mp3"), str(root / "side_b" / "tape01.mp3"),
+                                 str(root / "side_b" / "tape02.mp3"), str(root / "loose.wav")])
+
+    def test_completed_files(self):
+        """Test only successful, complete result lines count as done"""
+        output = Path(self.temp_dir) / "results.jsonl"
+        self.assertEqual(completed_files(str(output)), set())
+        output.write_text(json.dumps({"file": "/a.mp3", "success": True}) + "\n"
+                          + json.dumps({"file": "/b.mp3", "success": False, "error": "bad"}) + "\n"
+                          + '{"file": "/c.mp3", "succ')
+        self.assertEqual(completed_files(str(output)), {"/a.mp3"})
+
+@unittest.skipIf(importlib.util.find_spec('whisper') is not None, "runs against the stub whisper CLI only")
+class TestBatchRun(unittest.TestCase):
+    """Test whisper_backend.py runs end to end with a stub whisper"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        root = Path(self.temp_dir)
+        stub = root / "bin" / "whisper"
+        stub.parent.mkdir()
+        stub.write_text(STUB_WHISPER.format(python=sys.executable))
+        stub.chmod(0o755)
+        self.env = dict(os.environ, PATH=f"{stub.parent}{os.pathsep}{os.environ.get('PATH', '')}",
+                        AUDIO_TEXT_CONVERTER_DIR=self.temp_dir)
+        # Same stem in two folders, as archive batches are laid out
+        self.audio = {}
+        for side in ("side_a", "side_b"):
+            path = root / "tapes" / side / "tape01.mp3"
+            path.parent.mkdir(parents=True)
+            path.write_text(f"recording from {side}")
+            self.audio[str(path)] = f"recording from {side}"
+        self.output = root / "results.jsonl"
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def run_backend(self, *args):
+        return subprocess.run([sys.executable, BACKEND, str(Path(self.temp_dir) / "tapes" / "**" / "*.mp3"),
+                               "--output", str(self.output), *args],
+                              capture_output=True, text=True, env=self.env, timeout=60)
+
+    def records(self):
+        records = []
+        for line in self.output.read_text().splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass
+        return records
+
+    def test_same_stem_files_in_parallel(self):
+        """Test files sharing a stem get their own results when run at the same time"""
+        run = self.run_backend("--workers", "2")
+        self.assertEqual(run.returncode, 0, run.stderr)
+
+        records = self.records()
+        self.assertEqual(sorted(r['file'] for r in records), sorted(self.audio))
+        for record in records:
+            self.assertTrue(record['success'], record)
+            self.assertEqual(record['transcription'], apply_pali_corrections(self.audio[record['file']]))
+
+    def test_resume_after_interrupted_run(self):
+        """Test --resume skips finished files and starts after a partial line"""
+        done, remaining = sorted(self.audio)
+        self.output.write_text(json.dumps({"file": done, "success": True, "transcription": "earlier"}) + "\n"
+                               + '{"file": "' + remaining[:10])
+
+        run = self.run_backend("--resume")
+        self.assertEqual(run.returncode, 0, run.stderr)
+        self.assertIn("1 files already transcribed, 1 to go", run.stderr)
+
+        lines = self.output.read_text().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[2])['file'], remaining)
+        self.assertEqual([r['file'] for r in self.records()], [done, remaining])
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            subprocess.run([sys.executable, BACKEND, "--resume", remaining], capture_output=True,
+                           env=self.env, timeout=60, check=True)
+
+if __name__ == '__main__':
+    unittest.main()
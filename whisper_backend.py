@@ -2,6 +2,15 @@
 """
 Local Whisper Backend Service
 Executes Whisper commands and returns results to the web interface
+
+Batch usage:
+    whisper_backend.py [--workers N] [--model M] [--language L] [--manifest FILE]
+                       [--output results.jsonl] [--resume] [audio files or globs ...]
+
+Each file's result is written as one JSON line as soon as it finishes, with
+the same Pali corrections and paragraph formatting as the server. Every
+worker keeps its model loaded across files when openai-whisper is
+importable, and otherwise runs the whisper CLI per file.
 """
 
 import sys
@@ -9,20 +18,24 @@ import os
 import subprocess
 import json
 import time
+import glob
+import shutil
+import tempfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+from palascribe_server import (WHISPER_OUTPUT_DIR_PREFIX, apply_pali_corrections, apply_pali_corrections_to_segments,
+                               format_transcription_text, whisper_segments, whisper_work_dir)
+
+# Loaded once per worker process by init_worker
+_worker = {'model': None, 'model_name': None, 'language': None}
+
 def execute_whisper_command(audio_file_path, model="medium", language="English"):
     """Execute Whisper command and return results"""
-    
-    # Determine project directory (configurable via env var)
-    project_dir = os.environ.get(
-        "AUDIO_TEXT_CONVERTER_DIR",
-        "/Users/vijayaraghavanvedantham/Documents/VRI Tech Projects/audio-text-converter",
-    )
-    if not os.path.exists(project_dir):
-        # Fall back to the directory containing this script
-        project_dir = os.path.dirname(os.path.abspath(__file__))
-    
+
+    project_dir = whisper_work_dir()
+
     # Locate whisper executable inside possible virtualenv locations
     possible_whisper = [
         os.path.join(project_dir, 'whisper-env', 'bin', 'whisper'),
@@ -38,51 +51,47 @@ def execute_whisper_command(audio_file_path, model="medium", language="English")
     if not whisper_exec:
         whisper_exec = 'whisper'
 
+    # A directory of its own per run: files with the same stem from different
+    # folders (side_a/tape01.mp3, side_b/tape01.mp3) can run at the same time
+    output_dir = tempfile.mkdtemp(prefix=WHISPER_OUTPUT_DIR_PREFIX)
+
     # Construct the Whisper command
     command = [
         whisper_exec,
-        audio_file_path,
+        os.path.abspath(audio_file_path),
         "--model", model,
-        "--output_format", "txt",
+        "--output_format", "json",
+        "--output_dir", output_dir,
         "--language", language
     ]
-    
+
     start_time = time.time()
-    
+
     try:
         # Execute the command
         result = subprocess.run(
-            command, 
-            capture_output=True, 
-            text=True, 
+            command,
+            capture_output=True,
+            text=True,
             check=True,
             cwd=project_dir
         )
-        
+
         end_time = time.time()
         processing_time = end_time - start_time
-        
-        # Find the generated text file
-        audio_name = Path(audio_file_path).stem
-        text_file = f"{audio_name}.txt"
-        
-        transcription = ""
-        word_count = 0
-        
-        if os.path.exists(text_file):
-            with open(text_file, 'r', encoding='utf-8') as f:
-                transcription = f.read()
-                word_count = len(transcription.split())
-        
+
+        json_file = os.path.join(output_dir, f"{Path(audio_file_path).stem}.json")
+        with open(json_file, 'r', encoding='utf-8') as f:
+            whisper_result = json.load(f)
+
         return {
             "success": True,
-            "transcription": transcription,
-            "word_count": word_count,
+            "transcription": (whisper_result.get('text') or '').strip(),
+            "segments": whisper_segments(whisper_result),
             "processing_time": processing_time,
-            "output_file": text_file,
             "audio_file": audio_file_path
         }
-        
+
     except subprocess.CalledProcessError as e:
         return {
             "success": False,
@@ -94,20 +103,140 @@ def execute_whisper_command(audio_file_path, model="medium", language="English")
             "success": False,
             "error": str(e)
         }
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+def init_worker(model, language, threads):
+    """Worker process setup: its share of the cores, and the model loaded once"""
+    # Progress prints from the shared post-processing must not mix into JSON Lines on stdout
+    sys.stdout = sys.stderr
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[name] = str(threads)
+    _worker.update(model_name=model, language=language)
+    try:
+        import torch
+        import whisper
+        torch.set_num_threads(threads)
+        _worker['model'] = whisper.load_model(model)
+    except ImportError:
+        # No openai-whisper in this environment: the CLI loads the model per file
+        _worker['model'] = None
+
+def transcribe_file(audio_file_path):
+    """One JSON line's worth of result for an audio file, in a worker process"""
+    model, language = _worker['model_name'], _worker['language']
+    if _worker['model'] is not None:
+        start_time = time.time()
+        try:
+            whisper_result = _worker['model'].transcribe(audio_file_path, language=language, verbose=None)
+            result = {
+                "success": True,
+                "transcription": (whisper_result.get('text') or '').strip(),
+                "segments": whisper_segments(whisper_result),
+                "processing_time": time.time() - start_time
+            }
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+    else:
+        result = execute_whisper_command(audio_file_path, model=model, language=language)
+
+    result.pop('audio_file', None)
+    if result.get('success'):
+        # Same post-processing as the server
+        transcription = apply_pali_corrections(result['transcription'])
+        apply_pali_corrections_to_segments(result['segments'])
+        result.update({
+            "transcription": transcription,
+            "formatted_text": format_transcription_text(transcription),
+            "word_count": len(transcription.split())
+        })
+    return dict(file=audio_file_path, model=model, language=language, **result)
+
+def expand_inputs(patterns, manifest=None):
+    """Absolute paths of the files named by patterns (files or globs) and the manifest, in order, once each"""
+    if manifest:
+        # One path per line; blank lines and # comments are skipped
+        with open(manifest, 'r', encoding='utf-8') as f:
+            patterns = list(patterns) + [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    files = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            files.append(pattern)
+    return list(dict.fromkeys(os.path.abspath(path) for path in files))
+
+def completed_files(output_path):
+    """Files that already have a successful result line in output_path"""
+    done = set()
+    if output_path and os.path.exists(output_path):
+        with open(output_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interrupted run
+                    continue
+                if record.get('success'):
+                    done.add(record.get('file'))
+    return done
 
 def main():
-    if len(sys.argv) != 2:
-        print(json.dumps({"success": False, "error": "Usage: whisper_backend.py <audio_file_path>"}))
-        sys.exit(1)
-    
-    audio_file_path = sys.argv[1]
-    
-    if not os.path.exists(audio_file_path):
-        print(json.dumps({"success": False, "error": f"Audio file not found: {audio_file_path}"}))
-        sys.exit(1)
-    
-    result = execute_whisper_command(audio_file_path)
-    print(json.dumps(result, indent=2))
+    parser = argparse.ArgumentParser(description="Transcribe audio files with Whisper, one JSON line per file")
+    parser.add_argument('inputs', nargs='*', help="audio files or glob patterns (quote ** patterns)")
+    parser.add_argument('--manifest', help="file listing audio paths, one per line")
+    parser.add_argument('--workers', type=int, default=1, help="files transcribed in parallel (default 1)")
+    parser.add_argument('--model', default='medium', help="Whisper model (default medium)")
+    parser.add_argument('--language', default='English', help="spoken language (default English)")
+    parser.add_argument('--output', help="JSON Lines file to append results to (default stdout)")
+    parser.add_argument('--resume', action='store_true', help="skip files already transcribed in --output")
+    args = parser.parse_args()
+    if args.resume and not args.output:
+        parser.error("--resume needs --output")
+
+    files = expand_inputs(args.inputs, args.manifest)
+    if not files:
+        parser.error("no audio files given")
+    if args.resume:
+        done = completed_files(args.output)
+        skipped = len([path for path in files if path in done])
+        files = [path for path in files if path not in done]
+        print(f"♻️ Resuming: {skipped} files already transcribed, {len(files)} to go", file=sys.stderr)
+
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    if args.output and out.tell():
+        # Start on a fresh line after an interrupted run's partial one
+        with open(args.output, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                out.write('\n')
+    failures = 0
+    try:
+        missing = [path for path in files if not os.path.exists(path)]
+        for path in missing:
+            out.write(json.dumps({"file": path, "success": False, "error": f"Audio file not found: {path}"}) + '\n')
+        failures += len(missing)
+        files = [path for path in files if path not in missing]
+
+        # Workers split the cores instead of each taking all of them
+        workers = max(1, min(args.workers, len(files) or 1))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(args.model, args.language, threads)) as pool:
+            futures = {pool.submit(transcribe_file, path): path for path in files}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"file": futures[future], "success": False, "error": str(e)}
+                failures += not result.get('success')
+                out.write(json.dumps(result, ensure_ascii=False) + '\n')
+                out.flush()
+                print(f"{'✅' if result.get('success') else '❌'} {result['file']}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    sys.exit(1 if failures else 0)
 
 if __name__ == "__main__":
     main()